@@ -0,0 +1,194 @@
+# batches.py
+import queue
+import threading
+
+import numpy as np
+
+
+class MiniBatches:
+    """Shuffled mini-batches of (X, Y), gathered one at a time into reused buffers.
+
+    `epoch(seed)` yields the same (mini_batch_X, mini_batch_Y) pairs, in the
+    same order, as `DeepNeuralNetwork.random_mini_batches(X, Y, seed)`, but
+    only an index array is shuffled: every batch is copied from X and Y into
+    preallocated `dtype` buffers when it is needed, so nothing the size of
+    the dataset is ever allocated and X and Y can be `np.memmap`s larger
+    than RAM. Samples are columns of X and Y as in the notebooks
+    (`samples_axis=1`) or rows (`samples_axis=0`); batches always come out
+    as (features, samples). Samples stored one after the other in memory
+    (rows of a C-ordered file) are the cheapest to gather.
+
+    A yielded batch is only valid until the next one is requested: its
+    buffers are then reused. With `prefetch=True` a background thread
+    gathers the next batch while the current one is used.
+    """
+
+    def __init__(self, X, Y, mini_batch_size=64, samples_axis=1, prefetch=False, dtype=np.float32):
+        self.mini_batch_size = mini_batch_size
+        self.prefetch = prefetch
+        self.m = X.shape[samples_axis]
+        if Y.shape[samples_axis] != self.m:
+            raise ValueError(f"X has {self.m} samples but Y has {Y.shape[samples_axis]}")
+
+        # Both as (features, samples). np.take first copies a whole non-contiguous array,
+        # so samples are gathered as rows of the transpose when that is the contiguous one
+        self.sources = []
+        for data in (X, Y):
+            data = data if samples_axis == 1 else data.T
+            if data.flags.f_contiguous and not data.flags.c_contiguous:
+                self.sources.append((data.T, True))
+            else:
+                self.sources.append((data, False))
+
+        self.identity = np.arange(self.m)
+        self.indices = np.empty_like(self.identity)
+        size = min(mini_batch_size, self.m)
+        # The prefetching thread fills one set while the caller uses the other
+        self.buffers = [tuple(np.empty(self.buffer_shape(source, rows, size), dtype=dtype) for source, rows in self.sources)
+                        for _ in range(2 if prefetch else 1)]
+        # np.take also copies to a temporary when `out` has another dtype: gather in the data's dtype
+        # first. One set is enough, only one thread gathers
+        self.staging = [np.empty(self.buffer_shape(source, rows, size), dtype=source.dtype) if source.dtype != dtype else None
+                        for source, rows in self.sources]
+
+    def buffer_shape(self, source, rows, size):
+        return (size, source.shape[1]) if rows else (source.shape[0], size)
+
+    def __len__(self):
+        return -(-self.m // self.mini_batch_size)
+
+    def shuffle(self, seed):
+        """Shuffle the indices as np.random.permutation(m) does after np.random.seed(seed)"""
+        np.random.seed(seed)
+        np.copyto(self.indices, self.identity)
+        np.random.shuffle(self.indices)
+
+    def gather(self, k, buffers, shard=None):
+        """Copy mini-batch `k` of the current permutation into `buffers`; returns it as (features, samples) arrays.
+
+        With `shard=(i, n)` only the i-th of n near-equal parts of the mini-batch.
+        """
+        batch = self.indices[k*self.mini_batch_size : (k+1)*self.mini_batch_size]
+        if shard is not None:
+            i, n = shard
+            batch = batch[len(batch) * i // n : len(batch) * (i + 1) // n]
+        return tuple(self.take(source, rows, batch, buffer, staging)
+                     for (source, rows), buffer, staging in zip(self.sources, buffers, self.staging))
+
+    def take(self, source, rows, batch, buffer, staging=None):
+        axis = 0 if rows else 1
+        out = first(buffer, len(batch), rows)
+        # The indices are valid: mode='clip' only avoids the extra copy of mode='raise'
+        if staging is None:
+            np.take(source, batch, axis=axis, out=out, mode='clip')
+        else:
+            gathered = first(staging, len(batch), rows)
+            np.take(source, batch, axis=axis, out=gathered, mode='clip')
+            np.copyto(out, gathered)
+        return out.T if rows else out
+
+    def epoch(self, seed=0):
+        self.shuffle(seed)
+        if self.prefetch:
+            yield from self.prefetched()
+            return
+        for k in range(len(self)):
+            yield self.gather(k, self.buffers[0])
+
+    def prefetched(self):
+        free = queue.Queue()
+        for buffers in self.buffers:
+            free.put(buffers)
+        ready = queue.Queue()
+        stop = threading.Event()
+
+        def gather_all():
+            try:
+                for k in range(len(self)):
+                    buffers = free.get()
+                    if stop.is_set():
+                        return
+                    ready.put((buffers, self.gather(k, buffers)))
+            except Exception as e:
+                ready.put((None, e))
+
+        thread = threading.Thread(target=gather_all, name="mini-batch prefetch", daemon=True)
+        thread.start()
+        try:
+            for _ in range(len(self)):
+                buffers, batch = ready.get()
+                if buffers is None:
+                    raise batch
+                yield batch
+                # The caller asked for the next batch: these buffers can be refilled
+                free.put(buffers)
+        finally:
+            # Also when the caller stops early: wake the thread up so that it ends
+            stop.set()
+            free.put(None)
+            thread.join()
+
+
+def first(buffer, n, rows):
+    """The first n samples of a buffer as one contiguous block (for the shorter last batch)"""
+    if rows:
+        return buffer[:n]
+    return buffer.reshape(-1)[:buffer.shape[0] * n].reshape(buffer.shape[0], n)
+
+
+if __name__ == "__main__":
+    import os
+    import time
+    import argparse
+    import tempfile
+    import tracemalloc
+
+    from deep_neural_network import DeepNeuralNetwork
+
+    parser = argparse.ArgumentParser(description="Peak memory and first-batch latency of an epoch of mini-batches, before and after")
+    parser.add_argument('--samples', type=int, default=200000)
+    parser.add_argument('--features', type=int, default=784)
+    parser.add_argument('--classes', type=int, default=10)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--memmap', action='store_true', help="keep the dataset in a file on disk, with samples as rows")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    samples_axis = 0 if args.memmap else 1
+    shape_X = (args.samples, args.features) if args.memmap else (args.features, args.samples)
+    shape_Y = (args.samples, args.classes) if args.memmap else (args.classes, args.samples)
+    if args.memmap:
+        directory = tempfile.mkdtemp()
+        X = np.memmap(os.path.join(directory, 'X.dat'), dtype=np.float32, mode='w+', shape=shape_X)
+        Y = np.memmap(os.path.join(directory, 'Y.dat'), dtype=np.float32, mode='w+', shape=shape_Y)
+        for start in range(0, args.samples, 10000):
+            X[start:start + 10000] = rng.random((min(10000, args.samples - start), args.features), dtype=np.float32)
+        Y[np.arange(args.samples), rng.integers(0, args.classes, args.samples)] = 1
+        X.flush()
+        Y.flush()
+    else:
+        X = rng.random(shape_X, dtype=np.float32)
+        Y = np.zeros(shape_Y, dtype=np.float32)
+        Y[rng.integers(0, args.classes, args.samples), np.arange(args.samples)] = 1
+    print(f"Dataset: {X.nbytes / 2**20:.0f} MiB of X ({'memmap, samples as rows' if args.memmap else 'in memory'}), "
+          f"mini-batches of {args.batch_size}")
+
+    model = DeepNeuralNetwork([args.features, args.classes], mini_batch_size=args.batch_size, print_cost=False)
+    runs = [('prefetch', lambda seed: MiniBatches(X, Y, args.batch_size, samples_axis, prefetch=True).epoch(seed)),
+            ('streaming', lambda seed: MiniBatches(X, Y, args.batch_size, samples_axis).epoch(seed))]
+    if not args.memmap:
+        # The notebook's version only knows samples as columns
+        runs.insert(0, ('notebook', lambda seed: iter(model.random_mini_batches(X, Y, seed))))
+
+    for name, epoch in runs:
+        tracemalloc.start()
+        start = time.perf_counter()
+        batches = epoch(1)
+        next(batches)
+        latency = time.perf_counter() - start
+        checksum = sum(float(batch_X[0, 0]) for batch_X, _ in batches)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{name:>9}: first batch after {latency * 1000:7.1f} ms, epoch in {elapsed:5.2f} s, "
+              f"peak {peak / 2**20:7.1f} MiB allocated (checksum {checksum:.3f})")
@@ -0,0 +1,123 @@
+import time
+import argparse
+import tracemalloc
+
+import numpy as np
+import sklearn.datasets
+from sklearn.preprocessing import OneHotEncoder
+from sklearn.model_selection import train_test_split
+
+from deep_neural_network import DeepNeuralNetwork, OPTIMIZERS
+
+
+def load_digits():
+    """The MNIST digits split of the optimization notebook: X_train, y_train as (features, samples), X_test, y_test as rows"""
+    digits = sklearn.datasets.load_digits()
+    labels = digits.target.reshape(-1, 1)
+    one_hot_labels = OneHotEncoder(sparse_output=False).fit_transform(labels)
+    images_flat = digits.images.reshape(digits.images.shape[0], -1)
+    X_train, X_test, y_train, y_test = train_test_split(images_flat, one_hot_labels, test_size=0.2, random_state=42)
+    return X_train.T, y_train.T, X_test, y_test
+
+
+def legacy_update(model, parameters, grads, v, s, optimizer, t):
+    """The notebook's per-layer dict updates (float64, over every layer), for comparison"""
+    L = len(parameters) // 2
+    lr = model.learning_rate
+    for l in range(1, L + 1):
+        for p in ('W', 'b'):
+            key, dkey = p + str(l), 'd' + p + str(l)
+            if optimizer == 'gd':
+                parameters[key] -= lr * grads[dkey]
+            elif optimizer == 'momentum':
+                v[dkey] = model.beta * v[dkey] + (1 - model.beta) * grads[dkey]
+                parameters[key] -= lr * v[dkey]
+            elif optimizer == 'rms':
+                s[dkey] = model.beta * s[dkey] + (1 - model.beta) * grads[dkey]**2
+                parameters[key] -= lr * grads[dkey] / (np.sqrt(s[dkey]) + model.epsilon)
+            elif optimizer == 'adam':
+                v[dkey] = model.beta1 * v[dkey] + (1 - model.beta1) * grads[dkey]
+                v_corrected = v[dkey] / (1 - model.beta1**t)
+                s[dkey] = model.beta2 * s[dkey] + (1 - model.beta2) * np.square(grads[dkey])
+                s_corrected = s[dkey] / (1 - model.beta2**t)
+                parameters[key] -= lr * v_corrected / (np.sqrt(s_corrected) + model.epsilon)
+
+
+def measure(function, repeats):
+    """Mean seconds and bytes allocated by NumPy per call of `function(i)`"""
+    tracemalloc.start()
+    allocated = 0
+    start = time.perf_counter()
+    for i in range(1, repeats + 1):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        function(i)
+        allocated += tracemalloc.get_traced_memory()[1] - before
+    elapsed = time.perf_counter() - start
+    tracemalloc.stop()
+    # tracemalloc slows every allocation down: time again without it
+    start = time.perf_counter()
+    for i in range(1, repeats + 1):
+        function(i)
+    return (time.perf_counter() - start) / repeats, allocated / repeats
+
+
+def make_model(layers_dims, optimizer, batch_size):
+    model = DeepNeuralNetwork(layers_dims, init_type='he', mini_batch_size=batch_size, print_cost=False)
+    model.learning_rate = 0.001
+    if optimizer == 'momentum':
+        model.v = model.initialize_velocity()
+    elif optimizer == 'rms':
+        model.s = model.initialize_rms()
+    elif optimizer == 'adam':
+        model.v, model.s = model.initialize_adam()
+    return model
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cost of a training step of DeepNeuralNetwork on the MNIST digits")
+    parser.add_argument('--layers', type=int, nargs='+', default=[32, 16], help="hidden layer sizes")
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--steps', type=int, default=2000)
+    parser.add_argument('--train', type=int, default=0, metavar='EPOCHS',
+                        help="also train with every optimizer for EPOCHS epochs and report the test accuracy")
+    args = parser.parse_args()
+
+    X_train, y_train, X_test, y_test = load_digits()
+    layers_dims = [X_train.shape[0]] + args.layers + [y_train.shape[0]]
+    batches = make_model(layers_dims, 'gd', args.batch_size).random_mini_batches(
+        X_train.astype(np.float32), y_train.astype(np.float32), seed=1)
+    batches = [batch for batch in batches if batch[0].shape[1] == args.batch_size]
+    print(f"Layers {layers_dims}, {sum(stop - start for _, _, start, stop in make_model(layers_dims, 'gd', 1).layout)} parameters, "
+          f"mini-batches of {args.batch_size}")
+
+    for optimizer in OPTIMIZERS:
+        model = make_model(layers_dims, optimizer, args.batch_size)
+        model.step(*batches[0], optimizer, 1)
+
+        # The notebook's dicts of float64 arrays, with the same gradients
+        parameters = {key: value.astype(np.float64) for key, value in model.parameters.items()}
+        grads = {key: value.astype(np.float64) for key, value in model.grads.items()}
+        v = {key: np.zeros_like(value) for key, value in grads.items()}
+        s = {key: np.zeros_like(value) for key, value in grads.items()}
+        legacy_time, legacy_allocated = measure(
+            lambda t: legacy_update(model, parameters, grads, v, s, optimizer, t), args.steps)
+        fused_time, fused_allocated = measure(lambda t: model.update_parameters(optimizer, t), args.steps)
+        step_time, step_allocated = measure(
+            lambda t: model.step(*batches[t % len(batches)], optimizer, t), args.steps)
+
+        print(f"{optimizer:>8}: update {legacy_time * 1e6:6.1f} -> {fused_time * 1e6:5.1f} us, "
+              f"{legacy_allocated / 1024:5.1f} -> {fused_allocated / 1024:4.1f} KiB allocated | "
+              f"full step {step_time * 1e6:6.1f} us, {step_allocated / 1024:5.1f} KiB allocated")
+
+    for optimizer in OPTIMIZERS if args.train else ():
+        model = DeepNeuralNetwork(layers_dims, init_type='he', mini_batch_size=args.batch_size, print_cost=False)
+        start = time.perf_counter()
+        model.fit(X_train, y_train, learning_rate=0.001, num_epochs=args.train, optimizer=optimizer)
+        elapsed = time.perf_counter() - start
+        print(f"{optimizer:>8}: {args.train} epochs in {elapsed:.1f} s "
+              f"({elapsed / (args.train + 1) * 1000:.1f} ms/epoch), test accuracy {model.score(X_test, y_test):.3f}")
+
+
+if __name__ == "__main__":
+    main()
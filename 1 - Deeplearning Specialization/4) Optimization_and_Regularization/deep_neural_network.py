@@ -0,0 +1,362 @@
+# deep_neural_network.py
+import math
+
+import numpy as np
+
+from batches import MiniBatches
+
+OPTIMIZERS = ('gd', 'momentum', 'rms', 'adam')
+
+
+class DeepNeuralNetwork():
+    """The network of the optimization notebook, with all its numbers in a few flat float32 buffers.
+
+    Parameters, gradients and optimizer moments each live in one contiguous
+    array (`flat_parameters`, `flat_grads`, `flat_v`, `flat_s`); the
+    `parameters`, `grads`, `v` and `s` dicts keyed 'W1', 'b1', ... ('dW1', 'db1',
+    ... for the others) hold views into them, so the per-layer code reads
+    and writes the buffers directly. The optimizers then update the whole
+    model with a handful of in-place operations, without temporaries.
+    """
+
+    def __init__(self,
+                 layers_dims,
+                 init_type='random', mini_batch_size=64,
+                 beta=0.9, beta1=0.9, beta2=0.999, epsilon=1e-8,
+                 print_cost=True):
+
+        np.random.seed(3)
+
+        self.layers_dims = layers_dims
+        self.beta = beta
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.epsilon = epsilon
+        # 1 - 1e-8 rounds to 1 in float32: the predictions are clipped at least one float32 step away from 0 and 1
+        self.clip = max(epsilon, float(np.finfo(np.float32).eps))
+        self.mini_batch_size = mini_batch_size
+        self.print_cost = print_cost
+
+        # (name, shape, start, stop) of every parameter in the flat buffers
+        self.layout = []
+        size = 0
+        for l in range(1, len(layers_dims)):
+            for name, shape in (('W' + str(l), (layers_dims[l], layers_dims[l-1])), ('b' + str(l), (layers_dims[l], 1))):
+                self.layout.append((name, shape, size, size + shape[0] * shape[1]))
+                size += shape[0] * shape[1]
+
+        self.flat_parameters = np.zeros(size, dtype=np.float32)
+        self.flat_grads = np.zeros(size, dtype=np.float32)
+        # Holds the step of the optimizers, so that they allocate nothing
+        self.scratch = np.zeros(size, dtype=np.float32)
+        self.parameters = self.views(self.flat_parameters)
+        self.grads = self.views(self.flat_grads, 'd')
+        self.flat_v = self.flat_s = None
+        self.v = self.s = {}
+
+        # Same random draws as the notebook, cast to float32
+        for l in range(1, len(layers_dims)):
+            if init_type == 'random':
+                self.parameters['W' + str(l)][...] = np.random.randn(layers_dims[l], layers_dims[l-1]) * 0.01
+            elif init_type == 'he':
+                self.parameters['W' + str(l)][...] = np.random.randn(layers_dims[l], layers_dims[l-1]) * np.sqrt(2 / layers_dims[l-1])
+
+    def views(self, flat, prefix=''):
+        """Dict of the per-layer arrays of `flat`, keyed like `parameters` with `prefix` in front"""
+        return {prefix + name: flat[start:stop].reshape(shape) for name, shape, start, stop in self.layout}
+
+    def attach(self, flat_parameters=None, flat_grads=None):
+        """Use other float32 arrays (in shared memory, say) as the flat parameter and gradient buffers.
+
+        Nothing is copied: the new arrays are used as they are.
+        """
+        if flat_parameters is not None:
+            self.flat_parameters = flat_parameters
+            self.parameters = self.views(flat_parameters)
+        if flat_grads is not None:
+            self.flat_grads = flat_grads
+            self.grads = self.views(flat_grads, 'd')
+
+    def random_mini_batches(self, X, Y, seed=0):
+        np.random.seed(seed)
+        m = X.shape[1]  # number of training examples
+        mini_batches = []
+
+        # Shuffle (X, Y)
+        permutation = list(np.random.permutation(m))
+        shuffled_X = X[:, permutation]
+        shuffled_Y = Y[:, permutation]
+
+        # Partition (shuffled_X, shuffled_Y)
+        num_complete_minibatches = m // self.mini_batch_size
+
+        for k in range(num_complete_minibatches):
+            mini_batch_X = shuffled_X[:, k*self.mini_batch_size : (k+1)*self.mini_batch_size]
+            mini_batch_Y = shuffled_Y[:, k*self.mini_batch_size : (k+1)*self.mini_batch_size]
+            mini_batches.append((mini_batch_X, mini_batch_Y))
+
+        # Handle the end case (last mini-batch < mini_batch_size)
+        if m % self.mini_batch_size != 0:
+            mini_batch_X = shuffled_X[:, num_complete_minibatches*self.mini_batch_size :]
+            mini_batch_Y = shuffled_Y[:, num_complete_minibatches*self.mini_batch_size :]
+            mini_batches.append((mini_batch_X, mini_batch_Y))
+
+        return mini_batches
+
+    def initialize_velocity(self):
+        self.flat_v = np.zeros_like(self.flat_parameters)
+        return self.views(self.flat_v, 'd')
+
+    def initialize_rms(self):
+        self.flat_s = np.zeros_like(self.flat_parameters)
+        return self.views(self.flat_s, 'd')
+
+    def initialize_adam(self):
+        return self.initialize_velocity(), self.initialize_rms()
+
+    def update_parameters_gd(self):
+        # W := W - lr * dW, for every layer (the notebook's loop skipped the last one)
+        np.multiply(self.flat_grads, self.learning_rate, out=self.scratch)
+        self.flat_parameters -= self.scratch
+
+    def update_parameters_momentum(self):
+        # v := beta * v + (1 - beta) * dW;  W := W - lr * v
+        np.multiply(self.flat_grads, 1 - self.beta, out=self.scratch)
+        self.flat_v *= self.beta
+        self.flat_v += self.scratch
+        np.multiply(self.flat_v, self.learning_rate, out=self.scratch)
+        self.flat_parameters -= self.scratch
+
+    def update_parameters_rms(self):
+        # s := beta * s + (1 - beta) * dW^2;  W := W - lr * dW / (sqrt(s) + eps)
+        np.square(self.flat_grads, out=self.scratch)
+        self.scratch *= 1 - self.beta
+        self.flat_s *= self.beta
+        self.flat_s += self.scratch
+        np.sqrt(self.flat_s, out=self.scratch)
+        self.scratch += self.epsilon
+        np.divide(self.flat_grads, self.scratch, out=self.scratch)
+        self.scratch *= self.learning_rate
+        self.flat_parameters -= self.scratch
+
+    def update_parameters_adam(self, t):
+        # v and s as for momentum and RMSprop, then with bias correction
+        # W := W - lr / (1 - beta1^t) * v / (sqrt(s) / sqrt(1 - beta2^t) + eps)
+        np.multiply(self.flat_grads, 1 - self.beta1, out=self.scratch)
+        self.flat_v *= self.beta1
+        self.flat_v += self.scratch
+        np.square(self.flat_grads, out=self.scratch)
+        self.scratch *= 1 - self.beta2
+        self.flat_s *= self.beta2
+        self.flat_s += self.scratch
+
+        np.sqrt(self.flat_s, out=self.scratch)
+        self.scratch *= 1 / math.sqrt(1 - self.beta2**t)
+        self.scratch += self.epsilon
+        np.divide(self.flat_v, self.scratch, out=self.scratch)
+        self.scratch *= self.learning_rate / (1 - self.beta1**t)
+        self.flat_parameters -= self.scratch
+
+    def update_parameters(self, optimizer, t=0):
+        if optimizer == 'gd':
+            self.update_parameters_gd()
+        elif optimizer == 'momentum':
+            self.update_parameters_momentum()
+        elif optimizer == 'rms':
+            self.update_parameters_rms()
+        elif optimizer == 'adam':
+            self.update_parameters_adam(t)
+
+    def compute_cost(self, AL, Y):
+        m = Y.shape[1]
+        # Clip values to avoid log(0) and log(1) errors
+        AL = np.clip(AL, self.clip, 1 - self.clip)
+        cost = (-1/m) * np.sum(np.multiply(Y, np.log(AL)) + np.multiply(1-Y, np.log(1-AL)))
+        cost = np.squeeze(cost)
+        return cost
+
+    def linear_forward(self, A, W, b):
+        Z = np.dot(W, A) + b
+        cache = (A, W, b)
+        return Z, cache
+
+    def sigmoid(self, Z):
+        # Same as 1/(1+exp(-Z)), without the float32 overflow of exp for Z < -88
+        A = 0.5 * (1 + np.tanh(0.5 * Z))
+        cache = Z
+        return A, cache
+
+    def relu(self, Z):
+        A = np.maximum(0, Z)
+        cache = Z
+        return A, cache
+
+    def linear_activation_forward(self, A_prev, W, b, activation):
+        Z, linear_cache = self.linear_forward(A_prev, W, b)
+        if activation == 'sigmoid':
+            A, activation_cache = self.sigmoid(Z)
+        elif activation == 'relu':
+            A, activation_cache = self.relu(Z)
+
+        cache = (linear_cache, activation_cache)
+        return A, cache
+
+    def forward_propagation(self, X):
+        caches = []
+        A = X
+        L = len(self.parameters) // 2
+
+        for l in range(1, L):
+            A_prev = A
+            A, cache = self.linear_activation_forward(A_prev, self.parameters['W' + str(l)], self.parameters['b' + str(l)], 'relu')
+            caches.append(cache)
+
+        AL, cache = self.linear_activation_forward(A, self.parameters['W' + str(L)], self.parameters['b' + str(L)], 'sigmoid')
+        caches.append(cache)
+
+        return AL, caches
+
+    def backward_propagation(self, AL, Y, caches):
+        """Writes dW and db of every layer into `flat_grads` (through the `grads` views)"""
+        L = len(caches)
+        Y = Y.reshape(AL.shape)
+
+        AL = np.clip(AL, self.clip, 1 - self.clip)
+
+        # Initializing the backpropagation
+        dAL = - (np.divide(Y, AL) - np.divide(1 - Y, 1 - AL))
+
+        dA = self.linear_activation_backward(dAL, caches[L-1], 'sigmoid', L)
+
+        # Loop from l=L-2 to l=0
+        for l in reversed(range(L-1)):
+            dA = self.linear_activation_backward(dA, caches[l], 'relu', l + 1)
+
+    def linear_activation_backward(self, dA, cache, activation, l):
+        linear_cache, activation_cache = cache
+
+        if activation == 'relu':
+            dZ = self.relu_backward(dA, activation_cache)
+        elif activation == 'sigmoid':
+            dZ = self.sigmoid_backward(dA, activation_cache)
+
+        return self.linear_backward(dZ, linear_cache, self.grads['dW' + str(l)], self.grads['db' + str(l)])
+
+    def linear_backward(self, dZ, cache, dW, db):
+        """Fills `dW` and `db` in place and returns dA_prev"""
+        A_prev, W, b = cache
+        m = A_prev.shape[1]
+
+        np.dot(dZ, A_prev.T, out=dW)
+        dW *= 1./m
+        np.sum(dZ, axis=1, keepdims=True, out=db)
+        db *= 1./m
+        return np.dot(W.T, dZ)
+
+    def relu_backward(self, dA, cache):
+        Z = cache
+        dZ = np.array(dA, copy=True)
+        dZ[Z <= 0] = 0
+        return dZ
+
+    def sigmoid_backward(self, dA, cache):
+        Z = cache
+        s = 0.5 * (1 + np.tanh(0.5 * Z))
+        dZ = dA * s * (1-s)
+        return dZ
+
+    def compute_gradients(self, X, Y):
+        """Forward and backward pass on a mini-batch, leaving its gradients in `flat_grads`; returns its cost"""
+        AL, caches = self.forward_propagation(X)
+        cost = self.compute_cost(AL, Y)
+        self.backward_propagation(AL, Y, caches)
+        return cost
+
+    def local_gradients(self, minibatches, seed):
+        """Gradients of every mini-batch of an epoch, computed here; yields the cost of each"""
+        for minibatch_X, minibatch_Y in minibatches.epoch(seed):
+            yield self.compute_gradients(minibatch_X, minibatch_Y)
+
+    def step(self, X, Y, optimizer='gd', t=0):
+        """One forward pass, backward pass and parameter update on a mini-batch; returns its cost"""
+        cost = self.compute_gradients(X, Y)
+        self.update_parameters(optimizer, t)
+        return cost
+
+    def fit(self, X, Y, learning_rate=0.001, num_epochs=5000, optimizer='gd', plot_cost=False, return_data=True,
+            samples_axis=1, prefetch=False, workers=1):
+        """Train on X (features, samples) and Y (classes, samples), or with `samples_axis=0` samples as rows.
+
+        The mini-batches are gathered one at a time into float32 buffers (see
+        MiniBatches), so X and Y can also be np.memmaps; `prefetch` gathers the
+        next one on a background thread. With `workers` > 1 every mini-batch
+        is split across that many processes (see DataParallel).
+        """
+        if optimizer not in OPTIMIZERS:
+            raise ValueError(f"Unknown optimizer '{optimizer}', expected one of {', '.join(OPTIMIZERS)}")
+        self.learning_rate = learning_rate
+        costs = []
+        t = 0
+        seed = 0
+        # Same batches as random_mini_batches for each seed
+        if workers > 1:
+            from parallel import DataParallel
+
+            minibatches = DataParallel(self, X, Y, workers, samples_axis)
+            gradients = minibatches.gradients
+        else:
+            minibatches = MiniBatches(X, Y, self.mini_batch_size, samples_axis, prefetch)
+            gradients = lambda seed: self.local_gradients(minibatches, seed)
+
+        if optimizer == 'momentum':
+            self.v = self.initialize_velocity()
+        elif optimizer == 'rms':
+            self.s = self.initialize_rms()
+        elif optimizer == 'adam':
+            self.v, self.s = self.initialize_adam()
+
+        try:
+            for i in range(num_epochs + 1):
+                seed += 1
+                cost_total = 0
+
+                for cost in gradients(seed):
+                    t += 1
+                    self.update_parameters(optimizer, t)
+                    cost_total = cost
+
+                cost_avg = cost_total / len(minibatches)
+
+                # Print the cost every 1000 epoch
+                if self.print_cost and i % 1000 == 0:
+                    print("Cost after epoch %i: %f" % (i, cost_avg))
+                if self.print_cost and i % 100 == 0:
+                    costs.append(cost_avg)
+        finally:
+            if workers > 1:
+                minibatches.close()
+
+        if plot_cost:
+            import matplotlib.pyplot as plt
+
+            # plot the cost
+            plt.plot(costs)
+            plt.ylabel('cost')
+            plt.xlabel('epochs (per 100)')
+            plt.title("Learning rate = " + str(learning_rate))
+            plt.show()
+
+        if return_data:
+            return costs
+
+    def predict(self, X):
+        AL, _ = self.forward_propagation(np.asarray(X, dtype=np.float32))
+        predictions = np.argmax(AL, axis=0)
+        return predictions
+
+    def score(self, X, y_true):
+        """Accuracy on samples as rows: `X` (samples, features) and one-hot `y_true` (samples, classes)"""
+        y_pred = self.predict(X.T)
+        y_true = np.argmax(y_true, axis=1)
+        accuracy = np.mean(y_pred == y_true)
+        return accuracy
@@ -0,0 +1,198 @@
+# parallel.py
+import mmap
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from batches import MiniBatches
+from deep_neural_network import DeepNeuralNetwork
+
+
+class DataParallel:
+    """Splits every mini-batch of `model` across `workers` processes.
+
+    The model's flat parameters are moved into shared memory, where the
+    workers read them directly. Each worker shuffles the same permutation
+    as MiniBatches (so the batches are those of single-process training),
+    gathers its part of every mini-batch and writes that part's gradient,
+    weighted by its share of the samples, in its own row of a shared
+    (workers, parameters) array. The rows are then summed into the model's
+    `flat_grads` (the all-reduce) and the optimizer step happens here as
+    usual, between two mini-batches.
+
+    X and Y are copied into shared memory once, with samples contiguous;
+    np.memmaps (as opened by np.memmap, not views of them) are reopened by
+    the workers instead. `close()` moves the parameters back into a private
+    array and stops the workers.
+    """
+
+    def __init__(self, model, X, Y, workers=2, samples_axis=1):
+        self.model = model
+        self.workers = workers
+        self.mini_batch_size = model.mini_batch_size
+        self.m = X.shape[samples_axis]
+        self.blocks = []
+
+        size = model.flat_parameters.size
+        parameters, parameters_spec = self.shared_array((size,), np.float32)
+        parameters[...] = model.flat_parameters
+        model.attach(parameters)
+        self.grads, grads_spec = self.shared_array((workers, size), np.float32)
+        spec = {
+            'layers_dims': model.layers_dims,
+            'mini_batch_size': model.mini_batch_size,
+            'epsilon': model.epsilon,
+            'samples_axis': samples_axis,
+            'parameters': parameters_spec,
+            'grads': grads_spec,
+            'data': [self.share(data, samples_axis) for data in (X, Y)],
+        }
+
+        context = multiprocessing.get_context()
+        self.connections = []
+        self.processes = []
+        for i in range(workers):
+            connection, child = context.Pipe()
+            process = context.Process(target=work, args=(i, workers, spec, child), name=f"worker {i}", daemon=True)
+            process.start()
+            child.close()
+            self.connections.append(connection)
+            self.processes.append(process)
+
+    def shared_array(self, shape, dtype, order='C'):
+        """A new array in shared memory and the spec a worker opens it with"""
+        block = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1))
+        self.blocks.append(block)
+        spec = ('shm', block.name, np.dtype(dtype).str, shape, order)
+        return np.ndarray(shape, dtype=dtype, buffer=block.buf, order=order), spec
+
+    def share(self, data, samples_axis):
+        if isinstance(data, np.memmap) and isinstance(data.base, mmap.mmap):
+            order = 'C' if data.flags.c_contiguous else 'F'
+            return ('memmap', data.filename, data.dtype.str, data.shape, data.offset, order)
+        # Samples contiguous in memory, the cheapest to gather
+        shared, spec = self.shared_array(data.shape, data.dtype, 'F' if samples_axis == 1 else 'C')
+        shared[...] = data
+        return spec
+
+    def __len__(self):
+        return -(-self.m // self.mini_batch_size)
+
+    def gradients(self, seed):
+        """Gradients of every mini-batch of an epoch, all-reduced into the model's `flat_grads`; yields the cost of each"""
+        for connection in self.connections:
+            connection.send(('epoch', seed))
+        for k in range(len(self)):
+            for connection in self.connections:
+                connection.send(('step', k))
+            cost = 0.0
+            for connection in self.connections:
+                result = connection.recv()
+                if isinstance(result, Exception):
+                    raise result
+                cost += result
+            np.sum(self.grads, axis=0, out=self.model.flat_grads)
+            yield cost
+
+    def close(self):
+        # Keep the trained parameters once the shared memory is gone
+        self.model.attach(self.model.flat_parameters.copy())
+        self.grads = None
+        for connection in self.connections:
+            try:
+                connection.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+
+def open_shared(spec, blocks):
+    if spec[0] == 'memmap':
+        _, filename, dtype, shape, offset, order = spec
+        return np.memmap(filename, dtype=dtype, mode='r', offset=offset, shape=shape, order=order)
+    _, name, dtype, shape, order = spec
+    block = shared_memory.SharedMemory(name=name)
+    blocks.append(block)
+    return np.ndarray(shape, dtype=dtype, buffer=block.buf, order=order)
+
+
+def work(index, workers, spec, connection):
+    """Worker process: gradients of its part of each mini-batch it is asked for, until it receives None"""
+    blocks = []
+    try:
+        model = DeepNeuralNetwork(spec['layers_dims'], init_type='zero', mini_batch_size=spec['mini_batch_size'],
+                                  epsilon=spec['epsilon'], print_cost=False)
+        model.attach(open_shared(spec['parameters'], blocks), open_shared(spec['grads'], blocks)[index])
+        X, Y = (open_shared(data, blocks) for data in spec['data'])
+        minibatches = MiniBatches(X, Y, spec['mini_batch_size'], spec['samples_axis'])
+
+        while True:
+            message = connection.recv()
+            if message is None:
+                break
+            command, value = message
+            if command == 'epoch':
+                minibatches.shuffle(value)
+                continue
+
+            X_shard, Y_shard = minibatches.gather(value, minibatches.buffers[0], (index, workers))
+            if X_shard.shape[1] == 0:
+                # Fewer samples in the last mini-batch than workers
+                model.flat_grads[...] = 0
+                connection.send(0.0)
+                continue
+            cost = model.compute_gradients(X_shard, Y_shard)
+            # The mini-batch gradient and cost are means over its samples: weight this part by its share
+            share = X_shard.shape[1] / min(minibatches.mini_batch_size, minibatches.m - value * minibatches.mini_batch_size)
+            model.flat_grads *= share
+            connection.send(float(cost) * share)
+    except Exception as e:
+        connection.send(e)
+    finally:
+        # Release the views before the shared memory
+        model = minibatches = X = Y = None
+        for block in blocks:
+            block.close()
+
+
+if __name__ == "__main__":
+    import time
+    import argparse
+
+    from benchmark import load_digits
+
+    parser = argparse.ArgumentParser(description="Training time of DeepNeuralNetwork on the MNIST digits with 1 to N worker processes")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--layers', type=int, nargs='+', default=[256, 128], help="hidden layer sizes")
+    parser.add_argument('--batch-size', type=int, default=512)
+    parser.add_argument('--epochs', type=int, default=30)
+    parser.add_argument('--optimizer', default='adam')
+    parser.add_argument('--learning-rate', type=float, default=0.001)
+    args = parser.parse_args()
+
+    X_train, y_train, X_test, y_test = load_digits()
+    layers_dims = [X_train.shape[0]] + args.layers + [y_train.shape[0]]
+    print(f"Layers {layers_dims}, mini-batches of {args.batch_size}, {args.epochs} epochs of {args.optimizer}, "
+          f"{multiprocessing.cpu_count()} CPUs")
+
+    reference = None
+    baseline = None
+    for workers in args.workers:
+        model = DeepNeuralNetwork(layers_dims, init_type='he', mini_batch_size=args.batch_size, print_cost=False)
+        start = time.perf_counter()
+        model.fit(X_train, y_train, args.learning_rate, args.epochs, args.optimizer, workers=workers)
+        elapsed = time.perf_counter() - start
+        if reference is None:
+            reference, baseline = model.flat_parameters, elapsed
+        difference = np.abs(model.flat_parameters - reference).max()
+        print(f"{workers:>2} worker{'s' if workers > 1 else ' '}: {elapsed / (args.epochs + 1) * 1000:7.1f} ms/epoch, "
+              f"speed-up {baseline / elapsed:4.2f}, test accuracy {model.score(X_test, y_test):.3f}, "
+              f"max parameter difference {difference:.1e}")
@@ -1,39 +1,15 @@
-import streamlit as st
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing.sequence import pad_sequences
-import pickle
-import json
-import numpy as np
+import sys
+import os
+
+# Add the src directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 
-class SentimentAnalyzer:
-    def __init__(self, config, model, tokenizer):
-        self.config = config
-        self.model = model
-        self.tokenizer = tokenizer
-    
-    def preprocess_text(self, text):
-        tokens = self.tokenizer.texts_to_sequences([text])
-        padded = pad_sequences(
-            tokens,
-            maxlen=self.config['max_sequence_length'],
-            padding=self.config['padding_strategy'],
-            truncating=self.config['truncating_strategy']
-        )
-        return padded
-    
-    def predict_sentiment(self, text):
-        preprocessed = self.preprocess_text(text)
-        prediction = self.model.predict(preprocessed)[0][0]
-        return float(prediction)
+import streamlit as st
+from analyzer import load_analyzer
 
 @st.cache_resource
 def load_model_and_tokenizer():
-    model = load_model('sentiment_v2/sentiment_model_v2.h5')
-    with open('sentiment_v2/tokenizer.pickle', 'rb') as handle:
-        tokenizer = pickle.load(handle)
-    with open('sentiment_v2/model_config.json') as f:
-        config = json.load(f)
-    return SentimentAnalyzer(config, model, tokenizer)
+    return load_analyzer('sentiment_v2', cache_size=10000)
 
 st.set_page_config(
     page_title="Sentiment Analysis Model",
@@ -47,6 +23,10 @@ st.title("Sentiment Analysis Model")
 st.write("This is a simple sentiment analysis model that uses a LSTM neural network to predict the sentiment of a given text. The model was trained on the sentiment140 dataset sourced by Kaggle.")
 
 analyzer = load_model_and_tokenizer()
+if analyzer.cache.check_files():
+    # The model or tokenizer files were replaced, reload them together with an empty cache
+    load_model_and_tokenizer.clear()
+    analyzer = load_model_and_tokenizer()
 
 text = st.text_area("Enter some text to analyze", "I love this product!")
 analyze_button = st.button("Analyze")
@@ -0,0 +1,556 @@
+import sys
+import os
+
+# Add the src directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import json
+import time
+import pickle
+import argparse
+import shutil
+import tempfile
+import threading
+import subprocess
+import http.client
+import numpy as np
+
+from analyzer import load_analyzer
+from numpy_model import numpy_model_dir
+from vocabulary import VOCAB_DIR, VocabularyTokenizer
+from glove import GloveStore, store_dir
+
+COLUMNS = ['target', 'id', 'date', 'flag', 'user', 'text']
+
+SAMPLE_SENTENCES = [
+    'This movie is fantastic. I love it',
+    'I did not like the way you talked about it',
+    'You are horrible when you sing',
+    'That song is the worst I have ever heard',
+    'I love the way she dances in the video',
+    'If you are ten years old, you will love this terrible cartoon'
+]
+
+
+def load_texts(csv_path, rows):
+    """Read `rows` tweets from a sentiment140 CSV, or repeat the sample sentences"""
+    if csv_path is None:
+        return [SAMPLE_SENTENCES[i % len(SAMPLE_SENTENCES)] for i in range(rows)]
+
+    import pandas as pd
+    df = pd.read_csv(csv_path, encoding='ISO-8859-1', header=None, names=COLUMNS, usecols=['text'], nrows=rows)
+    return df['text'].astype(str).tolist()
+
+
+def best_time(fn, *args, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def benchmark_buckets(args):
+    texts = load_texts(args.csv, args.rows)
+    analyzer = load_analyzer(args.model_dir, batch_size=args.batch_size)
+
+    results = {}
+    for bucketed in (False, True):
+        analyzer.bucketed = bucketed
+        # Warm-up, so graph tracing for every bucket shape is not timed
+        analyzer.predict_batch(texts[:args.batch_size])
+        elapsed, scores = best_time(analyzer.predict_batch, texts)
+        results[bucketed] = (elapsed, scores)
+
+    lengths = np.count_nonzero(analyzer.preprocess_texts(texts), axis=1)
+    print(f"Texts: {len(texts)}, mean tokens: {lengths.mean():.1f}, buckets: {analyzer.length_buckets}")
+    for bucketed, (elapsed, _) in results.items():
+        name = "bucketed" if bucketed else "fixed-length"
+        print(f"{name:>12}: {elapsed:.3f} s ({len(texts) / elapsed:.0f} texts/s)")
+
+    fixed, bucketed = results[False][1], results[True][1]
+    delta = np.abs(fixed - bucketed)
+    disagreement = np.mean((fixed > 0.5) != (bucketed > 0.5))
+    print(f"Speed-up: {results[False][0] / results[True][0]:.2f}x")
+    print(f"Score delta: max {delta.max():.4f}, mean {delta.mean():.4f}, label agreement {1 - disagreement:.2%}")
+
+    if delta.max() > args.tolerance:
+        sys.exit(f"Score delta above tolerance {args.tolerance}")
+    if disagreement > args.max_disagreement:
+        sys.exit(f"Labels disagree on {disagreement:.2%} of the texts, above {args.max_disagreement:.2%}")
+
+
+def rss_mb():
+    """Current resident set size of this process in MB"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        import resource
+        # Peak rather than current RSS, in KB on Linux and bytes on macOS
+        scale = 2**20 if sys.platform == 'darwin' else 2**10
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def load_tokenizer_stats(args):
+    """Load one tokenizer format in this (fresh) process and print load time and RSS as JSON"""
+    if args.format == 'pickle':
+        # Import the Keras module the pickle refers to up front, so only the tokenizer data is measured
+        from tensorflow.keras.preprocessing.text import Tokenizer  # noqa: F401
+    texts = load_texts(args.csv, args.rows)
+
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    if args.format == 'pickle':
+        with open(os.path.join(args.model_dir, 'tokenizer.pickle'), 'rb') as handle:
+            tokenizer = pickle.load(handle)
+    else:
+        tokenizer = VocabularyTokenizer.load(os.path.join(args.model_dir, VOCAB_DIR))
+    load_time = time.perf_counter() - start
+    rss_loaded = rss_mb()
+
+    # Tokenizing touches the memory-mapped pages, so RSS is measured again afterwards
+    start = time.perf_counter()
+    tokenizer.texts_to_sequences(texts)
+    tokenize_time = time.perf_counter() - start
+
+    print(json.dumps({
+        'load_s': load_time,
+        'rss_load_mb': rss_loaded - rss_before,
+        'rss_used_mb': rss_mb() - rss_before,
+        'texts_per_s': len(texts) / tokenize_time,
+    }))
+
+
+def benchmark_vocab(args):
+    texts = load_texts(args.csv, args.rows)
+    with open(os.path.join(args.model_dir, 'tokenizer.pickle'), 'rb') as handle:
+        keras_tokenizer = pickle.load(handle)
+    vocab_tokenizer = VocabularyTokenizer.load(os.path.join(args.model_dir, VOCAB_DIR))
+
+    expected = keras_tokenizer.texts_to_sequences(texts)
+    actual = vocab_tokenizer.texts_to_sequences(texts)
+    mismatches = sum(a != b for a, b in zip(expected, actual))
+    print(f"Texts: {len(texts)}, mismatching sequences: {mismatches}")
+
+    for name in ('pickle', 'vocabulary'):
+        command = [sys.executable, __file__, '--model-dir', args.model_dir, '--rows', str(args.rows)]
+        if args.csv is not None:
+            command += ['--csv', args.csv]
+        output = subprocess.run(command + ['load-tokenizer', name], capture_output=True, text=True, check=True).stdout
+        stats = json.loads(output.strip().splitlines()[-1])
+        print(f"{name:>10}: load {stats['load_s'] * 1000:.1f} ms, RSS +{stats['rss_load_mb']:.1f} MB after load, "
+              f"+{stats['rss_used_mb']:.1f} MB after tokenizing, {stats['texts_per_s']:.0f} texts/s")
+
+
+def benchmark_tokenize(args):
+    from tensorflow.keras.preprocessing.sequence import pad_sequences
+
+    texts = load_texts(args.csv, args.rows)
+    with open(os.path.join(args.model_dir, 'model_config.json')) as f:
+        config = json.load(f)
+    with open(os.path.join(args.model_dir, 'tokenizer.pickle'), 'rb') as handle:
+        keras_tokenizer = pickle.load(handle)
+    vocab_tokenizer = VocabularyTokenizer.load(os.path.join(args.model_dir, VOCAB_DIR))
+
+    maxlen = config['max_sequence_length']
+    padding, truncating = config['padding_strategy'], config['truncating_strategy']
+
+    def keras_path():
+        sequences = keras_tokenizer.texts_to_sequences(texts)
+        return pad_sequences(sequences, maxlen=maxlen, padding=padding, truncating=truncating)
+
+    def vectorized_path():
+        return vocab_tokenizer.texts_to_padded(texts, maxlen, padding=padding, truncating=truncating)
+
+    keras_time, expected = best_time(keras_path)
+    vectorized_time, actual = best_time(vectorized_path)
+    print(f"Texts: {len(texts)}, identical matrices: {np.array_equal(expected, actual)}")
+    print(f"texts_to_sequences + pad_sequences: {len(texts) / keras_time:.0f} texts/s")
+    print(f"texts_to_padded:                    {len(texts) / vectorized_time:.0f} texts/s")
+
+
+def notebook_load_glove_embeddings(glove_path, embedding_dim, tokenizer, vocab_size):
+    """load_glove_embeddings of Twitter_Sentiment_Analysis.ipynb, for comparison"""
+    embeddings_index = {}
+    with open(glove_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            values = line.split()
+            word = values[0]
+            coefs = np.asarray(values[1:], dtype='float32')
+            embeddings_index[word] = coefs
+
+    embedding_matrix = np.zeros((vocab_size, embedding_dim))
+    for word, index in tokenizer.word_index.items():
+        if index < vocab_size:
+            embedding_vector = embeddings_index.get(word)
+            if embedding_vector is not None:
+                embedding_matrix[index] = embedding_vector
+
+    return embedding_matrix
+
+
+def reset_peak_rss():
+    """Start measuring the peak RSS from now on (Linux only, elsewhere it stays the peak since start-up)"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        pass
+
+
+def proc_status_mb(field):
+    """A memory field of /proc/self/status ('VmHWM', 'RssFile'...) in MB, None where it is not available"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) / 2**10
+    except OSError:
+        pass
+    return None
+
+
+def peak_rss_mb():
+    peak = proc_status_mb('VmHWM')
+    if peak is not None:
+        return peak
+    import resource
+    # In KB on Linux and bytes on macOS
+    scale = 2**20 if sys.platform == 'darwin' else 2**10
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def load_glove_stats(args):
+    """Build the embedding matrix one way in this (fresh) process, save it to --output and print time and memory as JSON"""
+    with open(os.path.join(args.model_dir, 'model_config.json')) as f:
+        config = json.load(f)
+    with open(os.path.join(args.model_dir, 'tokenizer.pickle'), 'rb') as handle:
+        tokenizer = pickle.load(handle)
+
+    rss_before = rss_mb()
+    file_before = proc_status_mb('RssFile') or 0
+    reset_peak_rss()
+    start = time.perf_counter()
+    if args.method == 'text':
+        matrix = notebook_load_glove_embeddings(args.glove, config['embedding_dim'], tokenizer, config['vocab_size'])
+    else:
+        if args.method == 'convert':
+            shutil.rmtree(args.store or store_dir(args.glove), ignore_errors=True)
+        # Kept open until the memory is measured, its pages are unmapped with it
+        store = GloveStore.open(args.glove, args.store)
+        matrix = store.embedding_matrix(tokenizer, config['vocab_size'], config['embedding_dim'])
+    load_time = time.perf_counter() - start
+
+    np.save(args.output, matrix)
+    print(json.dumps({
+        'load_s': load_time,
+        'peak_rss_mb': peak_rss_mb() - rss_before,
+        # Pages of memory-mapped files: page cache, shared with other processes and reclaimable
+        'file_rss_mb': (proc_status_mb('RssFile') or 0) - file_before,
+    }))
+
+
+def benchmark_glove(args):
+    names = {'text': 'notebook', 'convert': 'first use', 'store': 'store'}
+    with tempfile.TemporaryDirectory() as directory:
+        matrices = {}
+        for method in ('text', 'convert', 'store'):
+            output = os.path.join(directory, f'{method}.npy')
+            command = [sys.executable, __file__, '--model-dir', args.model_dir, 'load-glove', method,
+                       '--glove', args.glove, '--output', output]
+            if args.store is not None:
+                command += ['--store', args.store]
+            stats = json.loads(subprocess.run(command, capture_output=True, text=True, check=True).stdout.strip().splitlines()[-1])
+            matrices[method] = np.load(output, mmap_mode='r')
+            print(f"{names[method]:>9}: embedding matrix in {stats['load_s']:.2f} s, peak RSS +{stats['peak_rss_mb']:.0f} MB "
+                  f"({stats['file_rss_mb']:.0f} MB of it mapped from files)")
+        delta = np.abs(matrices['store'] - matrices['text']).max()
+        print(f"Matrix {matrices['store'].shape}, max difference from the notebook's: {delta:.1e}")
+
+
+def load_model_stats(args):
+    """Cold start of one backend in this (fresh) process, printed as JSON"""
+    texts = load_texts(args.csv, args.rows)
+
+    start = time.perf_counter()
+    analyzer = load_analyzer(args.model_dir, batch_size=args.batch_size, backend=args.backend,
+                             precision=args.precision)
+    load_time = time.perf_counter() - start
+    analyzer.predict_sentiment(texts[0])
+    first_prediction = time.perf_counter() - start
+
+    elapsed, _ = best_time(analyzer.predict_batch, texts, repeat=1)
+    print(json.dumps({
+        'load_s': load_time,
+        'first_prediction_s': first_prediction,
+        'rss_mb': rss_mb(),
+        'tensorflow_imported': 'tensorflow' in sys.modules,
+        'texts_per_s': len(texts) / elapsed,
+    }))
+
+
+def cold_start_stats(args, backend, precision='float32'):
+    """Run load-model in a fresh interpreter and return its stats"""
+    command = [sys.executable, __file__, '--model-dir', args.model_dir, '--rows', str(args.rows)]
+    if args.csv is not None:
+        command += ['--csv', args.csv]
+    command += ['load-model', backend, '--batch-size', str(args.batch_size), '--precision', precision]
+    output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def benchmark_runtime(args):
+    texts = load_texts(args.csv, args.rows)
+    scores = {}
+    for backend in ('keras', 'numpy'):
+        analyzer = load_analyzer(args.model_dir, batch_size=args.batch_size, backend=backend)
+        scores[backend] = analyzer.predict_batch(texts)
+    delta = np.abs(scores['keras'] - scores['numpy'])
+    print(f"Texts: {len(texts)}, score delta: max {delta.max():.2e}, mean {delta.mean():.2e}")
+
+    for backend in ('keras', 'numpy'):
+        stats = cold_start_stats(args, backend)
+        print(f"{backend:>6}: load {stats['load_s']:.2f} s, first prediction after {stats['first_prediction_s']:.2f} s, "
+              f"RSS {stats['rss_mb']:.0f} MB, TensorFlow imported: {stats['tensorflow_imported']}, "
+              f"{stats['texts_per_s']:.0f} texts/s")
+
+    if delta.max() > args.tolerance:
+        sys.exit(f"Score delta above tolerance {args.tolerance}")
+
+
+def held_out_split(csv_path, rows):
+    """Texts and labels of the notebook's validation split (test_size=0.2, random_state=42)"""
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+
+    df = pd.read_csv(csv_path, encoding='ISO-8859-1', header=None, names=COLUMNS, usecols=['target', 'text'],
+                     dtype={'text': str}, keep_default_na=False)
+    _, test_rows = train_test_split(np.arange(len(df)), test_size=0.2, random_state=42)
+    test = df.iloc[test_rows[:rows]]
+    return test['text'].to_numpy(), test['target'].map({0: 0, 4: 1}).to_numpy()
+
+
+def directory_size_mb(path):
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file()) / 2**20
+
+
+def benchmark_quantization(args):
+    if args.csv is None:
+        sys.exit("The quantization benchmark needs the labelled sentiment140 CSV (--csv)")
+    texts, labels = held_out_split(args.csv, args.rows)
+
+    reference = None
+    for precision in ('float32',) + tuple(args.precision):
+        analyzer = load_analyzer(args.model_dir, batch_size=args.batch_size, backend='numpy', precision=precision)
+        # The model was trained on texts passed through clean_tweet
+        scores = analyzer.score_sequences(analyzer.preprocess_texts(texts, clean=True))
+        stats = cold_start_stats(args, 'numpy', precision)
+
+        accuracy = np.mean((scores > 0.5) == labels)
+        size = directory_size_mb(os.path.join(args.model_dir, numpy_model_dir(precision)))
+        line = (f"{precision:>8}: accuracy {accuracy:.4f}, weights {size:.1f} MB on disk, "
+                f"RSS {stats['rss_mb']:.0f} MB, {stats['texts_per_s']:.0f} texts/s")
+        if reference is None:
+            reference = (scores, accuracy)
+        else:
+            delta = np.abs(scores - reference[0])
+            agreement = np.mean((scores > 0.5) == (reference[0] > 0.5))
+            line += (f", accuracy delta {accuracy - reference[1]:+.4f}, score delta max {delta.max():.4f} "
+                     f"mean {delta.mean():.4f}, label agreement {agreement:.2%}")
+        print(line)
+
+
+def free_port():
+    import socket
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(args, port):
+    """Launch server.py on localhost and wait until it answers"""
+    command = [sys.executable, os.path.join(os.path.dirname(__file__), 'server.py'), '--port', str(port),
+               '--model-dir', args.model_dir, '--workers', str(args.workers),
+               '--max-queue-size', str(args.max_queue_size)]
+    if args.precision:
+        command += ['--precision', args.precision]
+    process = subprocess.Popen(command)
+
+    deadline = time.perf_counter() + 120
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            sys.exit("server.py exited during start-up")
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/health')
+            connection.getresponse().read()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    sys.exit("server.py did not start within 120 s")
+
+
+def worker_memory(server_pid):
+    """Total RSS and proportional set size (shared pages split between processes) of the server's workers in MB.
+
+    Linux only, returns None where /proc is not available.
+    """
+    rss, pss = 0, 0
+    try:
+        with open(f'/proc/{server_pid}/task/{server_pid}/children') as f:
+            pids = f.read().split()
+        for pid in pids:
+            with open(f'/proc/{pid}/cmdline') as f:
+                # The multiprocessing resource tracker loads no model
+                if 'resource_tracker' in f.read():
+                    continue
+            with open(f'/proc/{pid}/smaps_rollup') as f:
+                for line in f:
+                    if line.startswith('Rss:'):
+                        rss += int(line.split()[1]) / 2**10
+                    elif line.startswith('Pss:'):
+                        pss += int(line.split()[1]) / 2**10
+    except OSError:
+        return None
+    return rss, pss
+
+
+def load_test(port, texts, clients, duration, batch):
+    """Send requests from `clients` keep-alive connections for `duration` seconds"""
+    latencies = [[] for _ in range(clients)]
+    statuses = [{} for _ in range(clients)]
+    stop = time.perf_counter() + duration
+
+    def client(i):
+        connection = http.client.HTTPConnection('127.0.0.1', port)
+        headers = {'Content-Type': 'application/json'}
+        j = i
+        while time.perf_counter() < stop:
+            if batch > 1:
+                path = '/predict_batch'
+                body = {'texts': [texts[(j + k) % len(texts)] for k in range(batch)]}
+            else:
+                path, body = '/predict', {'text': texts[j % len(texts)]}
+            j += clients * batch
+
+            start = time.perf_counter()
+            connection.request('POST', path, json.dumps(body), headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status == 200:
+                latencies[i].append(time.perf_counter() - start)
+            statuses[i][response.status] = statuses[i].get(response.status, 0) + 1
+        connection.close()
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    total = {}
+    for counts in statuses:
+        for status, count in counts.items():
+            total[status] = total.get(status, 0) + count
+    return np.concatenate([np.array(l) for l in latencies]) * 1000, total
+
+
+def benchmark_server(args):
+    texts = load_texts(args.csv, args.rows)
+    port = args.port or free_port()
+    process = None if args.port else start_server(args, port)
+    try:
+        latencies, statuses = load_test(port, texts, args.clients, args.duration, args.batch)
+        connection = http.client.HTTPConnection('127.0.0.1', port)
+        connection.request('GET', '/metrics')
+        metrics = json.loads(connection.getresponse().read())
+        memory = worker_memory(process.pid) if process is not None else None
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    scored = len(latencies) * args.batch
+    print(f"Clients: {args.clients}, texts per request: {args.batch}, duration: {args.duration:.0f} s")
+    print(f"Responses: {dict(sorted(statuses.items()))}, throughput: {scored / args.duration:.0f} texts/s")
+    if len(latencies) > 0:
+        print(f"Client latency: p50 {np.percentile(latencies, 50):.1f} ms, p99 {np.percentile(latencies, 99):.1f} ms")
+    print(f"Server: batch size mean {metrics.get('batch_size_mean', 0):.1f}, "
+          f"queue latency p50 {metrics.get('latency_ms_p50', 0):.1f} ms, p99 {metrics.get('latency_ms_p99', 0):.1f} ms, "
+          f"rejected {metrics['rejected']}")
+    if memory is not None:
+        print(f"Workers: {metrics['workers']}, RSS {memory[0]:.0f} MB, PSS {memory[1]:.0f} MB "
+              f"(memory-mapped weights are counted once in PSS)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for the sentiment model")
+    parser.add_argument('--model-dir', default='sentiment_v2', help="directory with the model, tokenizer and config")
+    parser.add_argument('--csv', default=None, help="sentiment140 CSV to read texts from (default: sample sentences)")
+    parser.add_argument('--rows', type=int, default=10000, help="number of texts to score")
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    buckets = subparsers.add_parser('buckets', help="fixed-length vs length-bucketed padding")
+    buckets.add_argument('--batch-size', type=int, default=256)
+    buckets.add_argument('--tolerance', type=float, default=0.05, help="maximum accepted score difference")
+    buckets.add_argument('--max-disagreement', type=float, default=0.01,
+                         help="maximum accepted fraction of texts whose label (score > 0.5) changes")
+    buckets.set_defaults(func=benchmark_buckets)
+
+    vocab = subparsers.add_parser('vocab', help="pickled Keras Tokenizer vs exported vocabulary")
+    vocab.set_defaults(func=benchmark_vocab)
+
+    tokenize = subparsers.add_parser('tokenize', help="Keras tokenization and padding vs texts_to_padded")
+    tokenize.set_defaults(func=benchmark_tokenize)
+
+    runtime = subparsers.add_parser('runtime', help="Keras .h5 model vs NumPy runtime: parity, cold start, throughput")
+    runtime.add_argument('--batch-size', type=int, default=256)
+    runtime.add_argument('--tolerance', type=float, default=1e-4, help="maximum accepted score difference")
+    runtime.set_defaults(func=benchmark_runtime)
+
+    quantization = subparsers.add_parser('quantization', help="accuracy of reduced-precision weights on the held-out split")
+    quantization.add_argument('--batch-size', type=int, default=256)
+    quantization.add_argument('--precision', nargs='+', choices=['float16', 'int8'], default=['float16', 'int8'])
+    quantization.set_defaults(func=benchmark_quantization)
+
+    server = subparsers.add_parser('server', help="load test of server.py on localhost")
+    server.add_argument('--port', type=int, default=None, help="test a server already running on this port")
+    server.add_argument('--workers', type=int, default=2)
+    server.add_argument('--precision', choices=['float32', 'float16', 'int8'], default=None)
+    server.add_argument('--max-queue-size', type=int, default=1024)
+    server.add_argument('--clients', type=int, default=32, help="concurrent connections")
+    server.add_argument('--duration', type=float, default=10, help="seconds")
+    server.add_argument('--batch', type=int, default=1, help="texts per request (more than 1 uses /predict_batch)")
+    server.set_defaults(func=benchmark_server)
+
+    glove = subparsers.add_parser('glove', help="notebook's GloVe text parsing vs the binary store: time, peak memory, parity")
+    glove.add_argument('--glove', default='glove.6B.100d.txt', help="GloVe text file")
+    glove.add_argument('--store', default=None, help="store directory (default: next to the text file)")
+    glove.set_defaults(func=benchmark_glove)
+
+    load_model = subparsers.add_parser('load-model', help="measure the cold start of one backend (used by runtime)")
+    load_model.add_argument('backend', choices=['keras', 'numpy'])
+    load_model.add_argument('--batch-size', type=int, default=256)
+    load_model.add_argument('--precision', choices=['float32', 'float16', 'int8'], default='float32')
+    load_model.set_defaults(func=load_model_stats)
+
+    load_tokenizer = subparsers.add_parser('load-tokenizer', help="measure loading one tokenizer format (used by vocab)")
+    load_tokenizer.add_argument('format', choices=['pickle', 'vocabulary'])
+    load_tokenizer.set_defaults(func=load_tokenizer_stats)
+
+    load_glove = subparsers.add_parser('load-glove', help="build the embedding matrix one way (used by glove)")
+    load_glove.add_argument('method', choices=['text', 'convert', 'store'])
+    load_glove.add_argument('--glove', default='glove.6B.100d.txt')
+    load_glove.add_argument('--store', default=None)
+    load_glove.add_argument('--output', required=True, help=".npy file to save the matrix to")
+    load_glove.set_defaults(func=load_glove_stats)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
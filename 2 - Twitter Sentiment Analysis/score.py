@@ -0,0 +1,222 @@
+import sys
+import os
+
+# Add the src directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import json
+import time
+import queue
+import argparse
+import threading
+
+import pandas as pd
+
+from analyzer import load_analyzer
+
+# Schema of the sentiment140 CSV, as read in Twitter_Sentiment_Analysis.ipynb
+COLUMNS = ['target', 'id', 'date', 'flag', 'user', 'text']
+ENCODING = 'ISO-8859-1'
+
+DONE = object()
+
+
+def read_chunks(path, chunk_size, start_row=0):
+    """Yield (first row offset, DataFrame) pairs of at most `chunk_size` rows, starting at `start_row`"""
+    reader = pd.read_csv(
+        path,
+        encoding=ENCODING,
+        header=None,
+        names=COLUMNS,
+        usecols=['target', 'id', 'text'],
+        dtype={'text': str},
+        keep_default_na=False,
+        skiprows=start_row,
+        chunksize=chunk_size
+    )
+    offset = start_row
+    for chunk in reader:
+        yield offset, chunk
+        offset += len(chunk)
+
+
+class CsvScoreWriter:
+    def __init__(self, path, resume_position=None):
+        self.path = path
+        if resume_position is not None and os.path.exists(path):
+            # Drop anything written after the last checkpoint
+            self.file = open(path, 'r+', newline='')
+            self.file.truncate(resume_position)
+            self.file.seek(resume_position)
+            self.header = resume_position == 0
+        else:
+            self.file = open(path, 'w', newline='')
+            self.header = True
+
+    def write(self, offset, frame):
+        frame.to_csv(self.file, header=self.header, index=False)
+        self.header = False
+        self.file.flush()
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetScoreWriter:
+    """Writes one part file per chunk, named after its first row, into the output directory"""
+
+    def __init__(self, path, resume_position=None):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, offset, frame):
+        frame.to_parquet(os.path.join(self.path, f'part-{offset:010d}.parquet'), index=False)
+        return None
+
+    def close(self):
+        pass
+
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_checkpoint(path, checkpoint):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def start_stage(func, inbox, outbox, errors, name):
+    """Run `func` on every item of `inbox` in a thread, forwarding results to `outbox`"""
+    def run():
+        try:
+            while True:
+                item = inbox.get()
+                if item is DONE:
+                    break
+                outbox.put(func(item))
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            outbox.put(DONE)
+
+    thread = threading.Thread(target=run, name=name, daemon=True)
+    thread.start()
+    return thread
+
+
+def score_file(analyzer, input_path, output_path, output_format='csv', chunk_size=10000,
+               checkpoint_path=None, resume=False, clean=False, queue_size=2):
+    """Score a sentiment140-style CSV chunk by chunk.
+
+    Reading, tokenization, inference and writing run as separate stages linked
+    by bounded queues, so at most a few chunks are held in memory at once.
+    """
+    checkpoint_path = checkpoint_path or output_path + '.checkpoint.json'
+    checkpoint = load_checkpoint(checkpoint_path) if resume else None
+    start_row = checkpoint['rows'] if checkpoint else 0
+    resume_position = checkpoint['position'] if checkpoint else None
+
+    writer_class = ParquetScoreWriter if output_format == 'parquet' else CsvScoreWriter
+    writer = writer_class(output_path, resume_position)
+
+    chunks = queue.Queue(queue_size)
+    tokenized = queue.Queue(queue_size)
+    scored = queue.Queue(queue_size)
+    errors = []
+
+    def read():
+        try:
+            for item in read_chunks(input_path, chunk_size, start_row):
+                chunks.put(item)
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            chunks.put(DONE)
+
+    def tokenize(item):
+        offset, chunk = item
+        texts = chunk['text'].to_numpy()
+        # Already cleaned sequences are their own cache keys
+        keys = analyzer.cache_keys(texts) if analyzer.cache is not None and not clean else None
+        return offset, chunk, analyzer.preprocess_texts(texts, clean=clean), keys
+
+    def infer(item):
+        offset, chunk, sequences, keys = item
+        scores = analyzer.score_sequences(sequences, keys)
+        return offset, pd.DataFrame({'id': chunk['id'].to_numpy(), 'target': chunk['target'].to_numpy(), 'score': scores})
+
+    threads = [
+        threading.Thread(target=read, name="read", daemon=True),
+        start_stage(tokenize, chunks, tokenized, errors, "tokenize"),
+        start_stage(infer, tokenized, scored, errors, "infer"),
+    ]
+    threads[0].start()
+
+    rows = 0
+    start = time.perf_counter()
+    try:
+        while True:
+            item = scored.get()
+            if item is DONE:
+                break
+            offset, frame = item
+            position = writer.write(offset, frame)
+            rows += len(frame)
+            save_checkpoint(checkpoint_path, {'rows': offset + len(frame), 'position': position})
+
+            elapsed = time.perf_counter() - start
+            print(f"Scored {offset + len(frame)} rows ({rows / elapsed:.0f} rows/s)", file=sys.stderr)
+    finally:
+        writer.close()
+
+    if errors:
+        raise errors[0]
+    elapsed = time.perf_counter() - start
+    return rows, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a sentiment140-style CSV with the sentiment model")
+    parser.add_argument('input', help="input CSV (no header, ISO-8859-1, sentiment140 columns)")
+    parser.add_argument('output', help="output CSV file, or directory of part files for --format parquet")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--model-dir', default='sentiment_v2')
+    parser.add_argument('--backend', choices=['keras', 'numpy'], default=None,
+                        help="inference backend (default: the NumPy export when present)")
+    parser.add_argument('--precision', choices=['float32', 'float16', 'int8'], default=None,
+                        help="weight precision of the NumPy export to use")
+    parser.add_argument('--chunk-size', type=int, default=10000, help="rows read, tokenized and scored at a time")
+    parser.add_argument('--batch-size', type=int, default=256, help="rows per model forward pass")
+    parser.add_argument('--bucketed', action='store_true', help="use length-bucketed padding")
+    parser.add_argument('--cache-size', type=int, default=0, help="entries in the prediction cache (0 disables it)")
+    parser.add_argument('--clean', action='store_true', help="apply the notebook's clean_tweet step before tokenizing")
+    parser.add_argument('--checkpoint', default=None, help="checkpoint file (default: OUTPUT.checkpoint.json)")
+    parser.add_argument('--resume', action='store_true', help="continue from the row offset stored in the checkpoint")
+    args = parser.parse_args()
+
+    analyzer = load_analyzer(args.model_dir, batch_size=args.batch_size, bucketed=args.bucketed,
+                             cache_size=args.cache_size, backend=args.backend, precision=args.precision)
+    rows, elapsed = score_file(
+        analyzer,
+        args.input,
+        args.output,
+        output_format=args.format,
+        chunk_size=args.chunk_size,
+        checkpoint_path=args.checkpoint,
+        resume=args.resume,
+        clean=args.clean
+    )
+    print(f"Done: {rows} rows in {elapsed:.1f} s ({rows / max(elapsed, 1e-9):.0f} rows/s)")
+    if analyzer.cache is not None:
+        print(f"Prediction cache: {analyzer.cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
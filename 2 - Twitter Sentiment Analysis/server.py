@@ -0,0 +1,219 @@
+import sys
+import os
+
+# Add the src directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import json
+import time
+import queue
+import signal
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from analyzer import load_analyzer
+from batching import MicroBatcher
+
+# Analyzer of the current worker process, set by init_worker
+worker_analyzer = None
+
+
+def init_worker(model_dir, precision, batch_size, bucketed, cache_size):
+    """Load the NumPy model and vocabulary in a worker process.
+
+    Both are memory-mapped read-only, so every worker maps the same pages of
+    the exported files instead of holding its own copy of the weights.
+    """
+    global worker_analyzer
+    worker_analyzer = load_analyzer(model_dir, batch_size=batch_size, bucketed=bucketed,
+                                    cache_size=cache_size, backend='numpy', precision=precision)
+    worker_analyzer.predict_batch(['warm up'])
+
+
+def score_texts(texts):
+    return worker_analyzer.predict_batch(texts).tolist()
+
+
+def ping(_):
+    return os.getpid()
+
+
+class ScoringServer(ThreadingHTTPServer):
+    """HTTP/JSON front end: requests are micro-batched and scored by a pool of worker processes"""
+
+    daemon_threads = True
+
+    def __init__(self, address, model_dir='sentiment_v2', precision=None, workers=2, max_batch_size=64,
+                 max_wait_ms=5, max_queue_size=1024, batch_size=256, bucketed=False, cache_size=0):
+        # Worker processes are started before any thread of this process, and with
+        # 'spawn', so they never inherit a lock held by another thread
+        self.pool = ProcessPoolExecutor(
+            workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_worker,
+            initargs=(model_dir, precision, batch_size, bucketed, cache_size)
+        )
+        # Start the workers now rather than on the first requests
+        list(self.pool.map(ping, range(workers)))
+
+        self.batcher = MicroBatcher(
+            lambda texts: self.pool.submit(score_texts, texts).result(),
+            max_batch_size=max_batch_size,
+            max_wait_ms=max_wait_ms,
+            workers=workers,
+            max_queue_size=max_queue_size
+        )
+        self.workers = workers
+        self.started = time.time()
+        self.responses = {}
+        self.responses_lock = threading.Lock()
+        super().__init__(address, RequestHandler)
+
+    def count_response(self, status):
+        with self.responses_lock:
+            self.responses[status] = self.responses.get(status, 0) + 1
+
+    def metrics(self):
+        metrics = self.batcher.stats()
+        with self.responses_lock:
+            metrics['responses'] = {str(status): count for status, count in sorted(self.responses.items())}
+        metrics['workers'] = self.workers
+        metrics['max_queue_size'] = self.batcher.max_queue_size
+        metrics['uptime_s'] = time.time() - self.started
+        return metrics
+
+    def server_close(self):
+        super().server_close()
+        self.batcher.close()
+        self.pool.shutdown()
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    # Keep-alive connections, so load tests do not measure TCP handshakes
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        # One line per request would dominate the cost of a prediction
+        pass
+
+    def send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+        self.server.count_response(status)
+
+    def read_json(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return json.loads(self.rfile.read(length) or b'null')
+
+    def do_GET(self):
+        if self.path == '/metrics':
+            self.send_json(200, self.server.metrics())
+        elif self.path == '/health':
+            self.send_json(200, {'status': 'ok'})
+        else:
+            self.send_json(404, {'error': f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        try:
+            body = self.read_json()
+        except ValueError:
+            self.send_json(400, {'error': "Request body is not valid JSON"})
+            return
+
+        if self.path == '/predict':
+            texts = [body.get('text')] if isinstance(body, dict) else None
+        elif self.path == '/predict_batch':
+            texts = body.get('texts') if isinstance(body, dict) else None
+        else:
+            self.send_json(404, {'error': f"Unknown path: {self.path}"})
+            return
+
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            self.send_json(400, {'error': "Expected {\"text\": str} or {\"texts\": [str, ...]}"})
+            return
+        max_queue_size = self.server.batcher.max_queue_size
+        if max_queue_size and len(texts) > max_queue_size:
+            # Could never be accepted, however long the client waits
+            self.send_json(413, {'error': f"At most {max_queue_size} texts per request"})
+            return
+
+        try:
+            futures = self.server.batcher.submit_many(texts)
+        except queue.Full:
+            # Backpressure: let the client retry instead of queueing without bound
+            self.send_json(503, {'error': "Server busy, retry later"}, {'Retry-After': '1'})
+            return
+
+        try:
+            scores = [future.result() for future in futures]
+        except Exception as e:
+            self.send_json(500, {'error': str(e)})
+            return
+
+        if self.path == '/predict':
+            self.send_json(200, {'score': scores[0], 'sentiment': sentiment_label(scores[0])})
+        else:
+            self.send_json(200, {'scores': scores, 'sentiments': [sentiment_label(score) for score in scores]})
+
+
+def sentiment_label(score):
+    return 'positive' if score > 0.5 else 'negative'
+
+
+def stop(signum, frame):
+    raise KeyboardInterrupt
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP/JSON scoring server for the sentiment model")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--model-dir', default='sentiment_v2')
+    parser.add_argument('--precision', choices=['float32', 'float16', 'int8'], default=None,
+                        help="weight precision of the NumPy export to serve")
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help="scoring processes")
+    parser.add_argument('--max-batch-size', type=int, default=64, help="texts per micro-batch")
+    parser.add_argument('--max-wait-ms', type=float, default=5, help="how long a micro-batch waits to fill up")
+    parser.add_argument('--max-queue-size', type=int, default=1024,
+                        help="queued texts above which requests get 503 (0 for no limit)")
+    parser.add_argument('--batch-size', type=int, default=256, help="rows per model forward pass")
+    parser.add_argument('--bucketed', action='store_true', help="use length-bucketed padding")
+    parser.add_argument('--cache-size', type=int, default=0, help="prediction cache entries per worker (0 disables it)")
+    args = parser.parse_args()
+
+    server = ScoringServer(
+        (args.host, args.port),
+        model_dir=args.model_dir,
+        precision=args.precision,
+        workers=args.workers,
+        max_batch_size=args.max_batch_size,
+        max_wait_ms=args.max_wait_ms,
+        max_queue_size=args.max_queue_size,
+        batch_size=args.batch_size,
+        bucketed=args.bucketed,
+        cache_size=args.cache_size
+    )
+    # Shut the worker processes down on SIGTERM too, not only on Ctrl+C
+    signal.signal(signal.SIGTERM, stop)
+    host, port = server.server_address[:2]
+    print(f"Serving on http://{host}:{port} with {args.workers} workers", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# analyzer.py
+import os
+import json
+import pickle
+
+import numpy as np
+
+from cache import PredictionCache
+from numpy_model import MANIFEST_FILE, NumpySentimentModel, numpy_model_dir
+from vocabulary import VOCAB_DIR, WORDS_FILE, IDS_FILE, META_FILE, VocabularyTokenizer, clean_tweet
+
+MODEL_DIR = "sentiment_v2"
+
+# Padded lengths used by the bucketed mode; max_sequence_length is always the last bucket
+LENGTH_BUCKETS = (16, 32, 64)
+
+
+class SentimentAnalyzer:
+    """Scores texts with the sentiment model, 0 (negative) to 1 (positive).
+
+    With `bucketed=True` rows are trimmed to the shortest length bucket that
+    fits their tokens before the forward pass. It is faster, but the model was
+    trained on fully padded rows, so the scores are approximate: close to those
+    of the default fixed-length mode, not identical (`benchmark.py buckets`
+    measures the difference).
+    """
+
+    def __init__(self, config, model, tokenizer, batch_size=256, bucketed=False, cache_size=0, watched_files=()):
+        self.config = config
+        self.model = model
+        self.tokenizer = tokenizer
+        self.batch_size = batch_size
+        self.bucketed = bucketed
+        self.cache = PredictionCache(cache_size, watched_files) if cache_size > 0 else None
+
+        max_length = config['max_sequence_length']
+        buckets = config.get('length_buckets', LENGTH_BUCKETS)
+        self.length_buckets = sorted(b for b in buckets if b < max_length) + [max_length]
+
+    def preprocess_text(self, text):
+        return self.preprocess_texts([text])
+
+    def preprocess_texts(self, texts, clean=False):
+        if isinstance(self.tokenizer, VocabularyTokenizer):
+            return self.tokenizer.texts_to_padded(
+                texts,
+                self.config['max_sequence_length'],
+                padding=self.config['padding_strategy'],
+                truncating=self.config['truncating_strategy'],
+                clean=clean
+            )
+
+        from tensorflow.keras.preprocessing.sequence import pad_sequences
+        if clean:
+            texts = [clean_tweet(text) for text in texts]
+        tokens = self.tokenizer.texts_to_sequences(list(texts))
+        padded = pad_sequences(
+            tokens,
+            maxlen=self.config['max_sequence_length'],
+            padding=self.config['padding_strategy'],
+            truncating=self.config['truncating_strategy']
+        )
+        return padded
+
+    def predict_sentiment(self, text):
+        return float(self.predict_batch([text])[0])
+
+    def predict_batch(self, texts):
+        """Score a list of texts with a single forward pass per `batch_size` rows"""
+        if len(texts) == 0:
+            return np.zeros(0, dtype=np.float32)
+
+        preprocessed = self.preprocess_texts(texts)
+        return self.score_sequences(preprocessed, self.cache_keys(texts) if self.cache is not None else None)
+
+    def cache_keys(self, texts):
+        """Prediction cache keys: the token ids of the cleaned texts, so that retweets and spam
+        differing only in mentions, URLs, case or punctuation share an entry"""
+        return [row.tobytes() for row in self.preprocess_texts(texts, clean=True)]
+
+    def score_sequences(self, sequences, keys=None):
+        """Score padded sequences, going through the prediction cache when it is enabled.
+
+        `keys` are the cache keys of the rows (see cache_keys); by default the rows themselves,
+        for sequences that were already cleaned.
+        """
+        if self.cache is None:
+            return self._score(sequences)
+
+        if keys is None:
+            keys = [row.tobytes() for row in sequences]
+        cached = self.cache.get_many(keys)
+        scores = np.array([np.nan if value is None else value for value in cached], dtype=np.float32)
+
+        missing = np.flatnonzero(np.isnan(scores))
+        if len(missing) > 0:
+            # Duplicates within the batch (retweets, spam) are scored once, from their first row
+            first = {}
+            for i in missing:
+                first.setdefault(keys[i], i)
+            unique_keys = list(first)
+            computed = self._score(sequences[list(first.values())])
+            index = {key: j for j, key in enumerate(unique_keys)}
+            scores[missing] = computed[[index[keys[i]] for i in missing]]
+            self.cache.put_many(unique_keys, computed)
+        return scores
+
+    def _score(self, sequences):
+        if self.bucketed:
+            return self.forward_bucketed(sequences)
+        return self.forward(sequences)
+
+    def bucket_sequences(self, sequences):
+        """Group padded rows by token count and trim each group to its bucket length.
+
+        Yields (row indices, trimmed sequences) pairs, so results can be
+        scattered back into the original order.
+        """
+        # Index 0 is reserved for padding, so the token count is the number of non-zero ids
+        lengths = np.count_nonzero(sequences, axis=1)
+        bucket_ids = np.searchsorted(self.length_buckets, lengths)
+        for i, bound in enumerate(self.length_buckets):
+            rows = np.flatnonzero(bucket_ids == i)
+            if len(rows) == 0:
+                continue
+            if self.config['padding_strategy'] == 'post':
+                yield rows, sequences[rows, :bound]
+            else:
+                yield rows, sequences[rows, sequences.shape[1] - bound:]
+
+    def forward_bucketed(self, sequences):
+        # The LSTMs were trained on fully padded rows and do not mask padding,
+        # so trimming it changes the scores slightly (see benchmark.py buckets)
+        scores = np.empty(len(sequences), dtype=np.float32)
+        for rows, bucket in self.bucket_sequences(sequences):
+            scores[rows] = self.forward(bucket)
+        return scores
+
+    def forward(self, sequences):
+        # predict_on_batch skips the data adapter set up by predict(), which
+        # dominates the cost of the small batches produced by the micro-batcher
+        if len(sequences) <= self.batch_size:
+            predictions = self.model.predict_on_batch(sequences)
+        else:
+            predictions = self.model.predict(sequences, batch_size=self.batch_size, verbose=0)
+        return np.asarray(predictions, dtype=np.float32)[:, 0]
+
+
+def model_files(model_dir=MODEL_DIR, backend='keras', precision=None):
+    """Files the scores depend on, watched by the prediction cache"""
+    files = [os.path.join(model_dir, 'model_config.json')]
+    if backend == 'numpy':
+        files.append(os.path.join(model_dir, numpy_model_dir(precision), MANIFEST_FILE))
+    else:
+        files.append(os.path.join(model_dir, 'sentiment_model_v2.h5'))
+    vocab_dir = os.path.join(model_dir, VOCAB_DIR)
+    if os.path.isdir(vocab_dir):
+        files += [os.path.join(vocab_dir, name) for name in (WORDS_FILE, IDS_FILE, META_FILE)]
+    else:
+        files.append(os.path.join(model_dir, 'tokenizer.pickle'))
+    return files
+
+
+def load_tokenizer(model_dir=MODEL_DIR):
+    """Load the exported vocabulary if present, falling back to the pickled Keras Tokenizer"""
+    vocab_dir = os.path.join(model_dir, VOCAB_DIR)
+    if os.path.isdir(vocab_dir):
+        return VocabularyTokenizer.load(vocab_dir)
+
+    with open(os.path.join(model_dir, 'tokenizer.pickle'), 'rb') as handle:
+        return pickle.load(handle)
+
+
+def load_model(model_dir=MODEL_DIR, backend=None, precision=None):
+    """Load the NumPy runtime export or the Keras .h5 model.
+
+    With `backend=None` the NumPy export is used when present, so TensorFlow
+    is only imported for the Keras backend. `precision` selects the float16 or
+    int8 NumPy export instead of the float32 one.
+    """
+    numpy_dir = os.path.join(model_dir, numpy_model_dir(precision))
+    if backend is None:
+        reduced_precision = precision not in (None, 'float32')
+        backend = 'numpy' if reduced_precision or os.path.isdir(numpy_dir) else 'keras'
+
+    if backend == 'numpy':
+        return NumpySentimentModel.load(numpy_dir), backend
+
+    from tensorflow.keras.models import load_model as load_keras_model
+    return load_keras_model(os.path.join(model_dir, 'sentiment_model_v2.h5')), backend
+
+
+def load_analyzer(model_dir=MODEL_DIR, batch_size=256, bucketed=False, cache_size=0, backend=None, precision=None):
+    model, backend = load_model(model_dir, backend, precision)
+    tokenizer = load_tokenizer(model_dir)
+    with open(os.path.join(model_dir, 'model_config.json')) as f:
+        config = json.load(f)
+    return SentimentAnalyzer(config, model, tokenizer, batch_size=batch_size, bucketed=bucketed,
+                             cache_size=cache_size, watched_files=model_files(model_dir, backend, precision))
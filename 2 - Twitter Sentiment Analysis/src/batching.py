@@ -0,0 +1,133 @@
+# batching.py
+import time
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+
+class MicroBatcher:
+    """Collects concurrent single-text requests and scores them in one forward pass.
+
+    A batch is flushed as soon as it holds `max_batch_size` texts or the oldest
+    request in it has waited `max_wait_ms` milliseconds. With `workers` > 1 that
+    many batches can be in `predict_fn` at once (e.g. when it hands them to a
+    process pool). With `max_queue_size` set, submit() raises queue.Full instead
+    of queueing more texts than that.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_ms=5, history=10000, workers=1, max_queue_size=0):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue_size = max_queue_size
+
+        self.requests = queue.Queue()
+        self.latencies = deque(maxlen=history)
+        self.batch_sizes = deque(maxlen=history)
+        self.total_requests = 0
+        self.total_batches = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+        self.submit_lock = threading.Lock()
+        self.closed = False
+
+        self.threads = [threading.Thread(target=self._run, name=f"MicroBatcher-{i}", daemon=True) for i in range(workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, text):
+        """Queue a text and return a Future resolving to its sentiment score"""
+        return self.submit_many([text])[0]
+
+    def submit_many(self, texts):
+        """Queue several texts at once; either all of them are accepted or none is"""
+        if self.closed:
+            raise RuntimeError("MicroBatcher is closed")
+        with self.submit_lock:
+            if self.max_queue_size and self.requests.qsize() + len(texts) > self.max_queue_size:
+                with self.lock:
+                    self.rejected += 1
+                raise queue.Full(f"More than {self.max_queue_size} texts waiting to be scored")
+            start = time.perf_counter()
+            futures = []
+            for text in texts:
+                future = Future()
+                self.requests.put((text, future, start))
+                futures.append(future)
+        return futures
+
+    def predict(self, text, timeout=None):
+        return self.submit(text).result(timeout)
+
+    def close(self):
+        self.closed = True
+        for _ in self.threads:
+            self.requests.put(None)
+        for thread in self.threads:
+            thread.join()
+
+    def _run(self):
+        running = True
+        while running:
+            item = self.requests.get()
+            if item is None:
+                break
+
+            batch = [item]
+            deadline = item[2] + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    item = self.requests.get(timeout=remaining) if remaining > 0 else self.requests.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    running = False
+                    break
+                batch.append(item)
+
+            self._process(batch)
+
+    def _process(self, batch):
+        texts = [text for text, _, _ in batch]
+        try:
+            scores = self.predict_fn(texts)
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        now = time.perf_counter()
+        with self.lock:
+            self.total_requests += len(batch)
+            self.total_batches += 1
+            self.batch_sizes.append(len(batch))
+            for (_, _, start), _ in zip(batch, scores):
+                self.latencies.append(now - start)
+
+        for (_, future, _), score in zip(batch, scores):
+            future.set_result(float(score))
+
+    def stats(self):
+        """Request/batch counters and latency percentiles (in milliseconds) over the recent history"""
+        with self.lock:
+            latencies = np.array(self.latencies) * 1000
+            batch_sizes = np.array(self.batch_sizes)
+            stats = {
+                'requests': self.total_requests,
+                'batches': self.total_batches,
+                'rejected': self.rejected,
+                'queue_depth': self.requests.qsize(),
+            }
+
+        if len(batch_sizes) > 0:
+            stats['batch_size_mean'] = float(batch_sizes.mean())
+            stats['batch_size_max'] = int(batch_sizes.max())
+        if len(latencies) > 0:
+            stats['latency_ms_mean'] = float(latencies.mean())
+            for p in (50, 95, 99):
+                stats[f'latency_ms_p{p}'] = float(np.percentile(latencies, p))
+        return stats
@@ -0,0 +1,83 @@
+# cache.py
+import os
+import threading
+from collections import OrderedDict
+
+
+class PredictionCache:
+    """Bounded LRU cache of sentiment scores keyed on a padded token-id sequence.
+
+    SentimentAnalyzer uses the ids of the text after clean_tweet, so texts that
+    differ only in mentions, URLs, case or punctuation share an entry, even
+    when the words of the handle or link are in the vocabulary; the model
+    still scores the uncleaned text. `watched_files` are the model/tokenizer
+    files the scores depend on: check_files() empties the cache once any of
+    them changes.
+    """
+
+    def __init__(self, max_size=10000, watched_files=()):
+        self.max_size = max_size
+        self.watched_files = list(watched_files)
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.fingerprint = self._fingerprint()
+
+    def _fingerprint(self):
+        fingerprint = []
+        for path in self.watched_files:
+            try:
+                stat = os.stat(path)
+                fingerprint.append((path, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                fingerprint.append((path, None, None))
+        return fingerprint
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get_many(self, keys):
+        """Return the cached score for every key, or None where there is no entry"""
+        values = []
+        with self.lock:
+            for key in keys:
+                value = self.entries.get(key)
+                if value is None:
+                    self.misses += 1
+                else:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                values.append(value)
+        return values
+
+    def put_many(self, keys, values):
+        with self.lock:
+            for key, value in zip(keys, values):
+                self.entries[key] = float(value)
+                self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def invalidate(self):
+        with self.lock:
+            self.entries.clear()
+            self.fingerprint = self._fingerprint()
+
+    def check_files(self):
+        """Invalidate the cache if a watched file changed since it was filled; returns True if it did"""
+        if self._fingerprint() == self.fingerprint:
+            return False
+        self.invalidate()
+        return True
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self.entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,204 @@
+# glove.py
+import os
+import json
+import argparse
+import warnings
+from itertools import islice
+
+import numpy as np
+
+from vocabulary import SEPARATOR
+
+WORDS_FILE = "words.npy"
+ROWS_FILE = "rows.npy"
+VECTORS_FILE = "vectors.npy"
+META_FILE = "glove.json"
+
+# Lines of the text file parsed at once while converting
+CHUNK_LINES = 20000
+
+
+def store_dir(glove_path):
+    """Where the binary store of a GloVe text file is kept: next to it, glove.6B.100d.txt -> glove.6B.100d/"""
+    return os.path.splitext(glove_path)[0]
+
+
+def source_info(glove_path):
+    stat = os.stat(glove_path)
+    return {'source': os.path.basename(glove_path), 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def count_lines(path):
+    lines = 0
+    last = b'\n'
+    with open(path, 'rb') as f:
+        while block := f.read(2**24):
+            lines += block.count(b'\n')
+            last = block[-1:]
+    return lines + (last != b'\n')
+
+
+def parse_chunk(lines, dim, out):
+    """Parse GloVe lines ('word v1 ... vdim') into `out`; returns the words"""
+    words, numbers = [], []
+    for line in lines:
+        word, _, rest = line.rstrip().partition(' ')
+        words.append(word)
+        numbers.append(rest)
+    try:
+        with warnings.catch_warnings():
+            # Malformed data only raises a DeprecationWarning
+            warnings.simplefilter('error', DeprecationWarning)
+            values = np.fromstring(' '.join(numbers), dtype=np.float32, sep=' ')
+    except (ValueError, DeprecationWarning):
+        values = None
+    if values is not None and values.size == len(lines) * dim:
+        out[...] = values.reshape(len(lines), dim)
+        return words
+
+    # Some words contain spaces (as in glove.840B): the last `dim` fields are the vector
+    words = []
+    for i, line in enumerate(lines):
+        fields = line.rstrip().rsplit(' ', dim)
+        if len(fields) != dim + 1:
+            raise ValueError(f"Expected a word and {dim} values, got: {line[:80]!r}")
+        words.append(fields[0])
+        out[i] = np.asarray(fields[1:], dtype=np.float32)
+    return words
+
+
+def convert_glove(glove_path, output_dir=None, chunk_lines=CHUNK_LINES):
+    """Convert a GloVe text file once into a memory-mappable store.
+
+    `vectors.npy` holds the float32 vectors in file order, `words.npy` the
+    UTF-8 encoded words sorted bytewise and `rows.npy` the matching int32 row
+    of each word in `vectors.npy`. The file is read twice, the second time in
+    chunks written straight into the memory-mapped matrix, so the whole
+    embedding is never held in memory. As in load_glove_embeddings, a word
+    appearing twice keeps its last vector. Words containing NUL characters
+    cannot be stored in a fixed-width bytes array and are left out.
+    """
+    output_dir = output_dir or store_dir(glove_path)
+    count = count_lines(glove_path)
+    with open(glove_path, 'r', encoding='utf-8') as f:
+        dim = len(f.readline().rstrip().split(' ')) - 1
+
+    os.makedirs(output_dir, exist_ok=True)
+    vectors = np.lib.format.open_memmap(os.path.join(output_dir, VECTORS_FILE), mode='w+', dtype=np.float32, shape=(count, dim))
+    words = []
+    with open(glove_path, 'r', encoding='utf-8') as f:
+        while chunk := list(islice(f, chunk_lines)):
+            # Blank lines are skipped, which leaves as many unused zero rows at the end
+            lines = [line for line in chunk if line.strip()]
+            words += parse_chunk(lines, dim, vectors[len(words):len(words) + len(lines)])
+    vectors.flush()
+    del vectors
+
+    rows = np.array([i for i, word in enumerate(words) if SEPARATOR not in word], dtype=np.int32)
+    keys = np.array([words[i].encode('utf-8') for i in rows], dtype=bytes)
+    del words
+    order = np.argsort(keys, kind='stable')
+    keys, rows = keys[order], rows[order]
+    # Duplicates are next to each other in file order: keep the last one
+    last = np.append(keys[1:] != keys[:-1], True) if len(keys) else np.zeros(0, dtype=bool)
+
+    np.save(os.path.join(output_dir, WORDS_FILE), keys[last])
+    np.save(os.path.join(output_dir, ROWS_FILE), rows[last])
+    with open(os.path.join(output_dir, META_FILE), 'w') as f:
+        json.dump(dict(source_info(glove_path), dim=dim, count=int(last.sum())), f)
+    return output_dir
+
+
+def tokenizer_vocabulary(tokenizer, vocab_size):
+    """(UTF-8 words, ids) with id < vocab_size, of a Keras Tokenizer or a VocabularyTokenizer"""
+    if hasattr(tokenizer, 'word_index'):
+        items = [(word, index) for word, index in tokenizer.word_index.items()
+                 if index < vocab_size and SEPARATOR not in word]
+        words = np.array([word.encode('utf-8') for word, _ in items], dtype=bytes)
+        return words, np.array([index for _, index in items], dtype=np.int64)
+    keep = np.asarray(tokenizer.ids) < vocab_size
+    return np.asarray(tokenizer.words)[keep], np.asarray(tokenizer.ids)[keep].astype(np.int64)
+
+
+class GloveStore:
+    """GloVe vectors converted by convert_glove, memory-mapped: only the rows that are looked up are read"""
+
+    def __init__(self, words, rows, vectors, **meta):
+        self.words = words
+        self.rows = rows
+        self.vectors = vectors
+        self.meta = meta
+        self.dim = vectors.shape[1]
+
+    @classmethod
+    def load(cls, directory, mmap_mode='r'):
+        with open(os.path.join(directory, META_FILE)) as f:
+            meta = json.load(f)
+        words = np.load(os.path.join(directory, WORDS_FILE), mmap_mode=mmap_mode)
+        rows = np.load(os.path.join(directory, ROWS_FILE), mmap_mode=mmap_mode)
+        vectors = np.load(os.path.join(directory, VECTORS_FILE), mmap_mode=mmap_mode)
+        return cls(words, rows, vectors, **meta)
+
+    @classmethod
+    def open(cls, glove_path, directory=None):
+        """The store of a GloVe text file, converting it first if it is missing or older than the file"""
+        directory = directory or store_dir(glove_path)
+        try:
+            with open(os.path.join(directory, META_FILE)) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = {}
+        info = source_info(glove_path)
+        if any(meta.get(key) != value for key, value in info.items()):
+            convert_glove(glove_path, directory)
+        return cls.load(directory)
+
+    def __len__(self):
+        return len(self.words)
+
+    def lookup_bytes(self, keys):
+        """Rows in `vectors` of an array of UTF-8 encoded words, -1 for words without a vector"""
+        if len(keys) == 0 or len(self.words) == 0:
+            return np.full(len(keys), -1, dtype=np.int64)
+
+        positions = np.searchsorted(self.words, keys)
+        np.minimum(positions, len(self.words) - 1, out=positions)
+        found = self.words[positions] == keys
+        return np.where(found, self.rows[positions], -1)
+
+    def embedding_matrix(self, tokenizer, vocab_size, embedding_dim=None, dtype=np.float32):
+        """The (vocab_size, dim) matrix of load_glove_embeddings: row i holds the vector of the word with id i.
+
+        Ids without a GloVe vector stay zero. The vectors are gathered with one
+        fancy index on the memory-mapped matrix, in file order.
+        """
+        if embedding_dim is not None and embedding_dim != self.dim:
+            raise ValueError(f"The GloVe vectors have {self.dim} dimensions, not {embedding_dim}")
+        words, ids = tokenizer_vocabulary(tokenizer, vocab_size)
+        rows = self.lookup_bytes(words)
+        found = rows >= 0
+        ids, rows = ids[found], rows[found]
+        order = np.argsort(rows)
+
+        matrix = np.zeros((vocab_size, self.dim), dtype=dtype)
+        matrix[ids[order]] = self.vectors[rows[order]]
+        return matrix
+
+
+def load_glove_embeddings(glove_path, embedding_dim, tokenizer, vocab_size, store=None):
+    """Same matrix as load_glove_embeddings of the notebook (in float32), from the binary store of `glove_path`.
+
+    The store is created next to the text file (or in `store`) the first time.
+    """
+    return GloveStore.open(glove_path, store).embedding_matrix(tokenizer, vocab_size, embedding_dim)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert a GloVe text file into a memory-mapped binary store")
+    parser.add_argument('glove_path', help="e.g. glove.6B.100d.txt")
+    parser.add_argument('--output-dir', default=None, help="default: next to the text file, without the extension")
+    args = parser.parse_args()
+
+    output_dir = convert_glove(args.glove_path, args.output_dir)
+    store = GloveStore.load(output_dir)
+    print(f"{len(store)} vectors of {store.dim} dimensions written to {output_dir}")
@@ -0,0 +1,299 @@
+# numpy_model.py
+import os
+import json
+import argparse
+
+import numpy as np
+
+NUMPY_MODEL_DIR = "numpy_model"
+MANIFEST_FILE = "manifest.json"
+PRECISIONS = ('float32', 'float16', 'int8')
+
+
+def numpy_model_dir(precision='float32'):
+    """Name of the export directory for a given weight precision"""
+    if precision in (None, 'float32'):
+        return NUMPY_MODEL_DIR
+    return f'{NUMPY_MODEL_DIR}_{precision}'
+
+
+def quantize_rows(matrix):
+    """Symmetric int8 quantization with one scale per row"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    scales = np.abs(matrix).max(axis=1) / 127
+    scales[scales == 0] = 1
+    values = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+    return values, scales.astype(np.float32)
+
+
+class StoredWeight:
+    """A weight matrix as stored on disk: float32, float16, or int8 with per-row scales.
+
+    Values stay in their storage type (and memory-mapped) and are only
+    converted to float32 when they are used.
+    """
+
+    def __init__(self, values, scales=None):
+        self.values = values
+        self.scales = scales
+
+    def rows(self, index):
+        """Dequantized rows at `index`, e.g. the embeddings of a batch of token ids"""
+        rows = self.values[index].astype(np.float32, copy=False)
+        if self.scales is not None:
+            rows *= self.scales[index][..., None]
+        return rows
+
+    def dense(self):
+        """The whole matrix as float32"""
+        if self.scales is None:
+            return np.asarray(self.values, dtype=np.float32)
+        return self.values.astype(np.float32) * self.scales[:, None]
+
+
+def sigmoid(x):
+    # Written with tanh so large negative inputs do not overflow exp()
+    return 0.5 * (np.tanh(0.5 * x) + 1)
+
+
+def relu(x):
+    return np.maximum(x, 0)
+
+
+def linear(x):
+    return x
+
+
+ACTIVATIONS = {'sigmoid': sigmoid, 'tanh': np.tanh, 'relu': relu, 'linear': linear}
+
+
+def get_activation(name):
+    if name not in ACTIVATIONS:
+        raise ValueError(f"Unsupported activation: {name}")
+    return ACTIVATIONS[name]
+
+
+class Embedding:
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+
+    def __call__(self, x):
+        return self.embeddings.rows(x)
+
+
+class BidirectionalLSTM:
+    """Bidirectional(LSTM(units, return_sequences=...)) with merge_mode='concat'"""
+
+    def __init__(self, forward, backward, units, return_sequences=True, activation='tanh', recurrent_activation='sigmoid'):
+        self.forward = forward
+        self.backward = backward
+        self.units = units
+        self.return_sequences = return_sequences
+        self.activation = get_activation(activation)
+        self.recurrent_activation = get_activation(recurrent_activation)
+
+    def lstm(self, x, kernel, recurrent_kernel, bias, reverse):
+        n, steps, _ = x.shape
+        u = self.units
+        # Reduced-precision kernels are dequantized once per call, not per timestep
+        kernel, recurrent_kernel, bias = kernel.dense(), recurrent_kernel.dense(), bias.dense()
+
+        # The input projection of every timestep is one matrix product
+        projected = x @ kernel + bias
+        h = np.zeros((n, u), dtype=np.float32)
+        c = np.zeros((n, u), dtype=np.float32)
+        outputs = np.empty((n, steps, u), dtype=np.float32)
+
+        # Keras packs the gates as input, forget, cell, output
+        for t in (range(steps - 1, -1, -1) if reverse else range(steps)):
+            z = projected[:, t] + h @ recurrent_kernel
+            i = self.recurrent_activation(z[:, :u])
+            f = self.recurrent_activation(z[:, u:2 * u])
+            g = self.activation(z[:, 2 * u:3 * u])
+            o = self.recurrent_activation(z[:, 3 * u:])
+            c = f * c + i * g
+            h = o * self.activation(c)
+            # The backward output is stored at the timestep it was computed for,
+            # which is how Bidirectional realigns it with the forward output
+            outputs[:, t] = h
+
+        if self.return_sequences:
+            return outputs
+        return outputs[:, 0 if reverse else -1]
+
+    def __call__(self, x):
+        forward = self.lstm(x, *self.forward, reverse=False)
+        backward = self.lstm(x, *self.backward, reverse=True)
+        return np.concatenate([forward, backward], axis=-1)
+
+
+class GlobalMaxPooling1D:
+    def __call__(self, x):
+        return x.max(axis=1)
+
+
+class Dense:
+    def __init__(self, kernel, bias, activation='linear'):
+        self.kernel = kernel
+        self.bias = bias
+        self.activation = get_activation(activation)
+
+    def __call__(self, x):
+        return self.activation(x @ self.kernel.dense() + self.bias.dense())
+
+
+class NumpySentimentModel:
+    """Inference-only NumPy implementation of the exported Keras model.
+
+    Exposes predict() and predict_on_batch() like a Keras model, so it can be
+    handed to SentimentAnalyzer as is, without importing TensorFlow.
+    """
+
+    def __init__(self, layers):
+        self.layers = layers
+
+    @classmethod
+    def load(cls, model_dir, mmap_mode='r'):
+        with open(os.path.join(model_dir, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+
+        def load_array(name):
+            return np.load(os.path.join(model_dir, name), mmap_mode=mmap_mode)
+
+        def weights(entries):
+            stored = []
+            for entry in entries:
+                if isinstance(entry, str):
+                    stored.append(StoredWeight(load_array(entry)))
+                else:
+                    scales = load_array(entry['scales']) if 'scales' in entry else None
+                    stored.append(StoredWeight(load_array(entry['values']), scales))
+            return stored
+
+        layers = []
+        for spec in manifest['layers']:
+            if spec['type'] == 'embedding':
+                layers.append(Embedding(*weights(spec['weights'])))
+            elif spec['type'] == 'bidirectional_lstm':
+                layers.append(BidirectionalLSTM(
+                    weights(spec['forward']),
+                    weights(spec['backward']),
+                    spec['units'],
+                    return_sequences=spec['return_sequences'],
+                    activation=spec['activation'],
+                    recurrent_activation=spec['recurrent_activation']
+                ))
+            elif spec['type'] == 'global_max_pooling_1d':
+                layers.append(GlobalMaxPooling1D())
+            elif spec['type'] == 'dense':
+                layers.append(Dense(*weights(spec['weights']), activation=spec['activation']))
+            else:
+                raise ValueError(f"Unknown layer type in manifest: {spec['type']}")
+        return cls(layers)
+
+    def predict_on_batch(self, x):
+        x = np.asarray(x)
+        for layer in self.layers:
+            x = layer(x)
+        return x
+
+    def predict(self, x, batch_size=256, verbose=0):
+        outputs = [self.predict_on_batch(x[i:i + batch_size]) for i in range(0, len(x), batch_size)]
+        return np.concatenate(outputs)
+
+
+def export_keras_model(model, output_dir, precision='float32'):
+    """Save the weights of a Keras Sequential model as .npy files plus a JSON manifest of its layers.
+
+    With `precision` set to float16 or int8 the embedding matrix and the LSTM
+    kernels are stored in that type (int8 with one float32 scale per row);
+    biases and Dense layers always stay float32.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unsupported precision: {precision}")
+    os.makedirs(output_dir, exist_ok=True)
+
+    def save(prefix, arrays, reduced=()):
+        entries = []
+        for i, array in enumerate(arrays):
+            name = f'{prefix}_{i}.npy'
+            array = np.asarray(array, dtype=np.float32)
+            if i not in reduced or precision == 'float32':
+                np.save(os.path.join(output_dir, name), array)
+                entries.append(name)
+            elif precision == 'float16':
+                np.save(os.path.join(output_dir, name), array.astype(np.float16))
+                entries.append({'values': name})
+            else:
+                values, scales = quantize_rows(array)
+                scales_name = f'{prefix}_{i}_scales.npy'
+                np.save(os.path.join(output_dir, name), values)
+                np.save(os.path.join(output_dir, scales_name), scales)
+                entries.append({'values': name, 'scales': scales_name})
+        return entries
+
+    layers = []
+    for index, layer in enumerate(model.layers):
+        kind = layer.__class__.__name__
+        prefix = f'{index:02d}_{layer.name}'
+
+        if kind == 'Embedding':
+            if layer.mask_zero:
+                raise ValueError("Embedding layers with mask_zero=True are not supported")
+            layers.append({'type': 'embedding', 'weights': save(prefix, layer.get_weights(), reduced=(0,))})
+
+        elif kind == 'Bidirectional':
+            forward, backward = layer.forward_layer, layer.backward_layer
+            if forward.__class__.__name__ != 'LSTM' or layer.merge_mode != 'concat':
+                raise ValueError("Only Bidirectional(LSTM) layers with merge_mode='concat' are supported")
+            layers.append({
+                'type': 'bidirectional_lstm',
+                'units': forward.units,
+                'return_sequences': forward.return_sequences,
+                'activation': forward.activation.__name__,
+                'recurrent_activation': forward.recurrent_activation.__name__,
+                # kernel and recurrent kernel; the bias stays float32
+                'forward': save(prefix + '_forward', forward.get_weights(), reduced=(0, 1)),
+                'backward': save(prefix + '_backward', backward.get_weights(), reduced=(0, 1)),
+            })
+
+        elif kind == 'GlobalMaxPooling1D':
+            layers.append({'type': 'global_max_pooling_1d'})
+
+        elif kind == 'Dense':
+            layers.append({
+                'type': 'dense',
+                'activation': layer.activation.__name__,
+                'weights': save(prefix, layer.get_weights()),
+            })
+
+        elif kind == 'Dropout':
+            # No-op at inference time
+            continue
+
+        else:
+            raise ValueError(f"Unsupported layer: {kind}")
+
+    # Fail at export time rather than at load time on activations the runtime lacks
+    for spec in layers:
+        for key in ('activation', 'recurrent_activation'):
+            if key in spec:
+                get_activation(spec[key])
+
+    with open(os.path.join(output_dir, MANIFEST_FILE), 'w') as f:
+        json.dump({'precision': precision, 'layers': layers}, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the Keras sentiment model to the NumPy runtime")
+    parser.add_argument('--model-dir', default='sentiment_v2')
+    parser.add_argument('--precision', choices=PRECISIONS, default='float32',
+                        help="storage type of the embedding and LSTM weights")
+    args = parser.parse_args()
+
+    from tensorflow.keras.models import load_model
+
+    model = load_model(os.path.join(args.model_dir, 'sentiment_model_v2.h5'))
+    output_dir = os.path.join(args.model_dir, numpy_model_dir(args.precision))
+    export_keras_model(model, output_dir, args.precision)
+    print(f"Model exported to {output_dir}")
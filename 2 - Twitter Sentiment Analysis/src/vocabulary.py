@@ -0,0 +1,227 @@
+# vocabulary.py
+import os
+import re
+import json
+import argparse
+
+import numpy as np
+
+VOCAB_DIR = "vocabulary"
+WORDS_FILE = "words.npy"
+IDS_FILE = "ids.npy"
+META_FILE = "vocabulary.json"
+
+# Batches are tokenized as one string, with texts joined by SEPARATOR. After the
+# filters are applied every separator is turned into a standalone MARKER token
+# (no real token can contain a NUL byte), which delimits the rows again.
+SEPARATOR = '\x00'
+MARKER = b'\x00\x01'
+
+# Cleaning steps of clean_tweet in Twitter_Sentiment_Analysis.ipynb
+MENTIONS = re.compile(r'@[A-Za-z0-9_]+')
+URLS = re.compile(r'https?://[A-Za-z0-9./]+')
+SPECIAL_CHARACTERS = re.compile(r'[^a-zA-Z\s]')
+SPECIAL_CHARACTERS_JOINED = re.compile(r'[^a-zA-Z\s\x00]')
+
+
+def clean_tweet(tweet):
+    tweet = MENTIONS.sub('', tweet)
+    tweet = URLS.sub('', tweet)
+    tweet = SPECIAL_CHARACTERS.sub('', tweet)
+    return tweet.lower()
+
+
+def export_vocabulary(tokenizer, output_dir, num_words=None):
+    """Write the ids a Keras Tokenizer can actually emit as two memory-mappable arrays.
+
+    `words.npy` holds the UTF-8 encoded words sorted bytewise and `ids.npy` the
+    matching int32 ids. Words ranked at or above `num_words` are left out, since
+    texts_to_sequences maps them to the OOV id exactly like unknown words.
+    Words containing NUL characters cannot be stored in a fixed-width bytes
+    array and are left out as well.
+    """
+    num_words = num_words or tokenizer.num_words
+    items = [(word, index) for word, index in tokenizer.word_index.items()
+             if (not num_words or index < num_words) and SEPARATOR not in word]
+
+    words = np.array([word.encode('utf-8') for word, _ in items], dtype=bytes)
+    ids = np.array([index for _, index in items], dtype=np.int32)
+    order = np.argsort(words, kind='stable')
+
+    oov_index = None
+    if tokenizer.oov_token is not None:
+        oov_index = tokenizer.word_index.get(tokenizer.oov_token)
+
+    os.makedirs(output_dir, exist_ok=True)
+    np.save(os.path.join(output_dir, WORDS_FILE), words[order])
+    np.save(os.path.join(output_dir, IDS_FILE), ids[order])
+    with open(os.path.join(output_dir, META_FILE), 'w') as f:
+        json.dump({
+            'num_words': num_words,
+            'oov_index': oov_index,
+            'filters': tokenizer.filters,
+            'lower': tokenizer.lower,
+            'split': tokenizer.split,
+        }, f)
+
+
+class VocabularyTokenizer:
+    """Drop-in replacement for the Keras Tokenizer at inference time, backed by an exported vocabulary"""
+
+    def __init__(self, words, ids, oov_index=None, filters='', lower=True, split=' ', num_words=None):
+        self.words = words
+        self.ids = ids
+        self.oov_index = oov_index
+        self.filters = filters
+        self.lower = lower
+        self.split = split
+        self.num_words = num_words
+        self.translate_map = str.maketrans({c: split for c in filters})
+
+        # UTF-8 never encodes non-ASCII characters with ASCII bytes, so ASCII
+        # filters can be applied to the encoded batch with a byte table
+        self.byte_translate_map = None
+        if all(ord(c) < 128 for c in filters) and len(split) == 1 and ord(split) < 128:
+            self.byte_translate_map = bytes.maketrans(filters.encode(), split.encode() * len(filters))
+
+    @classmethod
+    def load(cls, vocab_dir, mmap_mode='r'):
+        with open(os.path.join(vocab_dir, META_FILE)) as f:
+            meta = json.load(f)
+        words = np.load(os.path.join(vocab_dir, WORDS_FILE), mmap_mode=mmap_mode)
+        ids = np.load(os.path.join(vocab_dir, IDS_FILE), mmap_mode=mmap_mode)
+        return cls(words, ids, **meta)
+
+    def __len__(self):
+        return len(self.words)
+
+    def text_to_word_sequence(self, text):
+        # Same steps as keras.preprocessing.text.text_to_word_sequence
+        if self.lower:
+            text = text.lower()
+        text = text.translate(self.translate_map)
+        return [word for word in text.split(self.split) if word]
+
+    def lookup(self, words):
+        """Map a sequence of words to their ids, with -1 for words outside the vocabulary"""
+        ids = self.lookup_bytes(np.array([word.encode('utf-8') for word in words], dtype=bytes))
+        # NumPy drops trailing NUL bytes, which could make such a word match another one
+        for i, word in enumerate(words):
+            if SEPARATOR in word:
+                ids[i] = -1
+        return ids
+
+    def lookup_bytes(self, keys):
+        """Same as lookup, for an array of UTF-8 encoded words"""
+        if len(keys) == 0 or len(self.words) == 0:
+            return np.full(len(keys), -1, dtype=np.int32)
+
+        positions = np.searchsorted(self.words, keys)
+        np.minimum(positions, len(self.words) - 1, out=positions)
+        found = self.words[positions] == keys
+        return np.where(found, self.ids[positions], -1).astype(np.int32)
+
+    def texts_to_sequences(self, texts):
+        sequences = []
+        for text in texts:
+            ids = self.lookup(self.text_to_word_sequence(text))
+            if self.oov_index is None:
+                ids = ids[ids >= 0]
+            else:
+                ids[ids < 0] = self.oov_index
+            sequences.append(ids.tolist())
+        return sequences
+
+    def texts_to_padded(self, texts, maxlen, padding='post', truncating='post', clean=False, out=None):
+        """Tokenize a batch straight into a zero-padded (len(texts), maxlen) int32 matrix.
+
+        Gives the same result as pad_sequences(texts_to_sequences(texts), ...),
+        but the whole batch goes through each step at once instead of one text at a time.
+        With `clean=True` the texts are first passed through clean_tweet.
+        """
+        n = len(texts)
+        if out is None:
+            out = np.zeros((n, maxlen), dtype=np.int32)
+        else:
+            out[:] = 0
+        if n == 0:
+            return out
+
+        joined = SEPARATOR.join(texts)
+        if joined.count(SEPARATOR) != n - 1 or SEPARATOR in self.filters or SEPARATOR == self.split:
+            # A text contains the separator itself, tokenize one text at a time
+            if clean:
+                texts = [clean_tweet(text) for text in texts]
+            for i, ids in enumerate(self.texts_to_sequences(texts)):
+                ids = ids[:maxlen] if truncating == 'post' else ids[-maxlen:]
+                if len(ids) > 0:
+                    if padding == 'post':
+                        out[i, :len(ids)] = ids
+                    else:
+                        out[i, maxlen - len(ids):] = ids
+            return out
+
+        if clean:
+            joined = MENTIONS.sub('', joined)
+            joined = URLS.sub('', joined)
+            joined = SPECIAL_CHARACTERS_JOINED.sub('', joined).lower()
+        elif self.lower:
+            joined = joined.lower()
+        split = self.split.encode('utf-8')
+        if self.byte_translate_map is not None:
+            data = joined.encode('utf-8').translate(self.byte_translate_map)
+        else:
+            data = joined.translate(self.translate_map).encode('utf-8')
+        data = data.replace(SEPARATOR.encode(), split + MARKER + split)
+
+        # Words longer than the longest vocabulary entry can never match, so they
+        # are cut one byte past it, which keeps the token array narrow
+        width = self.words.dtype.itemsize + 1
+        tokens = np.array(data.split(split), dtype=f'S{width}')
+        tokens = tokens[tokens != b'']
+
+        is_marker = tokens == MARKER
+        rows = np.cumsum(is_marker)[~is_marker]
+        ids = self.lookup_bytes(tokens[~is_marker])
+        if self.oov_index is None:
+            known = ids >= 0
+            ids, rows = ids[known], rows[known]
+        else:
+            ids[ids < 0] = self.oov_index
+
+        # Position of every id within its own row
+        counts = np.bincount(rows, minlength=n)
+        starts = np.cumsum(counts) - counts
+        positions = np.arange(len(ids)) - starts[rows]
+
+        if truncating == 'post':
+            keep = positions < maxlen
+        else:
+            skipped = np.maximum(counts - maxlen, 0)
+            keep = positions >= skipped[rows]
+            positions = positions - skipped[rows]
+        rows, positions, ids = rows[keep], positions[keep], ids[keep]
+
+        if padding == 'pre':
+            lengths = np.minimum(counts, maxlen)
+            positions = positions + (maxlen - lengths[rows])
+
+        out[rows, positions] = ids
+        return out
+
+
+if __name__ == "__main__":
+    import pickle
+
+    parser = argparse.ArgumentParser(description="Export the pickled Keras Tokenizer to a compact vocabulary")
+    parser.add_argument('--model-dir', default='sentiment_v2')
+    parser.add_argument('--num-words', type=int, default=None,
+                        help="vocabulary size (default: num_words of the pickled tokenizer)")
+    args = parser.parse_args()
+
+    with open(os.path.join(args.model_dir, 'tokenizer.pickle'), 'rb') as handle:
+        tokenizer = pickle.load(handle)
+
+    output_dir = os.path.join(args.model_dir, VOCAB_DIR)
+    export_vocabulary(tokenizer, output_dir, args.num_words)
+    print(f"Vocabulary exported to {output_dir}")
@@ -0,0 +1,68 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from analyzer import SentimentAnalyzer
+from vocabulary import VocabularyTokenizer
+
+# Default filters of the Keras Tokenizer
+FILTERS = '!"#$%&()*+,-./:;<=>?@[\\]^_`{|}~\t\n'
+CONFIG = {'max_sequence_length': 8, 'padding_strategy': 'post', 'truncating_strategy': 'post'}
+
+
+class CountingModel:
+    """Scores a row by its sum of ids and remembers every row it was given"""
+
+    def __init__(self):
+        self.rows = []
+
+    def predict_on_batch(self, x):
+        self.rows.extend(map(tuple, x))
+        return (np.asarray(x).sum(axis=1, keepdims=True) % 100 / 100).astype(np.float32)
+
+
+def make_analyzer(cache_size=16):
+    # The handles and URL fragments are in the vocabulary, as they usually are in the 50k most frequent words
+    vocabulary = sorted(['a', 'b', 'great', 'http', 'x', 'y', 'co', '1', '2'])
+    words = np.array([word.encode('utf-8') for word in vocabulary], dtype=bytes)
+    tokenizer = VocabularyTokenizer(words, np.arange(1, len(words) + 1, dtype=np.int32), filters=FILTERS)
+    model = CountingModel()
+    return SentimentAnalyzer(CONFIG, model, tokenizer, cache_size=cache_size), model
+
+
+class PredictionCacheTest(unittest.TestCase):
+    def test_mentions_urls_and_case_share_an_entry(self):
+        analyzer, model = make_analyzer()
+        first = analyzer.predict_sentiment("@a great http://x.co/1")
+        self.assertEqual(analyzer.cache.stats()['misses'], 1)
+        self.assertEqual(analyzer.cache.stats()['hits'], 0)
+
+        second = analyzer.predict_sentiment("@b GREAT http://y.co/2")
+        self.assertEqual(analyzer.cache.stats()['misses'], 1)
+        self.assertEqual(analyzer.cache.stats()['hits'], 1)
+        self.assertEqual(second, first)
+        self.assertEqual(len(model.rows), 1)
+
+    def test_model_scores_the_uncleaned_text(self):
+        analyzer, model = make_analyzer()
+        uncached, _ = make_analyzer(cache_size=0)
+        text = "@a great http://x.co/1"
+        self.assertEqual(analyzer.predict_sentiment(text), uncached.predict_sentiment(text))
+        self.assertEqual(model.rows, [tuple(analyzer.preprocess_text(text)[0])])
+
+    def test_duplicates_in_a_batch_are_scored_once(self):
+        analyzer, model = make_analyzer()
+        texts = ["@a great http://x.co/1", "great great", "@b Great! http://y.co/2", "x"]
+        scores = analyzer.predict_batch(texts)
+        self.assertEqual(len(model.rows), 3)
+        self.assertEqual(scores[2], scores[0])
+        np.testing.assert_array_equal(analyzer.predict_batch(texts), scores)
+        self.assertEqual(analyzer.cache.stats()['hits'], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import sys
+import tempfile
+import unittest
+import importlib.util
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from numpy_model import NumpySentimentModel, export_keras_model
+
+# Maximum score difference to the Keras model accepted for each storage precision
+TOLERANCES = {'float32': 1e-4, 'float16': 1e-3, 'int8': 2e-2}
+
+
+def build_model(vocab_size=200, max_length=24):
+    """A smaller copy of the notebook's architecture, with random weights"""
+    import tensorflow as tf
+    from tensorflow.keras.layers import Dense, Embedding, LSTM, Bidirectional, Dropout, GlobalMaxPooling1D, Input
+    from tensorflow.keras.models import Sequential
+
+    tf.keras.utils.set_random_seed(0)
+    model = Sequential([
+        Input(shape=(max_length,)),
+        Embedding(vocab_size, 16),
+        Bidirectional(LSTM(12, return_sequences=True)),
+        Bidirectional(LSTM(8, return_sequences=True)),
+        GlobalMaxPooling1D(),
+        Dense(16, activation='relu'),
+        Dropout(0.4),
+        Dense(1, activation='sigmoid'),
+    ])
+    # Larger weights than the initializers give, so the scores spread over (0, 1) instead of staying near 0.5
+    rng = np.random.default_rng(0)
+    model.set_weights([rng.normal(0, 0.5, weight.shape).astype(np.float32) for weight in model.get_weights()])
+    return model
+
+
+@unittest.skipUnless(importlib.util.find_spec('tensorflow'), "TensorFlow is needed to build the reference model")
+class NumpyRuntimeParityTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.model = build_model()
+        rng = np.random.default_rng(0)
+        # Padded rows as the analyzer produces them: token ids first, zeros after
+        lengths = rng.integers(1, 25, size=64)
+        cls.sequences = rng.integers(1, 200, size=(64, 24)).astype(np.int32)
+        cls.sequences[np.arange(24) >= lengths[:, None]] = 0
+        cls.expected = cls.model.predict(cls.sequences, verbose=0)[:, 0]
+
+    def check_precision(self, precision):
+        with tempfile.TemporaryDirectory() as output_dir:
+            export_keras_model(self.model, output_dir, precision)
+            runtime = NumpySentimentModel.load(output_dir)
+            scores = np.asarray(runtime.predict(self.sequences, batch_size=16))[:, 0]
+            single = np.asarray(runtime.predict_on_batch(self.sequences[:1]))[:, 0]
+
+        self.assertEqual(scores.shape, self.expected.shape)
+        np.testing.assert_allclose(scores, self.expected, rtol=0, atol=TOLERANCES[precision])
+        np.testing.assert_allclose(single, scores[:1], rtol=0, atol=1e-6)
+
+    def test_float32(self):
+        self.check_precision('float32')
+
+    def test_float16(self):
+        self.check_precision('float16')
+
+    def test_int8(self):
+        self.check_precision('int8')
+
+    def test_unsupported_precision(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            with self.assertRaises(ValueError):
+                export_keras_model(self.model, output_dir, 'bfloat16')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,114 +1,201 @@
+import time
+
+# Reference point of the startup milestones, before any heavy import
+STARTED = time.perf_counter()
+
 import sys
 import os
+import json
 
 # Add the src directory to the path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
 sys.path.append(os.path.join(os.path.dirname(__file__), 'images'))
 
-import cv2
-import time
-import subprocess
-from PyQt6.QtWidgets import QApplication, QMainWindow
-from PyQt6.QtCore import Qt, QTimer
-from PyQt6.QtGui import QImage, QPixmap
+import argparse
+from PyQt6.QtWidgets import QApplication, QMainWindow, QLabel
+from PyQt6.QtCore import QTimer
 from src.MainWindow import GestureRecognitionUI
-from ultralytics import YOLO
 from src.settings import SettingsDialog
+from src.processing import FrameProcessor
+from src.pipeline import CaptureThread, InferenceWorker, StageCounter
+from src.startup import StartupLoader
+from src.commands import CommandExecutor, CommandSignals
+from src.presenter import FramePresenter
+from src.tracing import Tracer
 
 
 FILE = "settings.txt"
+# Stages shown in the status bar, in pipeline order
+TRACED_STAGES = ['capture', 'resize', 'inference', 'draw', 'decision', 'widgets', 'present']
 
 
 class GestureRecognitionApp(QMainWindow):
 
-    def __init__(self):
+    def __init__(self, source='0', roi=True, tracing=True, trace_file=None, staged=True, startup_benchmark=False):
         super().__init__()
         self.ui = GestureRecognitionUI()
         self.ui.setupUi(self)
+        self.roi = roi
+
+        # Every stage records spans here, for the status bar and the --trace file
+        self.tracer = Tracer(enabled=tracing)
+        self.trace_file = trace_file
+        self.trace_label = QLabel()
+        self.statusBar().addPermanentWidget(self.trace_label)
+
+        # Frames are scaled once to the label size and shown without extra copies
+        self.presenter = FramePresenter(self.ui.camera_image)
+        self.render_stats = StageCounter()
+
+        # Startup times, in seconds since the start of the process (see --startup-benchmark)
+        self.startup_benchmark = startup_benchmark
+        self.milestones = {}
+
+        # Gesture commands run in background threads and report back through a signal
+        self.command_signals = CommandSignals()
+        self.command_signals.finished.connect(self.command_finished)
+        self.commands = CommandExecutor(timeout=self.ui.settings.command_timeout or None,
+                                        on_finished=self.command_signals.finished.emit, tracer=self.tracer)
+        self.command_message = None
+
+        # The model (YOLO on the backend set in settings.txt) and the frame source
+        # (a webcam index, video file, image directory or "synthetic") are loaded
+        # in the background, so the window shows at once. Camera frames are
+        # previewed until the model is ready, then capture, inference and
+        # rendering run on separate threads: the capture thread keeps only the
+        # latest frame, the inference worker processes the newest one and the GUI
+        # thread just renders the results it is sent
+        self.model = None
+        self.cap = None
+        self.capture = None
+        self.processor = None
+        self.worker = None
+        self.closing = False
+        self.preview_timer = QTimer()
+        self.preview_timer.timeout.connect(self.show_preview)
+        self.stats_timer = QTimer()
+        self.stats_timer.timeout.connect(self.update_stats)
+
+        self.loader = StartupLoader(source, self.ui.settings.backend, warmup_sizes=(None, 320) if roi else (None,),
+                                    parallel=staged)
+        self.loader.progress.connect(self.show_progress)
+        self.loader.camera_ready.connect(self.camera_ready)
+        self.loader.model_ready.connect(self.model_ready)
+        self.loader.failed.connect(self.startup_failed)
+        if staged:
+            self.loader.start()
+        else:
+            # Everything is loaded before the window is shown, as the app used to
+            self.loader.run()
+
+    def milestone(self, name):
+        if name not in self.milestones:
+            self.milestones[name] = time.perf_counter() - STARTED
+
+    def show_progress(self, message):
+        self.statusBar().showMessage(message)
+        if self.worker is None and not self.preview_timer.isActive():
+            self.ui.camera_image.setText(message)
+
+    def startup_failed(self, message):
+        print(message)
+        self.statusBar().showMessage(message)
+        self.ui.camera_image.setText(message)
+        if self.startup_benchmark:
+            QApplication.instance().exit(1)
+
+    def camera_ready(self, cap):
+        if self.closing:
+            # Queued before the loader finished, delivered after the window was closed
+            cap.release()
+            return
+        self.milestone('camera_opened')
+        self.cap = cap
+        self.capture = CaptureThread(self.cap, tracer=self.tracer)
+        self.capture.start()
+        if self.model is None:
+            # Show the camera while the model is still loading
+            self.preview_timer.start(30)
+        self.start_pipeline()
+
+    def model_ready(self, model):
+        if self.closing:
+            return
+        self.milestone('model_ready')
+        self.model = model
+        self.start_pipeline()
+
+    def show_preview(self):
+        item = self.capture.latest.get(timeout=0)
+        if item is not None:
+            self.update_image(item[1])
+            self.milestone('first_frame')
+
+    def start_pipeline(self):
+        """Start inference once both the model and the frame source are ready"""
+        if self.model is None or self.capture is None:
+            return
+        self.preview_timer.stop()
+        self.processor = FrameProcessor(self.model, lambda: self.ui.settings, tracking=True, roi=self.roi, tracer=self.tracer)
+        self.worker = InferenceWorker(self.capture.latest, self.processor)
+        self.worker.result_ready.connect(self.render_result)
+        self.worker.start()
 
-        # Initialize YOLO model
-        self.model = YOLO("model/yolov8_transfer_learning_v3.pt")
-
-        # Initialize video capture
-        self.cap = cv2.VideoCapture(0)
-
-        if not self.cap.isOpened():
-            print("Error: Could not open camera.")
-            sys.exit(1)
-
-        # Set up a QTimer to periodically capture frames
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_frame)
-        self.timer.start(30)  # Timer interval in milliseconds
-
-        self.last_prediction = None
-        self.prediction_start_time = None
-        self.countdown_started = False
-        self.countdown_end_time = 0
-
-
+        # Refresh the per-stage counters in the status bar twice a second
+        self.stats_timer.start(500)
 
-    def update_frame(self):
-        """Capture a frame from the camera and process it"""
-        ret, frame = self.cap.read()
 
-        if not ret:
-            print("Error: Could not read frame.")
-            return
-        
-        frame = cv2.resize(frame, (640, 480))
-
-        result = self.model(frame)
-        current_prediction = None
-        highest_confidence = 0
-        best_box = None
-
-        # Process results and find the highest confidence bounding box
-        if len(result) > 0 and len(result[0].boxes) > 0:
-            for box in result[0].boxes:
-                if box.conf.item() > highest_confidence:
-                    highest_confidence = box.conf.item()
-                    best_box = box
-
-            if best_box is not None and highest_confidence > 0.55:
-                current_prediction = result[0].names[int(best_box.cls)]
-
-                # Draw the bounding box on the frame
-                x1, y1, x2, y2 = map(int, best_box.xyxy[0])
-                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                cv2.putText(frame, f'{current_prediction} ({highest_confidence:.2f})', (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
-
-                text = self.ui.settings.gesture_commands.get(current_prediction, '')
-                if len(text) > 25:
-                    text = text[:25] + "..."
-                self.ui.command_text.setText(text)
-
-        # Handle gesture execution
-        if current_prediction == self.last_prediction:
-            if self.prediction_start_time is None:
-                self.prediction_start_time = time.time()
-            elif time.time() - self.prediction_start_time >= 1 and not self.countdown_started:
-                self.countdown_started = True
-                self.countdown_end_time = time.time() + self.ui.settings.countdown
-        else:
-            self.last_prediction = current_prediction
-            self.prediction_start_time = None
-            self.countdown_started = False
+    def render_result(self, result):
+        """Show a processed frame and its prediction; runs on the GUI thread"""
+        with self.tracer.span('widgets'):
+            if result.command_text is not None:
+                self.ui.display_command(result.command_text)
 
-        self.ui.display_gesture(current_prediction)
+            self.ui.display_gesture(result.prediction)
 
-        if self.countdown_started:
-            remaining_time = max(0, int(self.countdown_end_time - time.time()))
-            self.ui.update_progress_bar(remaining_time, self.ui.settings.countdown)
+            if result.countdown_remaining is not None:
+                self.ui.update_progress_bar(result.countdown_remaining, result.countdown_total)
 
-            if remaining_time == 0:
-                self.countdown_started = False
-                if current_prediction is not None and self.ui.settings.gesture_commands.get(current_prediction, '') != '':
-                    self.execute_command(self.ui.settings.gesture_commands[current_prediction])
+        if result.command is not None:
+            self.execute_command(result.prediction, result.command)
 
         # Update the camera image display
-        self.update_image(frame)
-
+        with self.tracer.span('present'):
+            self.update_image(result.frame)
+        self.render_stats.tick(time.perf_counter() - result.captured_at)
+
+        self.milestone('first_frame')
+        if 'first_prediction' not in self.milestones:
+            self.milestone('first_prediction')
+            if self.startup_benchmark:
+                print(json.dumps(self.milestones))
+                self.close()
+
+    def update_stats(self):
+        capture, inference, render = self.capture.stats, self.worker.stats, self.render_stats
+        message = (
+            f"Capture {capture.fps():.1f} FPS | "
+            f"Inference {inference.fps():.1f} FPS, {inference.latency_ms():.0f} ms, {inference.dropped} frames dropped | "
+            f"Display {render.fps():.1f} FPS, {render.latency_ms():.0f} ms capture-to-display"
+        )
+        if self.processor.tracker is not None:
+            tracking = self.processor.tracker.stats()
+            message += f" | YOLO every {tracking['interval']} frames ({tracking['detection_ratio']:.0%} of frames)"
+        if self.processor.roi is not None:
+            message += f" | {self.processor.roi.stats()['roi_ratio']:.0%} of detections on the hand crop"
+        message += (f" | Widget updates {self.ui.widget_updates.fps():.1f}/s, "
+                    f"{self.ui.skipped_updates.fps():.1f}/s skipped as unchanged")
+        commands = self.commands.stats()
+        if commands['started'] or commands['rejected']:
+            message += f" | Commands: {commands['running']} running"
+            if self.command_message is not None:
+                message += f", last {self.command_message}"
+        self.statusBar().showMessage(message)
+
+        if self.tracer.enabled:
+            stages = self.tracer.stats()
+            self.trace_label.setText("p50/p95 ms: " + ", ".join(
+                f"{stage} {stages[stage]['p50_ms']:.1f}/{stages[stage]['p95_ms']:.1f}" for stage in TRACED_STAGES if stage in stages))
 
     def open_settings_dialog(self):
         dialog = SettingsDialog(self.ui.settings)
@@ -117,6 +204,7 @@ class GestureRecognitionApp(QMainWindow):
 
     def update_settings(self, new_settings):
         self.ui.settings = new_settings
+        self.commands.timeout = new_settings.command_timeout or None
         self.save_settings_to_file()
 
     def save_settings_to_file(self):
@@ -124,32 +212,64 @@ class GestureRecognitionApp(QMainWindow):
             for gesture, command in self.ui.settings.gesture_commands.items():
                 file.write(f"{gesture}<=>{command}\n")
             file.write(f"countdown<=>{self.ui.settings.countdown}\n")
+            file.write(f"backend<=>{self.ui.settings.backend}\n")
+            file.write(f"command_timeout<=>{self.ui.settings.command_timeout}\n")
 
     def update_image(self, frame):
-        if frame is not None and frame.shape[0] > 0 and frame.shape[1] > 0:
-            rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            h, w, ch = rgb_image.shape
-            bytes_per_line = ch * w
-            qt_image = QImage(rgb_image.data, w, h, bytes_per_line, QImage.Format.Format_RGB888)
-            scaled_pixmap = QPixmap.fromImage(qt_image.scaled(640, 480, Qt.AspectRatioMode.KeepAspectRatio))
-            self.ui.camera_image.setPixmap(scaled_pixmap)
-        else:
-            print("Error: Frame is None or has invalid shape.")
-
-    def execute_command(self, command):
-        subprocess.run(command, shell=True)
+        self.presenter.present(frame)
+
+    def execute_command(self, gesture, command):
+        status = self.commands.submit(gesture, command)
+        if status != 'started':
+            self.command_message = f"'{command}' not started ({status})"
+
+    def command_finished(self, result):
+        """Report how a gesture command ended; runs on the GUI thread"""
+        self.command_message = result.summary()
+        print(f"Command {result.summary()}")
+        if result.stdout:
+            print(f"Command output: {result.stdout}")
+        if result.stderr:
+            print(f"Command error: {result.stderr}")
 
     def closeEvent(self, event):
 
         """Handle window close event"""
-        if self.cap.isOpened():
+        # Results of the loader that are still queued must not start the pipeline
+        self.closing = True
+        self.stats_timer.stop()
+        self.preview_timer.stop()
+        # A model that is still loading cannot be interrupted
+        self.loader.wait()
+        if self.worker is not None:
+            self.worker.stop()
+        if self.capture is not None:
+            self.capture.stop()
+        if self.cap is not None and self.cap.isOpened():
             self.cap.release()  # Release the camera
+        if self.trace_file is not None:
+            events = self.tracer.export_chrome(self.trace_file)
+            print(f"Wrote {events} trace events to {self.trace_file}")
         event.accept()
 
 def main():
-    app = QApplication(sys.argv)
-    window = GestureRecognitionApp()
+    parser = argparse.ArgumentParser(description="Gesture recognition with YOLO and PyQt6")
+    parser.add_argument('--source', default='0', help="camera index, video file, image directory or 'synthetic'")
+    parser.add_argument('--full-frame', action='store_true', help="always run YOLO on the whole frame, never on a crop around the hand")
+    parser.add_argument('--trace', default=None, metavar='FILE', help="write the recorded spans to FILE as a Chrome trace when the window closes")
+    parser.add_argument('--no-tracing', action='store_true', help="do not record stage timings")
+    parser.add_argument('--blocking-startup', action='store_true',
+                        help="load the model and open the source before showing the window, instead of in the background")
+    parser.add_argument('--startup-benchmark', action='store_true',
+                        help="print the startup milestones (window shown, first frame, first prediction) as JSON and quit")
+    args, qt_args = parser.parse_known_args()
+
+    app = QApplication(sys.argv[:1] + qt_args)
+    window = GestureRecognitionApp(args.source, roi=not args.full_frame, tracing=not args.no_tracing, trace_file=args.trace,
+                                   staged=not args.blocking_startup, startup_benchmark=args.startup_benchmark)
     window.show()
+    # Runs once the event loop has painted the window
+    QTimer.singleShot(0, lambda: window.milestone('window_shown'))
     sys.exit(app.exec())
 
 if __name__ == "__main__":
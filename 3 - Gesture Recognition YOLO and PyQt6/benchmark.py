@@ -0,0 +1,113 @@
+import sys
+import os
+
+# Add the src directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import json
+import time
+import argparse
+
+import numpy as np
+
+from sources import open_source
+from processing import FrameProcessor
+from settings import Settings
+from backends import BACKENDS, MODEL, load_model
+from tracing import Tracer
+
+
+def percentiles(values):
+    values = np.array(values) * 1000
+    return {
+        'mean_ms': float(values.mean()),
+        'p50_ms': float(np.percentile(values, 50)),
+        'p95_ms': float(np.percentile(values, 95)),
+        'p99_ms': float(np.percentile(values, 99)),
+    }
+
+
+def run(processor, source, frames, warmup=5):
+    """Feed `frames` frames of `source` through the processor; returns per-stage durations in seconds"""
+    stages = {'read': []}
+    totals = []
+    processed = 0
+    while processed < frames + warmup:
+        start = time.perf_counter()
+        ret, frame = source.read()
+        read = time.perf_counter() - start
+        if not ret:
+            break
+        processor.process(frame)
+        total = time.perf_counter() - start
+
+        processed += 1
+        if processed <= warmup:
+            continue
+        stages['read'].append(read)
+        for stage, duration in processor.timings.items():
+            stages.setdefault(stage, []).append(duration)
+        totals.append(total)
+    stages['total'] = totals
+    return stages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmark of the per-frame gesture processing")
+    parser.add_argument('--source', default='images', help="camera index, video file, image directory or 'synthetic'")
+    parser.add_argument('--model', default=MODEL, help="PyTorch weights, the exported models are found next to them")
+    parser.add_argument('--backend', choices=BACKENDS, default=None, help="inference backend, by default the one in settings.txt")
+    parser.add_argument('--frames', type=int, default=300, help="frames to time, after the warm-up")
+    parser.add_argument('--warmup', type=int, default=5, help="untimed frames run first")
+    parser.add_argument('--tracking', action='store_true', help="run YOLO only on some frames and track in between")
+    parser.add_argument('--roi', action='store_true', help="run YOLO on a crop around the last hand box when possible")
+    parser.add_argument('--roi-imgsz', type=int, default=320, help="YOLO input size for the crops")
+    parser.add_argument('--realtime', action='store_true', help="pace files and images to their frame rate")
+    parser.add_argument('--output', default=None, help="also write the JSON report to this file")
+    parser.add_argument('--trace', default=None, metavar='FILE', help="write the per-stage spans to FILE as a Chrome trace")
+    args = parser.parse_args()
+
+    settings = Settings()
+    settings.fill_settings("settings.txt")
+    backend = args.backend or settings.backend
+    model = load_model(backend, args.model)
+    tracer = Tracer(enabled=args.trace is not None)
+    processor = FrameProcessor(model, lambda: settings, tracking=args.tracking, roi=args.roi, roi_imgsz=args.roi_imgsz, tracer=tracer)
+
+    source = open_source(args.source, realtime=args.realtime)
+    if not source.isOpened():
+        sys.exit(f"Error: Could not open frame source {args.source}.")
+
+    start = time.perf_counter()
+    stages = run(processor, source, args.frames, args.warmup)
+    elapsed = time.perf_counter() - start
+    source.release()
+
+    frames = len(stages['total'])
+    report = {
+        'source': args.source,
+        'backend': backend,
+        'tracking': args.tracking,
+        'roi': args.roi,
+        'frames': frames,
+        'fps': frames / sum(stages['total']) if frames else 0.0,
+        'wall_fps': (frames + args.warmup) / elapsed,
+        'stages': {stage: percentiles(durations) for stage, durations in stages.items() if durations},
+    }
+    if processor.tracker is not None:
+        report['scheduler'] = processor.tracker.stats()
+    if processor.roi is not None:
+        report['roi_stats'] = processor.roi.stats()
+
+    if args.trace:
+        tracer.export_chrome(args.trace)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
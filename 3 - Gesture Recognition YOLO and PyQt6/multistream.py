@@ -0,0 +1,134 @@
+import sys
+import os
+
+# Add the src directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+import json
+import time
+import argparse
+import subprocess
+
+from sources import open_source
+from settings import Settings
+from backends import BACKENDS, MODEL, load_model, rss_mb
+from commands import CommandExecutor
+from streams import MultiStreamWorker, VideoStream
+
+
+def load_settings(path):
+    settings = Settings()
+    settings.fill_settings(path)
+    return settings
+
+
+def run_streams(args):
+    """Watch all sources with one batched model; returns the report of the measured period"""
+    settings_files = args.settings or ["settings.txt"]
+    streams = []
+    for i, spec in enumerate(args.source):
+        source = open_source(spec, realtime=not args.unpaced)
+        if not source.isOpened():
+            sys.exit(f"Error: Could not open frame source {spec}.")
+        # Streams without their own settings file use the last one given
+        settings = load_settings(settings_files[min(i, len(settings_files) - 1)])
+        streams.append(VideoStream(f"{i}:{spec}", source, settings, on_demand=args.unpaced))
+
+    model = load_model(args.backend or streams[0].settings.backend, args.model)
+    commands = CommandExecutor(max_concurrent=max(2, len(streams)),
+                               on_finished=lambda result: print(f"[{result.gesture}] Command {result.summary()}"))
+
+    def on_result(stream, result):
+        if result.command is not None:
+            # Debounced per stream, the same gesture may trigger on two stations at once
+            commands.submit(f"{stream.name} {result.prediction}", result.command,
+                            timeout=stream.settings.command_timeout or None)
+
+    worker = MultiStreamWorker(model, streams, on_result)
+    worker.start_all()
+    start = time.perf_counter()
+    processed = dropped = [0] * len(streams)
+    try:
+        # The first batch includes the model warm-up, it is not measured
+        while any(stream.stats.total == 0 for stream in streams):
+            time.sleep(0.01)
+        start = time.perf_counter()
+        processed = [stream.stats.total for stream in streams]
+        dropped = [stream.stats.dropped for stream in streams]
+        next_report = start + args.report_every
+        while args.duration == 0 or time.perf_counter() - start < args.duration:
+            time.sleep(0.05)
+            if not args.json and time.perf_counter() >= next_report:
+                next_report += args.report_every
+                stats = worker.stats()
+                print(f"{stats['fps']:.1f} FPS total, batch of {stats['mean_batch_size']:.1f} in {stats['batch_latency_ms']:.0f} ms | " +
+                      " | ".join(f"{s['name']}: {s['fps']:.1f} FPS, {s['dropped']} dropped, {s['prediction']}" for s in stats['streams']))
+    except KeyboardInterrupt:
+        pass
+    elapsed = time.perf_counter() - start
+    worker.stop()
+
+    stats = worker.stats()
+    for stream, s, before, dropped_before in zip(streams, stats['streams'], processed, dropped):
+        s['fps'] = (stream.stats.total - before) / elapsed
+        s['dropped'] = stream.stats.dropped - dropped_before
+    stats['fps'] = sum(s['fps'] for s in stats['streams'])
+    stats['rss_mb'] = rss_mb()
+    return stats
+
+
+def run_separate(args):
+    """Run every source in its own process at the same time, as N copies of the single-stream app would"""
+    command = [sys.executable, os.path.abspath(__file__), '--json', '--duration', str(args.duration), '--model', args.model]
+    if args.backend:
+        command += ['--backend', args.backend]
+    if args.unpaced:
+        command.append('--unpaced')
+    settings_files = args.settings or ["settings.txt"]
+    processes = [subprocess.Popen(command + ['--source', spec, '--settings', settings_files[min(i, len(settings_files) - 1)]],
+                                  stdout=subprocess.PIPE, text=True)
+                 for i, spec in enumerate(args.source)]
+    reports = [json.loads(process.communicate()[0].strip().splitlines()[-1]) for process in processes]
+    return {
+        'fps': sum(report['fps'] for report in reports),
+        'rss_mb': sum(report['rss_mb'] for report in reports),
+        'streams': [report['streams'][0] for report in reports],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gesture recognition on several frame sources with one batched model")
+    parser.add_argument('--source', action='append', required=True,
+                        help="camera index, video file, image directory or 'synthetic'; repeat for every stream")
+    parser.add_argument('--settings', action='append', default=None,
+                        help="settings file of each stream, in --source order (default settings.txt)")
+    parser.add_argument('--backend', choices=BACKENDS, default=None, help="inference backend, by default the one of the first settings file")
+    parser.add_argument('--model', default=MODEL)
+    parser.add_argument('--duration', type=float, default=0, help="seconds to run, 0 until Ctrl+C")
+    parser.add_argument('--report-every', type=float, default=2.0, help="seconds between status lines")
+    parser.add_argument('--unpaced', action='store_true',
+                        help="read files and images as fast as they are processed instead of at their frame rate (to measure throughput)")
+    parser.add_argument('--compare', action='store_true', help="then run every source in a separate process for comparison")
+    parser.add_argument('--json', action='store_true', help="only print the final report, as JSON")
+    args = parser.parse_args()
+    if args.compare and args.duration <= 0:
+        # The separate processes are given the same duration, and would otherwise never stop
+        parser.error("--compare needs a --duration greater than 0")
+
+    report = run_streams(args)
+    if args.json:
+        print(json.dumps(report))
+        return
+
+    print(json.dumps(report, indent=2))
+    if args.compare:
+        separate = run_separate(args)
+        print(f"One batched process: {report['fps']:.1f} FPS total, {report['rss_mb']:.0f} MB")
+        print(f"{len(args.source)} separate processes: {separate['fps']:.1f} FPS total, {separate['rss_mb']:.0f} MB")
+        for batched, alone in zip(report['streams'], separate['streams']):
+            print(f"  {batched['name']}: {batched['fps']:.1f} FPS batched ({batched['dropped']} dropped), "
+                  f"{alone['fps']:.1f} FPS alone ({alone['dropped']} dropped)")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,8 @@ import os
 from PyQt6 import QtCore, QtGui, QtWidgets
 from settings import Settings, SettingsDialog
 from info import InfoDialog
+from assets import GestureAssets
+from pipeline import StageCounter
 
 # GLOBALS
 FILE = "settings.txt"
@@ -102,6 +104,16 @@ class GestureRecognitionUI(object):
         self.settings = Settings()
         self.settings.fill_settings(FILE)
 
+        # Gesture images are loaded and scaled to the label once, and the gesture,
+        # command and progress widgets are only touched when what they show changes
+        self.assets = GestureAssets(self.gesture_image.size())
+        self.gesture_image.setScaledContents(False)
+        self.displayed_gesture = ()
+        self.displayed_command = None
+        self.displayed_progress = None
+        self.widget_updates = StageCounter()
+        self.skipped_updates = StageCounter()
+
     def show_info_dialog(self):
         dialog = InfoDialog()
         dialog.exec()
@@ -120,6 +132,8 @@ class GestureRecognitionUI(object):
             for gesture, command in self.settings.gesture_commands.items():
                 file.write(f"{gesture}<=>{command}\n")
             file.write(f"countdown<=>{self.settings.countdown}\n")
+            file.write(f"backend<=>{self.settings.backend}\n")
+            file.write(f"command_timeout<=>{self.settings.command_timeout}\n")
 
     def retranslateUi(self, MainWindow):
         _translate = QtCore.QCoreApplication.translate
@@ -133,14 +147,30 @@ class GestureRecognitionUI(object):
 
     def display_gesture(self, gesture):
         # Display gesture image
-        pixmap = QtGui.QPixmap(f"images/{gesture}.jpg")
-        self.gesture_image.setPixmap(pixmap)
-        self.gesture_image.setScaledContents(True)
+        if gesture == self.displayed_gesture:
+            self.skipped_updates.tick()
+            return
+        self.displayed_gesture = gesture
+        self.gesture_image.setPixmap(self.assets.get(gesture))
+        self.widget_updates.tick()
+
+    def display_command(self, text):
+        if text == self.displayed_command:
+            self.skipped_updates.tick()
+            return
+        self.displayed_command = text
+        self.command_text.setText(text)
+        self.widget_updates.tick()
 
     def update_progress_bar(self, remaining_time, total_time):
         # Update progress bar
         value = int((total_time - remaining_time) / total_time * 100)
+        if value == self.displayed_progress:
+            self.skipped_updates.tick()
+            return
+        self.displayed_progress = value
         self.progress_bar.setValue(value)
+        self.widget_updates.tick()
 
     def update_image(self, image):
         # Update camera image
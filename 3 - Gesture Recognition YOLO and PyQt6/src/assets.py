@@ -0,0 +1,31 @@
+# assets.py
+import os
+
+from PyQt6 import QtCore, QtGui
+
+IMAGES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'images')
+GESTURES = ["Thumb", "Zero", "One", "Two", "Three", "Four", "Five", "Horns", "Fist", "C"]
+
+
+class GestureAssets:
+    """Gesture images loaded once and scaled to the size of the label that shows them.
+
+    Needs a QApplication, like any QPixmap. Gestures without an image (and
+    None, i.e. no gesture) get an empty pixmap.
+    """
+
+    def __init__(self, size, directory=IMAGES_DIR, gestures=GESTURES):
+        self.size = size
+        self.empty = QtGui.QPixmap()
+        self.pixmaps = {}
+        for gesture in gestures:
+            pixmap = QtGui.QPixmap(os.path.join(directory, f"{gesture}.jpg"))
+            if not pixmap.isNull():
+                self.pixmaps[gesture] = pixmap.scaled(
+                    size,
+                    QtCore.Qt.AspectRatioMode.IgnoreAspectRatio,
+                    QtCore.Qt.TransformationMode.SmoothTransformation
+                )
+
+    def get(self, gesture):
+        return self.pixmaps.get(gesture, self.empty)
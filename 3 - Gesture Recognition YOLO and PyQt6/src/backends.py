@@ -0,0 +1,427 @@
+# backends.py
+import os
+import ast
+import sys
+import glob
+import json
+import time
+import shutil
+
+import cv2
+import numpy as np
+
+MODEL = "model/yolov8_transfer_learning_v3.pt"
+# Set with a "backend<=>..." line in settings.txt
+BACKENDS = ('pytorch', 'onnx', 'onnx-int8', 'openvino', 'openvino-int8')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+def parse_backend(backend):
+    """Runtime name and INT8 flag of a backend name, e.g. 'onnx-int8' -> ('onnx', True)"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend}, expected one of {', '.join(BACKENDS)}")
+    runtime, _, precision = backend.partition('-')
+    return runtime, precision == 'int8'
+
+
+def exported_path(weights, backend):
+    """Where the model exported for `backend` is stored, next to the PyTorch weights (ultralytics naming)"""
+    runtime, int8 = parse_backend(backend)
+    stem = os.path.splitext(weights)[0] + ('_int8' if int8 else '')
+    if runtime == 'pytorch':
+        return weights
+    if runtime == 'onnx':
+        return stem + '.onnx'
+    return stem + '_openvino_model'
+
+
+def load_model(backend='pytorch', weights=MODEL):
+    """Gesture model for `backend`, called like an ultralytics YOLO model: model(image, imgsz=None) -> [result].
+
+    Only the PyTorch backend imports ultralytics (and PyTorch); the exported
+    models run on onnxruntime or OpenVINO alone.
+    """
+    runtime, _ = parse_backend(backend)
+    if runtime == 'pytorch':
+        from ultralytics import YOLO
+        return YOLO(weights)
+
+    path = exported_path(weights, backend)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} not found, export it first with: python src/backends.py export --backend {backend}")
+    if runtime == 'onnx':
+        return OnnxModel(path)
+    return OpenVinoModel(path)
+
+
+class Boxes:
+    """The part of ultralytics' Boxes used by best_detection: xyxy, conf and cls arrays"""
+
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy = xyxy
+        self.conf = conf
+        self.cls = cls
+
+    def __len__(self):
+        return len(self.conf)
+
+
+class Result:
+    def __init__(self, image, boxes, names):
+        self.orig_img = image
+        self.boxes = boxes
+        self.names = names
+
+    def plot(self):
+        """Copy of the image with the boxes drawn, like ultralytics' Results.plot()"""
+        image = self.orig_img.copy()
+        for (x1, y1, x2, y2), conf, cls in zip(self.boxes.xyxy.astype(int), self.boxes.conf, self.boxes.cls):
+            cv2.rectangle(image, (x1, y1), (x2, y2), (255, 0, 0), 2)
+            cv2.putText(image, f'{self.names[int(cls)]} {conf:.2f}', (x1, max(y1 - 5, 10)), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
+        return image
+
+
+def letterbox(image, size, square=True, stride=32):
+    """Resize keeping the aspect ratio and pad with gray (114) like ultralytics.
+
+    With `square` the image is padded to size x size, otherwise only to a
+    multiple of `stride` (for models exported with dynamic input shapes).
+    Returns the NCHW float32 RGB blob, the scale and the (left, top) padding.
+    """
+    h, w = image.shape[:2]
+    scale = min(size / h, size / w)
+    new_w, new_h = int(round(w * scale)), int(round(h * scale))
+    if square:
+        out_w, out_h = size, size
+    else:
+        out_w, out_h = -(-new_w // stride) * stride, -(-new_h // stride) * stride
+    left, top = (out_w - new_w) // 2, (out_h - new_h) // 2
+
+    padded = np.full((out_h, out_w, 3), 114, dtype=np.uint8)
+    padded[top:top + new_h, left:left + new_w] = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    blob = cv2.dnn.blobFromImage(padded, 1 / 255, swapRB=True)
+    return blob, scale, (left, top)
+
+
+class ExportedModel:
+    """A YOLOv8 detection model exported from ultralytics, run without PyTorch.
+
+    Does the same preprocessing (letterbox, RGB, 0-1 scaling) and
+    postprocessing (confidence filter, per-class NMS) as ultralytics' predict,
+    with its default `conf` and `iou`. `imgsz` is the input size used when the
+    caller does not pass one; static models always use their own size. Like
+    ultralytics, a list of images is run as one batch and gives one result
+    per image (one forward pass per image if the batch size was fixed at
+    export).
+    """
+
+    def __init__(self, names, input_shape, conf=0.25, iou=0.7, max_det=300):
+        self.names = names
+        batch, _, height, width = input_shape
+        self.static_size = height if isinstance(height, int) and isinstance(width, int) else None
+        self.batched = not isinstance(batch, int)
+        self.imgsz = self.static_size or 640
+        self.conf = conf
+        self.iou = iou
+        self.max_det = max_det
+
+    def __call__(self, image, imgsz=None, **kwargs):
+        images = image if isinstance(image, list) else [image]
+        size = self.static_size or imgsz or self.imgsz
+        inputs = [letterbox(image, size, square=self.static_size is not None) for image in images]
+        blobs = [blob for blob, _, _ in inputs]
+        if self.batched and len({blob.shape for blob in blobs}) == 1:
+            outputs = self.forward(np.concatenate(blobs))
+        else:
+            # Letterboxed images of different shapes cannot be stacked: keep one output per image
+            outputs = [self.forward(blob)[0] for blob in blobs]
+        return [self.postprocess(image, output.T, scale, padding)
+                for image, output, (_, scale, padding) in zip(images, outputs, inputs)]
+
+    def postprocess(self, image, predictions, scale, padding):
+        left, top = padding
+        scores = predictions[:, 4:]
+        cls = scores.argmax(axis=1)
+        conf = scores[np.arange(len(scores)), cls]
+        keep = conf > self.conf
+        predictions, cls, conf = predictions[keep], cls[keep], conf[keep]
+
+        # Boxes from (cx, cy, w, h) in the letterboxed input to (x1, y1, x2, y2) in the image
+        cx, cy, w, h = predictions[:, 0], predictions[:, 1], predictions[:, 2], predictions[:, 3]
+        xyxy = np.stack([cx - w / 2 - left, cy - h / 2 - top, cx + w / 2 - left, cy + h / 2 - top], axis=1) / scale
+        height, width = image.shape[:2]
+        xyxy = np.clip(xyxy, 0, [width, height, width, height]).astype(np.float32)
+
+        if len(conf):
+            # Offsetting boxes by class keeps NMS from suppressing boxes of different classes
+            offset = (cls * 4096)[:, None]
+            rects = np.concatenate([xyxy[:, :2] + offset, xyxy[:, 2:] - xyxy[:, :2]], axis=1)
+            indices = np.array(cv2.dnn.NMSBoxes(rects.tolist(), conf.tolist(), self.conf, self.iou), dtype=int).reshape(-1)
+            indices = indices[np.argsort(-conf[indices])][:self.max_det]
+            xyxy, conf, cls = xyxy[indices], conf[indices], cls[indices]
+        return Result(image, Boxes(xyxy, conf.astype(np.float32), cls.astype(np.float32)), self.names)
+
+    def forward(self, blob):
+        raise NotImplementedError
+
+
+class OnnxModel(ExportedModel):
+    def __init__(self, path):
+        import onnxruntime
+
+        self.session = onnxruntime.InferenceSession(path, providers=['CPUExecutionProvider'])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        # ultralytics stores the class names in the ONNX metadata as a dict literal
+        names = ast.literal_eval(self.session.get_modelmeta().custom_metadata_map['names'])
+        super().__init__(names, model_input.shape)
+
+    def forward(self, blob):
+        return self.session.run(None, {self.input_name: blob})[0]
+
+
+class OpenVinoModel(ExportedModel):
+    def __init__(self, path):
+        import yaml
+        import openvino
+
+        core = openvino.Core()
+        model = core.read_model(openvino_xml(path))
+        self.compiled = core.compile_model(model, 'CPU')
+        with open(os.path.join(path, 'metadata.yaml')) as f:
+            names = yaml.safe_load(f)['names']
+        shape = model.input(0).get_partial_shape()
+        super().__init__(names, [dim.get_length() if dim.is_static else None for dim in shape])
+
+    def forward(self, blob):
+        return self.compiled(blob)[0]
+
+
+def openvino_xml(path):
+    return glob.glob(os.path.join(path, '*.xml'))[0]
+
+
+def calibration_blobs(source, samples=300, imgsz=640):
+    """Preprocessed frames of a frame source (see sources.open_source) to calibrate INT8 models with"""
+    from sources import open_source
+    from processing import FRAME_SIZE
+
+    frames = open_source(source, realtime=False)
+    blobs = []
+    while len(blobs) < samples:
+        ret, frame = frames.read()
+        if not ret:
+            break
+        # Same 640x480 frames the app feeds to the model
+        blobs.append(letterbox(cv2.resize(frame, FRAME_SIZE), imgsz)[0])
+    frames.release()
+    if not blobs:
+        raise ValueError(f"No calibration frames could be read from {source}")
+    return blobs
+
+
+def export_model(backend, weights=MODEL, calibration='images', samples=300, imgsz=640):
+    """Export the PyTorch model for `backend` and return the exported path.
+
+    The float model is exported by ultralytics with dynamic input shapes, so
+    the ROI crops can run at a smaller size. INT8 models are then quantized
+    from it with static activation ranges measured on frames of
+    `calibration` (a frame source, e.g. a directory of recorded frames).
+    """
+    runtime, int8 = parse_backend(backend)
+    if runtime == 'pytorch':
+        return weights
+
+    float_path = exported_path(weights, runtime)
+    if not os.path.exists(float_path):
+        from ultralytics import YOLO
+        YOLO(weights).export(format=runtime, imgsz=imgsz, dynamic=True)
+    if not int8:
+        return float_path
+
+    path = exported_path(weights, backend)
+    blobs = calibration_blobs(calibration, samples, imgsz)
+    if runtime == 'onnx':
+        quantize_onnx(float_path, path, blobs)
+    else:
+        quantize_openvino(float_path, path, blobs)
+    return path
+
+
+def quantize_onnx(float_path, path, blobs):
+    import onnx
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+
+    class FrameReader(CalibrationDataReader):
+        def __init__(self, input_name):
+            self.inputs = iter({input_name: blob} for blob in blobs)
+
+        def get_next(self):
+            return next(self.inputs, None)
+
+    float_model = onnx.load(float_path)
+    quantize_static(float_path, path, FrameReader(float_model.graph.input[0].name),
+                    quant_format=QuantFormat.QDQ, per_channel=True,
+                    activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+
+    # Keep the class names and the rest of the ultralytics metadata
+    model = onnx.load(path)
+    onnx.helper.set_model_props(model, {prop.key: prop.value for prop in float_model.metadata_props})
+    onnx.save(model, path)
+
+
+def quantize_openvino(float_path, path, blobs):
+    import nncf
+    import openvino
+
+    model = openvino.Core().read_model(openvino_xml(float_path))
+    # The box decoding at the end of the head loses too much precision in INT8 (ultralytics does the same)
+    ignored = nncf.IgnoredScope(types=["Multiply", "Subtract", "Sigmoid"])
+    quantized = nncf.quantize(model, nncf.Dataset(blobs), preset=nncf.QuantizationPreset.MIXED,
+                              subset_size=len(blobs), ignored_scope=ignored)
+    os.makedirs(path, exist_ok=True)
+    openvino.save_model(quantized, os.path.join(path, os.path.basename(openvino_xml(float_path))))
+    shutil.copy(os.path.join(float_path, 'metadata.yaml'), path)
+
+
+def labelled_frames(path):
+    """(image path, gesture) pairs of a labelled frame set.
+
+    Images are labelled by the directory they are in (e.g. frames/Fist/001.jpg);
+    images directly in `path` by their file name up to the first '_' (so the
+    bundled images/ directory works as is). A 'none' directory holds frames
+    without any gesture.
+    """
+    pairs = []
+    for file in sorted(glob.glob(os.path.join(path, '**', '*'), recursive=True)):
+        if not file.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        directory = os.path.relpath(os.path.dirname(file), path)
+        label = os.path.splitext(os.path.basename(file))[0].split('_')[0] if directory == '.' else directory.split(os.sep)[0]
+        pairs.append((file, None if label.lower() == 'none' else label))
+    return pairs
+
+
+def rss_mb():
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def measure(backend, weights, frames, runs, sizes, threshold):
+    """Load time, memory, latency and predictions of one backend, in a fresh process"""
+    from detection import best_detection
+    from processing import FRAME_SIZE
+
+    start = time.perf_counter()
+    model = load_model(backend, weights)
+    load_s = time.perf_counter() - start
+    loaded_rss = rss_mb()
+
+    images = [cv2.resize(cv2.imread(file), FRAME_SIZE) for file, _ in frames]
+    predictions = []
+    for image in images:
+        detection = best_detection(model(image)[0], threshold)
+        predictions.append(detection.label if detection is not None else None)
+
+    latency = {}
+    for size in sizes:
+        durations = []
+        for i in range(runs):
+            image = images[i % len(images)]
+            start = time.perf_counter()
+            model(image, imgsz=size)
+            durations.append(time.perf_counter() - start)
+        durations = np.array(durations) * 1000
+        latency[str(size)] = {'p50_ms': float(np.percentile(durations, 50)), 'p95_ms': float(np.percentile(durations, 95))}
+
+    return {
+        'backend': backend,
+        'load_s': load_s,
+        'loaded_rss_mb': loaded_rss,
+        'rss_mb': rss_mb(),
+        'latency': latency,
+        'predictions': predictions,
+    }
+
+
+def compare(args):
+    """Run `measure` for every backend in its own process and report them side by side"""
+    import subprocess
+
+    frames = labelled_frames(args.frames)
+    if not frames:
+        sys.exit(f"No images found in {args.frames}")
+    labels = [label for _, label in frames]
+
+    reports = []
+    for backend in args.backends:
+        command = [sys.executable, os.path.abspath(__file__), 'measure', '--backend', backend, '--weights', args.weights,
+                   '--frames', args.frames, '--runs', str(args.runs), '--threshold', str(args.threshold),
+                   '--imgsz', *map(str, args.imgsz)]
+        process = subprocess.run(command, capture_output=True, text=True)
+        if process.returncode != 0:
+            print(f"{backend}: failed\n{process.stderr.strip()}", file=sys.stderr)
+            continue
+        report = json.loads(process.stdout.strip().splitlines()[-1])
+        predictions = report.pop('predictions')
+        report['accuracy'] = float(np.mean([p == label for p, label in zip(predictions, labels)]))
+        if reports:
+            # Agreement with the first backend, the reference the others are checked against
+            report['agreement'] = float(np.mean([p == r for p, r in zip(predictions, reports[0]['_predictions'])]))
+        report['_predictions'] = predictions
+        reports.append(report)
+
+    for report in reports:
+        report.pop('_predictions')
+    print(f"{'backend':<15}{'load s':>8}{'RSS MB':>9}" + ''.join(f"{f'p50@{s} ms':>13}" for s in args.imgsz) + f"{'accuracy':>10}{'agreement':>11}")
+    for report in reports:
+        row = f"{report['backend']:<15}{report['load_s']:>8.2f}{report['rss_mb']:>9.0f}"
+        row += ''.join(f"{report['latency'][str(s)]['p50_ms']:>13.1f}" for s in args.imgsz)
+        row += f"{report['accuracy']:>10.1%}" + (f"{report['agreement']:>11.1%}" if 'agreement' in report else f"{'-':>11}")
+        print(row)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'frames': args.frames, 'labelled_frames': len(frames), 'backends': reports}, f, indent=2)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+    parser = argparse.ArgumentParser(description="Export the gesture model to other runtimes and compare them")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help="export the PyTorch model for a backend")
+    export_parser.add_argument('--backend', choices=BACKENDS[1:], required=True)
+    export_parser.add_argument('--weights', default=MODEL)
+    export_parser.add_argument('--calibration', default='images', help="frame source with calibration frames for INT8 (see --source of app.py)")
+    export_parser.add_argument('--samples', type=int, default=300, help="number of calibration frames")
+    export_parser.add_argument('--imgsz', type=int, default=640)
+
+    for name, help_text in (('compare', "compare load time, memory, latency and accuracy of backends"),
+                            ('measure', "measure one backend (used by compare, prints JSON)")):
+        command_parser = subparsers.add_parser(name, help=help_text)
+        if name == 'compare':
+            command_parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=['pytorch', 'onnx', 'onnx-int8'],
+                                        help="the first one is the reference for the agreement column")
+            command_parser.add_argument('--output', default=None, help="also write the report to this JSON file")
+        else:
+            command_parser.add_argument('--backend', choices=BACKENDS, required=True)
+        command_parser.add_argument('--weights', default=MODEL)
+        command_parser.add_argument('--frames', default='images', help="labelled frame set (see labelled_frames)")
+        command_parser.add_argument('--runs', type=int, default=100, help="timed inferences per input size")
+        command_parser.add_argument('--imgsz', type=int, nargs='+', default=[640, 320], help="input sizes to time (320 is the ROI size)")
+        command_parser.add_argument('--threshold', type=float, default=0.55)
+
+    args = parser.parse_args()
+    if args.command == 'export':
+        print(export_model(args.backend, args.weights, args.calibration, args.samples, args.imgsz))
+    elif args.command == 'measure':
+        report = measure(args.backend, args.weights, labelled_frames(args.frames), args.runs, args.imgsz, args.threshold)
+        print(json.dumps(report))
+    else:
+        compare(args)
@@ -0,0 +1,145 @@
+# commands.py
+import os
+import signal
+import tempfile
+import threading
+import subprocess
+import time
+
+from PyQt6 import QtCore
+
+from tracing import Tracer
+
+# Characters of stdout/stderr kept in a CommandResult
+MAX_OUTPUT = 4000
+
+# Timeout argument of CommandExecutor.submit meaning the executor's own `timeout`
+DEFAULT = object()
+
+
+class CommandResult:
+    """How a gesture command ended: `status` is 'finished', 'timeout' or 'error' (it could not be started)"""
+
+    def __init__(self, gesture, command, status, returncode=None, stdout='', stderr='', duration=0.0):
+        self.gesture = gesture
+        self.command = command
+        self.status = status
+        self.returncode = returncode
+        self.stdout = stdout[-MAX_OUTPUT:]
+        self.stderr = stderr[-MAX_OUTPUT:]
+        self.duration = duration
+
+    def summary(self):
+        command = self.command if len(self.command) <= 25 else self.command[:25] + "..."
+        if self.status == 'timeout':
+            return f"'{command}' killed after {self.duration:.0f} s timeout"
+        if self.status == 'error':
+            return f"'{command}' could not be started: {self.stderr}"
+        return f"'{command}' exited with {self.returncode} in {self.duration:.1f} s"
+
+
+class CommandExecutor:
+    """Runs gesture commands in background threads, so the caller never waits for them.
+
+    At most `max_concurrent` commands run at once, each for at most `timeout`
+    seconds (None for no limit) after which its whole process group is killed.
+    A gesture triggered again less than `debounce` seconds after it started a
+    command, or while that command is still running, is ignored. `on_finished`
+    is called with a CommandResult from the command's thread. Every command
+    is recorded as a 'command' span in `tracer`.
+    """
+
+    def __init__(self, max_concurrent=2, timeout=60, debounce=5.0, on_finished=None, clock=time.monotonic, tracer=None):
+        self.max_concurrent = max_concurrent
+        self.timeout = timeout
+        self.debounce = debounce
+        self.on_finished = on_finished
+        self.clock = clock
+        self.tracer = tracer or Tracer(enabled=False)
+
+        self.lock = threading.Lock()
+        self.running = {}
+        self.last_started = {}
+        self.counts = {'started': 0, 'finished': 0, 'failed': 0, 'timeout': 0, 'rejected': 0}
+
+    def submit(self, gesture, command, timeout=DEFAULT):
+        """Start `command` for `gesture`; returns 'started', 'debounced', 'running' or 'busy' (too many running).
+
+        `timeout` overrides the executor's timeout for this command only (None for no limit).
+        """
+        if timeout is DEFAULT:
+            timeout = self.timeout
+        now = self.clock()
+        with self.lock:
+            if gesture in self.running:
+                status = 'running'
+            elif now - self.last_started.get(gesture, -float('inf')) < self.debounce:
+                status = 'debounced'
+            elif len(self.running) >= self.max_concurrent:
+                status = 'busy'
+            else:
+                status = 'started'
+                thread = threading.Thread(target=self.run, args=(gesture, command, timeout), name="command", daemon=True)
+                self.running[gesture] = thread
+                self.last_started[gesture] = now
+                self.counts['started'] += 1
+            if status != 'started':
+                self.counts['rejected'] += 1
+        if status == 'started':
+            thread.start()
+        return status
+
+    def run(self, gesture, command, timeout):
+        start = time.perf_counter()
+        # Output goes to files rather than pipes: programs the command leaves running
+        # in the background (a browser started by xdg-open) keep them open
+        with tempfile.TemporaryFile() as stdout, tempfile.TemporaryFile() as stderr:
+            try:
+                # In its own session, so a timeout also kills what the shell started
+                process = subprocess.Popen(command, shell=True, stdout=stdout, stderr=stderr, start_new_session=True)
+                try:
+                    process.wait(timeout=timeout)
+                    status = 'finished'
+                except subprocess.TimeoutExpired:
+                    kill(process)
+                    process.wait()
+                    status = 'timeout'
+                result = CommandResult(gesture, command, status, process.returncode, read(stdout), read(stderr),
+                                       time.perf_counter() - start)
+            except OSError as e:
+                result = CommandResult(gesture, command, 'error', stderr=str(e), duration=time.perf_counter() - start)
+        self.tracer.record('command', start, time.perf_counter())
+
+        with self.lock:
+            del self.running[gesture]
+            self.counts['finished'] += 1
+            if result.status == 'timeout':
+                self.counts['timeout'] += 1
+            elif result.status == 'error' or result.returncode != 0:
+                self.counts['failed'] += 1
+        if self.on_finished is not None:
+            self.on_finished(result)
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counts, running=len(self.running))
+
+
+def read(file):
+    file.seek(0)
+    return file.read().decode(errors='replace')
+
+
+def kill(process):
+    if hasattr(os, 'killpg'):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    else:
+        process.kill()
+
+
+class CommandSignals(QtCore.QObject):
+    """Delivers CommandResults to the GUI thread: pass `finished.emit` as the executor's `on_finished`"""
+    finished = QtCore.pyqtSignal(object)
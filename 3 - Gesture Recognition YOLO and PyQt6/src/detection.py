@@ -0,0 +1,91 @@
+# detection.py
+import time
+
+CONFIDENCE_THRESHOLD = 0.55
+
+
+class Detection:
+    """Best gesture box of a frame: class name, confidence and (x1, y1, x2, y2) box"""
+
+    def __init__(self, label, confidence, box, tracked=False):
+        self.label = label
+        self.confidence = confidence
+        self.box = box
+        # True when the box was followed by the tracker rather than detected
+        self.tracked = tracked
+
+    def moved_to(self, box):
+        return Detection(self.label, self.confidence, box, tracked=True)
+
+
+def best_detection(result, threshold=CONFIDENCE_THRESHOLD):
+    """Highest confidence box of a YOLO result, or None if there is none above `threshold`.
+
+    Works on the whole `boxes.conf` tensor at once: one argmax and a single
+    transfer of the chosen box, instead of converting every confidence to a
+    Python float.
+    """
+    boxes = result.boxes
+    if len(boxes) == 0:
+        return None
+
+    index = int(boxes.conf.argmax())
+    confidence = float(boxes.conf[index])
+    if confidence <= threshold:
+        return None
+    return Detection(result.names[int(boxes.cls[index])], confidence, boxes.xyxy[index].tolist())
+
+
+class GestureState:
+    def __init__(self, prediction, countdown_remaining=None, triggered=False):
+        self.prediction = prediction
+        # Whole seconds left before the gesture triggers, None when no countdown is active
+        self.countdown_remaining = countdown_remaining
+        # True on the update where the countdown reached zero
+        self.triggered = triggered
+
+
+class GestureStateMachine:
+    """Stability and countdown logic shared by app.py and test.py.
+
+    A prediction that stays the same for `hold_time` seconds starts a countdown
+    of `countdown` seconds; when it reaches zero the gesture is triggered. Any
+    change of prediction resets both. `clock` returns the current time in
+    seconds, so the logic can be replayed on recorded predictions.
+    """
+
+    def __init__(self, countdown=3, hold_time=1, clock=time.time):
+        self.countdown = countdown
+        self.hold_time = hold_time
+        self.clock = clock
+
+        self.last_prediction = None
+        self.prediction_start_time = None
+        self.countdown_started = False
+        self.countdown_end_time = 0
+
+    def update(self, prediction, countdown=None):
+        """Feed the prediction of one frame; `countdown` overrides the countdown length (e.g. after a settings change)"""
+        now = self.clock()
+        if countdown is not None:
+            self.countdown = countdown
+
+        if prediction == self.last_prediction:
+            if self.prediction_start_time is None:
+                self.prediction_start_time = now
+            elif now - self.prediction_start_time >= self.hold_time and not self.countdown_started:
+                self.countdown_started = True
+                self.countdown_end_time = now + self.countdown
+        else:
+            self.last_prediction = prediction
+            self.prediction_start_time = None
+            self.countdown_started = False
+
+        if not self.countdown_started:
+            return GestureState(prediction)
+
+        remaining_time = max(0, int(self.countdown_end_time - now))
+        if remaining_time == 0:
+            self.countdown_started = False
+            return GestureState(prediction, 0, triggered=True)
+        return GestureState(prediction, remaining_time)
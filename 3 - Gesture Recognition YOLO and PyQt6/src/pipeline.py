@@ -0,0 +1,155 @@
+# pipeline.py
+import time
+import threading
+from collections import deque
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from tracing import Tracer
+
+
+class StageCounter:
+    """Rolling FPS and latency of one pipeline stage"""
+
+    def __init__(self, window=2.0, history=100):
+        self.window = window
+        self.timestamps = deque()
+        self.latencies = deque(maxlen=history)
+        self.total = 0
+        self.dropped = 0
+        self.lock = threading.Lock()
+
+    def tick(self, latency=None, dropped=0):
+        now = time.perf_counter()
+        with self.lock:
+            self.total += 1
+            self.dropped += dropped
+            self.timestamps.append(now)
+            while self.timestamps[0] < now - self.window:
+                self.timestamps.popleft()
+            if latency is not None:
+                self.latencies.append(latency)
+
+    def fps(self):
+        with self.lock:
+            now = time.perf_counter()
+            while self.timestamps and self.timestamps[0] < now - self.window:
+                self.timestamps.popleft()
+            return len(self.timestamps) / self.window
+
+    def latency_ms(self):
+        with self.lock:
+            if not self.latencies:
+                return 0.0
+            return sum(self.latencies) / len(self.latencies) * 1000
+
+
+class LatestFrame:
+    """Single-slot frame buffer: the writer overwrites, a reader only ever gets the newest frame"""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.frame = None
+        self.index = 0
+        self.taken = 0
+        self.timestamp = None
+        self.closed = False
+
+    def put(self, frame):
+        with self.condition:
+            self.frame = frame
+            self.index += 1
+            self.timestamp = time.perf_counter()
+            self.condition.notify_all()
+
+    def get(self, after=0, timeout=None):
+        """Wait for a frame newer than index `after`; returns (index, frame, timestamp) or None"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.index > after or self.closed, timeout)
+            if self.index <= after:
+                return None
+            self.taken = self.index
+            self.condition.notify_all()
+            return self.index, self.frame, self.timestamp
+
+    def wait_taken(self, timeout=None):
+        """Wait until the current frame was read by a consumer"""
+        with self.condition:
+            return self.condition.wait_for(lambda: self.taken >= self.index or self.closed, timeout)
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class CaptureThread(threading.Thread):
+    """Reads frames from a cv2.VideoCapture as fast as it delivers them, keeping only the latest.
+
+    With `on_demand=True` the next frame is only read once the previous one was
+    taken, for sources that are not paced (files read as fast as possible),
+    where reading ahead would only produce frames to drop.
+    """
+
+    def __init__(self, cap, on_demand=False, tracer=None):
+        super().__init__(name="capture", daemon=True)
+        self.cap = cap
+        self.on_demand = on_demand
+        self.tracer = tracer or Tracer(enabled=False)
+        self.latest = LatestFrame()
+        self.stats = StageCounter()
+        self.running = True
+
+    def run(self):
+        while self.running:
+            if self.on_demand and not self.latest.wait_taken(timeout=0.1):
+                continue
+            start = time.perf_counter()
+            ret, frame = self.cap.read()
+            if not ret:
+                print("Error: Could not read frame.")
+                time.sleep(0.1)
+                continue
+            self.latest.put(frame)
+            end = time.perf_counter()
+            self.stats.tick(end - start)
+            self.tracer.record('capture', start, end)
+        self.latest.close()
+
+    def stop(self):
+        self.running = False
+        self.join()
+
+
+class InferenceWorker(QThread):
+    """Runs a FrameProcessor on the newest captured frame; frames captured meanwhile are dropped"""
+
+    result_ready = pyqtSignal(object)
+
+    def __init__(self, latest, processor):
+        super().__init__()
+        self.latest = latest
+        self.processor = processor
+        self.stats = StageCounter()
+
+    def run(self):
+        # Names the thread in traces
+        threading.current_thread().name = "inference"
+        index = 0
+        while not self.isInterruptionRequested():
+            item = self.latest.get(after=index, timeout=0.1)
+            if item is None:
+                continue
+            dropped = item[0] - index - 1 if index else 0
+            index, frame, captured_at = item
+
+            start = time.perf_counter()
+            result = self.processor.process(frame)
+            self.stats.tick(time.perf_counter() - start, dropped)
+
+            result.captured_at = captured_at
+            self.result_ready.emit(result)
+
+    def stop(self):
+        self.requestInterruption()
+        self.wait()
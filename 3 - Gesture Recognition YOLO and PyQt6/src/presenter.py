@@ -0,0 +1,122 @@
+# presenter.py
+import sys
+
+import cv2
+import numpy as np
+from PyQt6 import QtCore, QtGui, QtWidgets
+
+# Format_RGB32 pixels are stored as B, G, R, 0xff bytes on little-endian machines,
+# which is exactly what cv2.COLOR_BGR2BGRA produces. It is the raster paint engine's
+# own format, so QPixmap.fromImage shares the buffer instead of converting it.
+# Format_BGR888 wraps the OpenCV frame as well, but has to be converted by Qt.
+NATIVE_BGRA = sys.byteorder == 'little'
+
+
+class FramePresenter:
+    """Shows BGR frames from OpenCV in a QLabel, scaling each frame once.
+
+    Frames are converted into preallocated buffers that are reused from one
+    frame to the next, resized with OpenCV to the label size (the label does
+    not scale its contents itself) and wrapped in a QImage without copying.
+    Two buffers are used in turn, so the one the label currently shows is
+    never written to.
+    """
+
+    def __init__(self, label):
+        self.label = label
+        self.label.setScaledContents(False)
+        # The pixmap always matches the label, so it must not drive the layout
+        self.label.setSizePolicy(QtWidgets.QSizePolicy.Policy.Ignored, QtWidgets.QSizePolicy.Policy.Ignored)
+        self.label.setMinimumSize(320, 240)
+        self.channels = 4 if NATIVE_BGRA else 3
+        self.image_format = QtGui.QImage.Format.Format_RGB32 if NATIVE_BGRA else QtGui.QImage.Format.Format_BGR888
+        self.converted = [None, None]
+        self.scaled = [None, None]
+        self.current = 0
+
+    def target_size(self):
+        size = self.label.contentsRect().size()
+        return max(size.width(), 1), max(size.height(), 1)
+
+    def buffer(self, buffers, height, width):
+        array = buffers[self.current]
+        if array is None or array.shape[:2] != (height, width):
+            # Only reallocated when the frame or the label size changes
+            array = np.empty((height, width, self.channels), dtype=np.uint8)
+            buffers[self.current] = array
+        return array
+
+    def present(self, frame):
+        if frame is None or frame.ndim != 3 or frame.shape[0] == 0 or frame.shape[1] == 0:
+            print("Error: Frame is None or has invalid shape.")
+            return
+
+        self.current = 1 - self.current
+        previous = self.label.pixmap()
+        height, width = frame.shape[:2]
+        if NATIVE_BGRA:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA, dst=self.buffer(self.converted, height, width))
+
+        target_width, target_height = self.target_size()
+        if (width, height) != (target_width, target_height):
+            frame = cv2.resize(frame, (target_width, target_height),
+                               dst=self.buffer(self.scaled, target_height, target_width),
+                               interpolation=cv2.INTER_LINEAR)
+        elif not frame.flags['C_CONTIGUOUS']:
+            frame = np.ascontiguousarray(frame)
+
+        image = QtGui.QImage(frame.data, frame.shape[1], frame.shape[0], frame.strides[0], self.image_format)
+        self.label.setPixmap(QtGui.QPixmap.fromImage(image))
+        del previous
+
+
+def legacy_present(label, frame):
+    """The presentation path the app used before FramePresenter, kept for the benchmark below"""
+    rgb_image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    h, w, ch = rgb_image.shape
+    bytes_per_line = ch * w
+    qt_image = QtGui.QImage(rgb_image.data, w, h, bytes_per_line, QtGui.QImage.Format.Format_RGB888)
+    scaled_pixmap = QtGui.QPixmap.fromImage(qt_image.scaled(640, 480, QtCore.Qt.AspectRatioMode.KeepAspectRatio))
+    label.setPixmap(scaled_pixmap)
+
+
+if __name__ == "__main__":
+    import time
+    import argparse
+    import tracemalloc
+
+    parser = argparse.ArgumentParser(description="Per-frame cost of showing a 640x480 camera frame in the Qt label")
+    parser.add_argument('--frames', type=int, default=300)
+    parser.add_argument('--label-size', type=int, nargs=2, default=[940, 700], metavar=('WIDTH', 'HEIGHT'))
+    args = parser.parse_args()
+
+    app = QtWidgets.QApplication(sys.argv[:1])
+    label = QtWidgets.QLabel()
+    label.setFixedSize(*args.label_size)
+    label.show()
+    frames = [np.random.default_rng(i).integers(0, 256, (480, 640, 3), dtype=np.uint8) for i in range(8)]
+
+    def measure(name, present):
+        # grab() paints the label, so scaling done at paint time is included
+        for frame in frames:
+            present(frame)
+            label.grab()
+
+        tracemalloc.start()
+        allocated = 0
+        start = time.perf_counter()
+        for i in range(args.frames):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            present(frames[i % len(frames)])
+            allocated += tracemalloc.get_traced_memory()[1] - before
+            label.grab()
+        elapsed = time.perf_counter() - start
+        tracemalloc.stop()
+        print(f"{name:>9}: {elapsed / args.frames * 1000:.2f} ms/frame, "
+              f"{allocated / args.frames / 1024:.0f} KiB allocated per frame by NumPy/OpenCV")
+
+    label.setScaledContents(True)
+    measure("legacy", lambda frame: legacy_present(label, frame))
+    presenter = FramePresenter(label)
+    measure("presenter", presenter.present)
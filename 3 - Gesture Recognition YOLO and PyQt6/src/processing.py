@@ -0,0 +1,125 @@
+# processing.py
+import time
+
+import cv2
+
+from detection import CONFIDENCE_THRESHOLD, GestureStateMachine, best_detection
+from tracking import DetectThenTrack
+from roi import RoiDetector
+from tracing import Tracer
+
+FRAME_SIZE = (640, 480)
+
+class FrameResult:
+    """Everything the GUI needs to render one processed frame"""
+
+    def __init__(self, frame, prediction=None, confidence=0.0, command_text=None,
+                 countdown_remaining=None, countdown_total=None, command=None, tracked=False):
+        self.frame = frame
+        self.prediction = prediction
+        self.confidence = confidence
+        self.tracked = tracked
+        # Text for the command label, None when no gesture was detected
+        self.command_text = command_text
+        # Seconds left before the command runs, None when no countdown is active
+        self.countdown_remaining = countdown_remaining
+        self.countdown_total = countdown_total
+        # Command to execute now that the countdown is over
+        self.command = command
+        self.captured_at = None
+
+
+class FrameProcessor:
+    """Resize, detection, box drawing and the gesture stability/countdown logic for one frame.
+
+    Does not touch any widget, so it can run outside the GUI thread. `get_settings`
+    returns the current Settings, which the settings dialog can replace at any time.
+    With `tracking=True` YOLO only runs on some frames and the hand box is
+    tracked in between (see DetectThenTrack). With `roi=True` YOLO runs on a
+    crop around the last hand box at input size `roi_imgsz` whenever it can
+    (see RoiDetector). `timings` holds the duration in seconds of each stage
+    of the last processed frame; the stages are also recorded as spans in
+    `tracer`.
+    """
+
+    def __init__(self, model, get_settings, tracking=False, roi=False, roi_imgsz=320, tracer=None):
+        self.model = model
+        self.get_settings = get_settings
+        self.tracer = tracer or Tracer(enabled=False)
+        self.roi = RoiDetector(self.run_model, imgsz=roi_imgsz) if roi else None
+        self.tracker = DetectThenTrack(self.detect, threshold=CONFIDENCE_THRESHOLD) if tracking else None
+        self.state_machine = GestureStateMachine(get_settings().countdown)
+        self.timings = {}
+
+    def process(self, frame):
+        start = time.perf_counter()
+        frame = cv2.resize(frame, FRAME_SIZE)
+        resized = time.perf_counter()
+
+        detection = self.tracker(frame) if self.tracker is not None else self.detect(frame)
+        inferred = time.perf_counter()
+        if self.roi is not None:
+            # Tracked boxes move the crop too
+            self.roi.follow(detection)
+
+        frame_result = self.finish(frame, detection)
+        self.timings = dict(resize=resized - start, inference=inferred - resized, **self.timings)
+        self.tracer.record('resize', start, resized)
+        self.tracer.record('inference', resized, inferred)
+        return frame_result
+
+    def finish(self, frame, detection):
+        """Draw the detection on the (resized) frame and update the countdown; also used with batched detection"""
+        settings = self.get_settings()
+        start = time.perf_counter()
+        current_prediction = None
+        highest_confidence = 0
+        command_text = None
+
+        if detection is not None:
+            current_prediction = detection.label
+            highest_confidence = detection.confidence
+
+            # Draw the bounding box on the frame
+            x1, y1, x2, y2 = map(int, detection.box)
+            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            cv2.putText(frame, f'{current_prediction} ({highest_confidence:.2f})', (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 2)
+
+            command_text = settings.gesture_commands.get(current_prediction, '')
+            if len(command_text) > 25:
+                command_text = command_text[:25] + "..."
+        drawn = time.perf_counter()
+
+        # Handle gesture execution
+        state = self.state_machine.update(current_prediction, settings.countdown)
+        frame_result = FrameResult(frame, current_prediction, highest_confidence, command_text,
+                                   tracked=detection is not None and detection.tracked)
+
+        if state.countdown_remaining is not None:
+            frame_result.countdown_remaining = state.countdown_remaining
+            frame_result.countdown_total = settings.countdown
+
+            if state.triggered:
+                if current_prediction is not None and settings.gesture_commands.get(current_prediction, '') != '':
+                    frame_result.command = settings.gesture_commands[current_prediction]
+
+        end = time.perf_counter()
+        self.timings = {
+            'draw': drawn - start,
+            'decision': end - drawn,
+        }
+        self.tracer.record('draw', start, drawn)
+        self.tracer.record('decision', drawn, end)
+        return frame_result
+
+    def detect(self, frame):
+        """Run YOLO on the frame and return the highest confidence box above the threshold, or None"""
+        if self.roi is not None:
+            return self.roi(frame)
+        return self.run_model(frame)
+
+    def run_model(self, image, imgsz=None):
+        result = self.model(image) if imgsz is None else self.model(image, imgsz=imgsz)
+        if len(result) == 0:
+            return None
+        return best_detection(result[0])
@@ -0,0 +1,92 @@
+# roi.py
+from detection import Detection
+
+
+class RoiDetector:
+    """Runs the detector on a crop around the last hand box instead of the full frame.
+
+    `detect(image, imgsz=None)` returns the best Detection of an image or None,
+    with `imgsz` the model input size (None for the model default). Once a hand
+    was found, the next frames are detected on a square crop around its box,
+    padded by `padding` times the box size on each side, at input size `imgsz`.
+    The full frame is detected again when nothing above the threshold is found
+    in the crop, when the box touches the edge of the crop (the hand is leaving
+    it) or when the crop would cover most of the frame anyway. Boxes are
+    returned in frame coordinates.
+    """
+
+    def __init__(self, detect, imgsz=320, padding=0.5, min_size=160, max_fraction=0.8, edge_margin=4):
+        self.detect = detect
+        self.imgsz = imgsz
+        self.padding = padding
+        self.min_size = min_size
+        self.max_fraction = max_fraction
+        self.edge_margin = edge_margin
+        self.box = None
+
+        self.roi_frames = 0
+        self.full_frames = 0
+        self.fallbacks = 0
+
+    def __call__(self, frame):
+        height, width = frame.shape[:2]
+        region = self.region(width, height)
+        if region is not None:
+            x1, y1, x2, y2 = region
+            detection = self.detect(frame[y1:y2, x1:x2], imgsz=self.imgsz)
+            if detection is not None:
+                bx1, by1, bx2, by2 = detection.box
+                detection = Detection(detection.label, detection.confidence, [bx1 + x1, by1 + y1, bx2 + x1, by2 + y1])
+                if self.inside(detection.box, region, width, height):
+                    self.roi_frames += 1
+                    self.follow(detection)
+                    return detection
+            # Lost the hand, or it is leaving the crop: look at the whole frame on this same frame
+            self.fallbacks += 1
+
+        detection = self.detect(frame)
+        self.full_frames += 1
+        self.follow(detection)
+        return detection
+
+    def follow(self, detection):
+        """Center the next crop on this detection (also a tracked one); None goes back to full frames"""
+        self.box = detection.box if detection is not None else None
+
+    def region(self, width, height):
+        """Crop (x1, y1, x2, y2) for the next frame, or None to detect on the full frame"""
+        if self.box is None:
+            return None
+
+        x1, y1, x2, y2 = self.box
+        size = max(x2 - x1, y2 - y1) * (1 + 2 * self.padding)
+        size = int(max(size, self.min_size))
+        if size > self.max_fraction * min(width, height):
+            return None
+
+        # Keep the crop square and inside the frame by shifting it rather than clipping it
+        cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+        left = int(min(max(cx - size / 2, 0), width - size))
+        top = int(min(max(cy - size / 2, 0), height - size))
+        return left, top, left + size, top + size
+
+    def inside(self, box, region, width, height):
+        """False when the box touches a side of the crop that is not also a side of the frame"""
+        x1, y1, x2, y2 = box
+        left, top, right, bottom = region
+        margin = self.edge_margin
+        return not (
+            (left > 0 and x1 <= left + margin) or
+            (top > 0 and y1 <= top + margin) or
+            (right < width and x2 >= right - margin) or
+            (bottom < height and y2 >= bottom - margin)
+        )
+
+    def stats(self):
+        total = self.roi_frames + self.full_frames
+        return {
+            'roi_frames': self.roi_frames,
+            'full_frames': self.full_frames,
+            'fallbacks': self.fallbacks,
+            'roi_ratio': self.roi_frames / total if total else 0.0,
+        }
@@ -18,6 +18,10 @@ class Settings():
                                  'Horns': '',
                                  'Fist': ''}
         self.countdown = 3
+        # Inference backend, see backends.BACKENDS; read once at startup
+        self.backend = 'pytorch'
+        # Seconds a gesture command may run before it is killed, 0 for no limit
+        self.command_timeout = 60
 
     # read data from file and fill the settings
     def fill_settings(self, settings_file):
@@ -30,6 +34,10 @@ class Settings():
                 key, value = line.split("<=>")
                 if key == "countdown":
                     self.countdown = int(value)
+                elif key == "backend":
+                    self.backend = value
+                elif key == "command_timeout":
+                    self.command_timeout = int(value)
                 else:
                     self.gesture_commands[key] = value
 
@@ -0,0 +1,145 @@
+# sources.py
+import os
+import glob
+import time
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+class FrameSource:
+    """Base class of the frame sources: the read()/isOpened()/release() subset of cv2.VideoCapture.
+
+    With `fps` set, read() is paced to that frame rate like a camera would be;
+    with `loop=True` a finite source starts over instead of ending.
+    """
+
+    def __init__(self, fps=None, loop=False):
+        self.fps = fps
+        self.loop = loop
+        self.next_frame_time = None
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        if self.fps:
+            now = time.perf_counter()
+            if self.next_frame_time is not None and now < self.next_frame_time:
+                time.sleep(self.next_frame_time - now)
+            self.next_frame_time = max(now, self.next_frame_time or now) + 1 / self.fps
+        return self.read_frame()
+
+    def read_frame(self):
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+
+class CameraSource(FrameSource):
+    """A webcam; the camera itself sets the pace"""
+
+    def __init__(self, index=0):
+        super().__init__()
+        self.cap = cv2.VideoCapture(index)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read_frame(self):
+        return self.cap.read()
+
+    def release(self):
+        self.cap.release()
+
+
+class VideoFileSource(FrameSource):
+    def __init__(self, path, realtime=False, loop=False):
+        self.cap = cv2.VideoCapture(path)
+        fps = self.cap.get(cv2.CAP_PROP_FPS) if realtime else None
+        super().__init__(fps or None, loop)
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read_frame(self):
+        ret, frame = self.cap.read()
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        return ret, frame
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageDirectorySource(FrameSource):
+    """Cycles through the images of a directory (e.g. images/) in name order, decoded once up front"""
+
+    def __init__(self, path, fps=None, loop=True):
+        super().__init__(fps, loop)
+        files = sorted(f for f in glob.glob(os.path.join(path, '*')) if f.lower().endswith(IMAGE_EXTENSIONS))
+        self.frames = [frame for frame in (cv2.imread(f) for f in files) if frame is not None]
+        self.index = 0
+
+    def isOpened(self):
+        return len(self.frames) > 0
+
+    def read_frame(self):
+        if self.index >= len(self.frames):
+            if not self.loop or not self.frames:
+                return False, None
+            self.index = 0
+        frame = self.frames[self.index]
+        self.index += 1
+        # Callers draw on the frame, so the cached image is not handed out
+        return True, frame.copy()
+
+
+class SyntheticSource(FrameSource):
+    """Generated frames: a textured square moving over a noisy background, reproducible for a given seed"""
+
+    def __init__(self, width=1280, height=720, fps=None, frames=None, seed=0):
+        super().__init__(fps)
+        rng = np.random.default_rng(seed)
+        self.background = cv2.GaussianBlur(rng.integers(0, 80, (height, width, 3), dtype=np.uint8), (9, 9), 0)
+        size = min(width, height) // 4
+        self.patch = cv2.GaussianBlur(rng.integers(0, 256, (size, size, 3), dtype=np.uint8), (5, 5), 0)
+        self.frames = frames
+        self.index = 0
+
+    def read_frame(self):
+        if self.frames is not None and self.index >= self.frames:
+            return False, None
+        h, w = self.background.shape[:2]
+        size = self.patch.shape[0]
+        t = self.index / 30
+        x = int((w - size) * (0.5 + 0.4 * np.sin(t)))
+        y = int((h - size) * (0.5 + 0.4 * np.cos(0.7 * t)))
+        frame = self.background.copy()
+        frame[y:y + size, x:x + size] = self.patch
+        self.index += 1
+        return True, frame
+
+
+def open_source(spec, realtime=True, fps=30):
+    """Build a frame source from a command line value.
+
+    `spec` is a camera index ("0"), a video file, a directory of images or
+    "synthetic". With `realtime` files and images are paced to their own
+    frame rate (images and synthetic frames to `fps`); without it they are
+    read as fast as possible.
+    """
+    spec = str(spec)
+    if spec.isdigit():
+        return CameraSource(int(spec))
+    if spec == 'synthetic':
+        return SyntheticSource(fps=fps if realtime else None)
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec, fps=fps if realtime else None)
+    if os.path.isfile(spec):
+        return VideoFileSource(spec, realtime=realtime, loop=realtime)
+    raise ValueError(f"Unknown frame source: {spec}")
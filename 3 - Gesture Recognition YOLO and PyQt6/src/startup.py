@@ -0,0 +1,72 @@
+# startup.py
+import threading
+
+import numpy as np
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from backends import load_model
+from sources import open_source
+
+
+def warm_up(model, sizes=(None,)):
+    """Run the model once per input size on a blank frame, so the first real frame does not pay for graph and kernel setup"""
+    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+    for size in sizes:
+        if size is None:
+            model(frame)
+        else:
+            model(frame[:size, :size], imgsz=size)
+
+
+class StartupLoader(QThread):
+    """Loads and warms up the model and opens the frame source while the window is already shown.
+
+    The source is opened in a second thread at the same time as the model is
+    loaded (with `parallel=False` one after the other, as the app used to).
+    `camera_ready` and `model_ready` are emitted as soon as each is done, in
+    any order; `progress` reports the current step and `failed` any error.
+    """
+
+    progress = pyqtSignal(str)
+    camera_ready = pyqtSignal(object)
+    model_ready = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+    def __init__(self, source, backend, warmup_sizes=(None,), parallel=True):
+        super().__init__()
+        self.source = source
+        self.backend = backend
+        self.warmup_sizes = warmup_sizes
+        self.parallel = parallel
+
+    def run(self):
+        camera = None
+        if self.parallel:
+            camera = threading.Thread(target=self.open_camera, name="camera open", daemon=True)
+            camera.start()
+        else:
+            self.open_camera()
+
+        try:
+            self.progress.emit(f"Loading the {self.backend} model...")
+            model = load_model(self.backend)
+            self.progress.emit("Warming up the model...")
+            warm_up(model, self.warmup_sizes)
+            self.model_ready.emit(model)
+        except Exception as e:
+            self.failed.emit(f"Error: Could not load the {self.backend} model: {e}")
+
+        if camera is not None:
+            camera.join()
+
+    def open_camera(self):
+        self.progress.emit(f"Opening frame source {self.source}...")
+        try:
+            cap = open_source(self.source)
+        except ValueError as e:
+            self.failed.emit(f"Error: {e}")
+            return
+        if not cap.isOpened():
+            self.failed.emit(f"Error: Could not open frame source {self.source}.")
+            return
+        self.camera_ready.emit(cap)
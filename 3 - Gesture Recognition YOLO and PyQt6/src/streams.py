@@ -0,0 +1,120 @@
+# streams.py
+import time
+import threading
+
+import cv2
+
+from detection import CONFIDENCE_THRESHOLD, best_detection
+from pipeline import CaptureThread, StageCounter
+from processing import FRAME_SIZE, FrameProcessor
+
+
+class VideoStream:
+    """One station of the multi-stream mode: its frame source, capture thread and gesture state.
+
+    Every stream has its own Settings (so its own gesture commands and
+    countdown) and its own FrameProcessor, which keeps the stability and
+    countdown state of that stream. Detection is done for all streams at once
+    by MultiStreamWorker.
+    """
+
+    def __init__(self, name, source, settings, on_demand=False):
+        self.name = name
+        self.source = source
+        self.settings = settings
+        self.capture = CaptureThread(source, on_demand)
+        self.processor = FrameProcessor(None, lambda: self.settings)
+        self.stats = StageCounter()
+        self.last_index = 0
+        self.result = None
+
+    def stats_dict(self):
+        return {
+            'name': self.name,
+            'capture_fps': self.capture.stats.fps(),
+            'fps': self.stats.fps(),
+            'processed': self.stats.total,
+            'dropped': self.stats.dropped,
+            'latency_ms': self.stats.latency_ms(),
+            'prediction': self.result.prediction if self.result is not None else None,
+        }
+
+
+class MultiStreamWorker(threading.Thread):
+    """Runs one batched YOLO forward pass over the newest frame of every stream.
+
+    Each iteration takes the streams that have a frame newer than the one
+    they last processed (frames captured in between are dropped and counted),
+    resizes them to 640x480 and passes them to the model as one list, which
+    ultralytics and the exported backends run as a single batch. The
+    detections then go through each stream's own countdown logic, and
+    `on_result(stream, result)` is called with the FrameResult.
+    """
+
+    def __init__(self, model, streams, on_result=None, threshold=CONFIDENCE_THRESHOLD):
+        super().__init__(name="multistream", daemon=True)
+        self.model = model
+        self.streams = streams
+        self.on_result = on_result
+        self.threshold = threshold
+        self.running = True
+        self.batches = StageCounter()
+        self.batch_sizes = 0
+
+    def next_batch(self, timeout=0.1):
+        """Streams with a new frame and their frames; waits up to `timeout` for the first one"""
+        deadline = time.perf_counter() + timeout
+        while self.running:
+            batch = []
+            for stream in self.streams:
+                item = stream.capture.latest.get(after=stream.last_index, timeout=0)
+                if item is not None:
+                    batch.append((stream, item))
+            if batch or time.perf_counter() >= deadline:
+                return batch
+            time.sleep(0.001)
+        return []
+
+    def run(self):
+        while self.running:
+            batch = self.next_batch()
+            if not batch:
+                continue
+
+            start = time.perf_counter()
+            frames = [cv2.resize(frame, FRAME_SIZE) for _, (_, frame, _) in batch]
+            results = self.model(frames)
+            detections = [best_detection(result, self.threshold) for result in results]
+
+            for (stream, (index, _, captured_at)), frame, detection in zip(batch, frames, detections):
+                dropped = index - stream.last_index - 1 if stream.last_index else 0
+                stream.last_index = index
+                stream.result = stream.processor.finish(frame, detection)
+                stream.stats.tick(time.perf_counter() - captured_at, dropped)
+                if self.on_result is not None:
+                    self.on_result(stream, stream.result)
+
+            self.batches.tick(time.perf_counter() - start)
+            self.batch_sizes += len(batch)
+
+    def start_all(self):
+        for stream in self.streams:
+            stream.capture.start()
+        self.start()
+
+    def stop(self):
+        self.running = False
+        self.join()
+        for stream in self.streams:
+            stream.capture.stop()
+            stream.source.release()
+
+    def stats(self):
+        batches = self.batches.total
+        return {
+            'fps': sum(stream.stats.fps() for stream in self.streams),
+            'batches_per_s': self.batches.fps(),
+            'mean_batch_size': self.batch_sizes / batches if batches else 0.0,
+            'batch_latency_ms': self.batches.latency_ms(),
+            'streams': [stream.stats_dict() for stream in self.streams],
+        }
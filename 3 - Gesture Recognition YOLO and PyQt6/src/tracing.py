@@ -0,0 +1,119 @@
+# tracing.py
+import os
+import json
+import time
+import threading
+
+import numpy as np
+
+
+class Span:
+    """Times a `with` block and records it in the tracer"""
+    __slots__ = ('tracer', 'name', 'start')
+
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.record(self.name, self.start, time.perf_counter())
+
+
+class NoSpan:
+    """What a disabled tracer hands out: does nothing"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+NO_SPAN = NoSpan()
+
+
+class Tracer:
+    """Named spans of the frame pipeline, kept in a fixed-size ring buffer.
+
+    `span(name)` is a context manager; stages that already time themselves
+    call `record(name, start, end)` with time.perf_counter() values. Only
+    the last `capacity` spans are kept, in preallocated arrays, so tracing
+    can stay on. When disabled, `span` returns a shared no-op object and
+    `record` returns at once. Any thread can record.
+    """
+
+    def __init__(self, capacity=20000, enabled=True):
+        self.enabled = enabled
+        self.capacity = capacity
+        self.names = {}
+        self.name_ids = np.zeros(capacity, dtype=np.int16)
+        self.starts = np.zeros(capacity, dtype=np.float64)
+        self.durations = np.zeros(capacity, dtype=np.float64)
+        self.threads = np.zeros(capacity, dtype=np.int64)
+        self.thread_names = {}
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def span(self, name):
+        if not self.enabled:
+            return NO_SPAN
+        return Span(self, name)
+
+    def record(self, name, start, end):
+        if not self.enabled:
+            return
+        thread = threading.get_ident()
+        with self.lock:
+            name_id = self.names.get(name)
+            if name_id is None:
+                name_id = self.names[name] = len(self.names)
+            if thread not in self.thread_names:
+                self.thread_names[thread] = threading.current_thread().name
+            i = self.count % self.capacity
+            self.name_ids[i] = name_id
+            self.starts[i] = start
+            self.durations[i] = end - start
+            self.threads[i] = thread
+            self.count += 1
+
+    def snapshot(self):
+        """Copy of the recorded spans, oldest first: (names by id, name ids, starts, durations, threads)"""
+        with self.lock:
+            n = min(self.count, self.capacity)
+            order = np.roll(np.arange(n), -(self.count % self.capacity)) if self.count > self.capacity else np.arange(n)
+            names = {name_id: name for name, name_id in self.names.items()}
+            return names, self.name_ids[order], self.starts[order], self.durations[order], self.threads[order]
+
+    def stats(self, window=5.0):
+        """Per span name over the last `window` seconds: rate per second and p50/p95 duration in ms"""
+        names, name_ids, starts, durations, _ = self.snapshot()
+        recent = starts >= time.perf_counter() - window
+        name_ids, durations = name_ids[recent], durations[recent] * 1000
+        stats = {}
+        for name_id in np.unique(name_ids):
+            values = durations[name_ids == name_id]
+            stats[names[name_id]] = {
+                'per_s': len(values) / window,
+                'p50_ms': float(np.percentile(values, 50)),
+                'p95_ms': float(np.percentile(values, 95)),
+            }
+        return stats
+
+    def export_chrome(self, path):
+        """Write the spans as Chrome trace events (open in chrome://tracing or Perfetto)"""
+        names, name_ids, starts, durations, threads = self.snapshot()
+        pid = os.getpid()
+        origin = starts.min() if len(starts) else 0.0
+        events = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': int(thread), 'args': {'name': name}}
+                  for thread, name in self.thread_names.items()]
+        events += [{'name': names[int(name_id)], 'ph': 'X', 'pid': pid, 'tid': int(thread),
+                    'ts': (start - origin) * 1e6, 'dur': duration * 1e6}
+                   for name_id, start, duration, thread in zip(name_ids, starts, durations, threads)]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        return len(events)
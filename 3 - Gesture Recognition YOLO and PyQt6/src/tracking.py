@@ -0,0 +1,177 @@
+# tracking.py
+import math
+import time
+
+import cv2
+import numpy as np
+
+
+class OpticalFlowTracker:
+    """Follows a box between frames with pyramidal Lucas-Kanade optical flow.
+
+    Corners found inside the box are tracked forward and then backward; points
+    that do not come back to where they started are discarded, and the box is
+    moved by the median displacement and scaled by the median change of spread
+    of the remaining points.
+    """
+
+    def __init__(self, max_points=40, min_points=6, max_backward_error=1.0):
+        self.max_points = max_points
+        self.min_points = min_points
+        self.max_backward_error = max_backward_error
+        self.lk_params = dict(winSize=(15, 15), maxLevel=2,
+                              criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+        self.points = None
+        self.gray = None
+        self.box = None
+        self.initial_points = 0
+
+    def start(self, gray, box):
+        """Start following `box` (x1, y1, x2, y2) from the grayscale frame `gray`; returns False if it has no texture"""
+        h, w = gray.shape
+        x1, y1, x2, y2 = clip_box(box, w, h)
+        mask = np.zeros_like(gray)
+        mask[y1:y2, x1:x2] = 255
+        points = cv2.goodFeaturesToTrack(gray, self.max_points, qualityLevel=0.01, minDistance=5, mask=mask)
+        if points is None or len(points) < self.min_points:
+            self.points = None
+            return False
+
+        self.points = points
+        self.initial_points = len(points)
+        self.gray = gray
+        self.box = np.array([x1, y1, x2, y2], dtype=np.float32)
+        return True
+
+    def update(self, gray):
+        """Box in the new frame and the fraction of points still tracked, or (None, 0) when the track is lost"""
+        if self.points is None:
+            return None, 0.0
+
+        forward, status, _ = cv2.calcOpticalFlowPyrLK(self.gray, gray, self.points, None, **self.lk_params)
+        backward, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, self.gray, forward, None, **self.lk_params)
+        error = np.linalg.norm((self.points - backward).reshape(-1, 2), axis=1)
+        good = (status.ravel() == 1) & (back_status.ravel() == 1) & (error < self.max_backward_error)
+        if good.sum() < self.min_points:
+            self.points = None
+            return None, 0.0
+
+        old, new = self.points.reshape(-1, 2)[good], forward.reshape(-1, 2)[good]
+        dx, dy = np.median(new - old, axis=0)
+        old_spread = np.linalg.norm(old - old.mean(axis=0), axis=1)
+        new_spread = np.linalg.norm(new - new.mean(axis=0), axis=1)
+        scale = float(np.median(new_spread[old_spread > 0] / old_spread[old_spread > 0])) if (old_spread > 0).any() else 1.0
+
+        cx, cy = (self.box[0] + self.box[2]) / 2 + dx, (self.box[1] + self.box[3]) / 2 + dy
+        half_w, half_h = (self.box[2] - self.box[0]) * scale / 2, (self.box[3] - self.box[1]) * scale / 2
+        self.box = np.array([cx - half_w, cy - half_h, cx + half_w, cy + half_h], dtype=np.float32)
+
+        h, w = gray.shape
+        if cx < 0 or cy < 0 or cx >= w or cy >= h:
+            # The hand left the frame
+            self.points = None
+            return None, 0.0
+
+        self.points = new.reshape(-1, 1, 2)
+        self.gray = gray
+        return self.box.copy(), len(new) / self.initial_points
+
+
+def clip_box(box, width, height):
+    x1, y1, x2, y2 = (int(round(float(v))) for v in box)
+    return max(0, x1), max(0, y1), min(width, x2), min(height, y2)
+
+
+class DetectThenTrack:
+    """Runs the detector only on some frames and tracks its box on the others.
+
+    `detect(frame)` returns the best Detection of a frame or None. A full
+    detection runs every `interval` frames, where `interval` adapts so that the
+    detector uses about `budget` of the time between frames, and at once when
+    the track is lost, its quality drops below `min_track_quality` or the last
+    detection was within `confidence_margin` of `threshold`.
+    """
+
+    def __init__(self, detect, threshold=0.55, budget=0.5, min_interval=1, max_interval=10,
+                 min_track_quality=0.5, confidence_margin=0.1):
+        self.detect = detect
+        self.threshold = threshold
+        self.budget = budget
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.min_track_quality = min_track_quality
+        self.confidence_margin = confidence_margin
+
+        self.tracker = OpticalFlowTracker()
+        self.detection = None
+        self.interval = min_interval
+        self.frames_since_detection = 0
+        self.force_detection = True
+
+        # Exponential moving averages, in seconds
+        self.detect_latency = None
+        self.frame_interval = None
+        self.last_call = None
+
+        self.detected_frames = 0
+        self.skipped_frames = 0
+
+    def __call__(self, frame):
+        now = time.perf_counter()
+        if self.last_call is not None:
+            self.frame_interval = moving_average(self.frame_interval, now - self.last_call)
+        self.last_call = now
+
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if self.force_detection or self.frames_since_detection + 1 >= self.interval:
+            return self.run_detection(frame, gray)
+
+        if self.detection is None:
+            # Nothing to follow, keep reporting no detection until the next scheduled one
+            self.frames_since_detection += 1
+            self.skipped_frames += 1
+            return None
+
+        box, quality = self.tracker.update(gray)
+        if box is None or quality < self.min_track_quality:
+            return self.run_detection(frame, gray)
+        self.frames_since_detection += 1
+        self.skipped_frames += 1
+        return self.detection.moved_to(box)
+
+    def run_detection(self, frame, gray):
+        start = time.perf_counter()
+        detection = self.detect(frame)
+        self.detect_latency = moving_average(self.detect_latency, time.perf_counter() - start)
+        self.detected_frames += 1
+        self.frames_since_detection = 0
+        self.update_interval()
+
+        self.detection = detection
+        self.force_detection = False
+        if detection is not None:
+            tracking = self.tracker.start(gray, detection.box)
+            close_call = detection.confidence < self.threshold + self.confidence_margin
+            self.force_detection = not tracking or close_call
+        return detection
+
+    def update_interval(self):
+        if self.detect_latency is None or self.frame_interval is None:
+            return
+        # Detect every k frames so the detector takes about `budget` of the frame time
+        interval = math.ceil(self.detect_latency / (self.budget * self.frame_interval))
+        self.interval = min(max(interval, self.min_interval), self.max_interval)
+
+    def stats(self):
+        total = self.detected_frames + self.skipped_frames
+        return {
+            'interval': self.interval,
+            'detected_frames': self.detected_frames,
+            'skipped_frames': self.skipped_frames,
+            'detection_ratio': self.detected_frames / total if total else 0.0,
+            'detect_latency_ms': (self.detect_latency or 0.0) * 1000,
+        }
+
+
+def moving_average(average, value, weight=0.2):
+    return value if average is None else (1 - weight) * average + weight * value
@@ -1,8 +1,15 @@
 import cv2
+import os
 import sys
-from ultralytics import YOLO
-import time
-import subprocess
+import argparse
+
+# Add the src directory to the path
+sys.path.append(os.path.join(os.path.dirname(__file__), 'src'))
+
+from sources import CameraSource, open_source
+from detection import GestureStateMachine, best_detection
+from backends import BACKENDS, load_model
+from commands import CommandExecutor
 
 global_variables = {
         'gesture_commands': {'Thumb': 'pqiv --fullscreen ~/Untitled.jpeg',
@@ -19,32 +26,39 @@ global_variables = {
         }
 
 
+parser = argparse.ArgumentParser()
+parser.add_argument('--source', default='0', help="camera index, video file, image directory or 'synthetic'")
+parser.add_argument('--backend', choices=BACKENDS, default='pytorch', help="inference backend (exported with src/backends.py)")
+args = parser.parse_args()
+
 # Load YOLO model
-model = YOLO("model/yolov8_transfer_learning_v3.pt")
+model = load_model(args.backend)
 
 # Initialize video capture
-cap = cv2.VideoCapture(0)
-cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
+cap = open_source(args.source)
+if isinstance(cap, CameraSource):
+    cap.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
 
 if not cap.isOpened():
     print("Error: Could not open webcam.")
     sys.exit()
 
-# Initialize variables for prediction tracking
-last_prediction = None
-prediction_start_time = None
-countdown_started = False
-countdown_time = 3  # Countdown time in seconds
+# Stability and countdown logic, shared with app.py
+state_machine = GestureStateMachine(global_variables['countdown_time'])
+
+
+def command_finished(result):
+    print(f"Command {result.summary()}")
+    print(f"Command output: {result.stdout}")
+    print(f"Command error (if any): {result.stderr}")
+
+
+# Commands run in the background, so the video keeps playing while they run
+commands = CommandExecutor(on_finished=command_finished)
 
 
-def execute_command(command):
-    print(f"Executing command: {command}")
-    try:
-        result = subprocess.run(command, shell=True, check=True, capture_output=True, text=True)
-        print(f"Command output: {result.stdout}")
-        print(f"Command error (if any): {result.stderr}")
-    except subprocess.CalledProcessError as e:
-        print(f"Command failed with error: {e}")
+def execute_command(gesture, command):
+    print(f"Executing command: {command} ({commands.submit(gesture, command)})")
 
 while True:
     ret, frame = cap.read()
@@ -57,33 +71,21 @@ while True:
     
     # Get the prediction with the highest confidence
     current_prediction = "No detection"
-    if len(results) > 0 and len(results[0].boxes) > 0:
-        best_box = results[0].boxes[0]
-        if best_box.conf.item() > 0.5:  # Adjust confidence threshold as needed
-            current_prediction = results[0].names[int(best_box.cls)]
+    detection = best_detection(results[0], threshold=0.5) if len(results) > 0 else None  # Adjust confidence threshold as needed
+    if detection is not None:
+        current_prediction = detection.label
 
     # Check if prediction is stable
-    if current_prediction == last_prediction:
-        if prediction_start_time is None:
-            prediction_start_time = time.time()
-        elif time.time() - prediction_start_time >= 1 and not countdown_started:
-            countdown_started = True
-            countdown_end_time = time.time() + global_variables['countdown_time']
-    else:
-        last_prediction = current_prediction
-        prediction_start_time = None
-        countdown_started = False
+    state = state_machine.update(current_prediction)
 
     # Draw prediction and countdown on frame
     annotated_frame = results[0].plot()
     cv2.putText(annotated_frame, f"Prediction: {current_prediction}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
 
-    if countdown_started:
-        remaining_time = max(0, int(countdown_end_time - time.time()))
-        cv2.putText(annotated_frame, f"Countdown: {remaining_time}", (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+    if state.countdown_remaining is not None:
+        cv2.putText(annotated_frame, f"Countdown: {state.countdown_remaining}", (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
 
-        if remaining_time == 0:
-            countdown_started = False
+        if state.triggered:
             if current_prediction != "No detection" and current_prediction not in global_variables['gesture_commands']:
                 continue
             
@@ -92,7 +94,7 @@ while True:
                 if global_variables['gesture_commands'][current_prediction] == '':
                     # Destroy all windows
                     break
-                execute_command(global_variables['gesture_commands'][current_prediction])
+                execute_command(current_prediction, global_variables['gesture_commands'][current_prediction])
 
     cv2.imshow('YOLO Detection', annotated_frame)
 
@@ -0,0 +1,111 @@
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from backends import Boxes, Result
+from detection import CONFIDENCE_THRESHOLD, GestureStateMachine, best_detection
+
+NAMES = {0: 'Thumb', 1: 'Zero', 2: 'One', 3: 'Two', 4: 'Three', 5: 'Four', 6: 'Five', 7: 'Horns', 8: 'Fist', 9: 'C'}
+
+
+def recorded_result(xyxy, conf, cls):
+    """A detection result as the exported backends return it, from recorded boxes"""
+    image = np.zeros((480, 640, 3), dtype=np.uint8)
+    boxes = Boxes(np.array(xyxy, dtype=np.float32).reshape(-1, 4), np.array(conf, dtype=np.float32),
+                  np.array(cls, dtype=np.float32))
+    return Result(image, boxes, NAMES)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class GestureStateMachineTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.machine = GestureStateMachine(countdown=3, hold_time=1, clock=self.clock)
+
+    def feed(self, prediction, at):
+        self.clock.now = at
+        return self.machine.update(prediction)
+
+    def test_hold_then_countdown_then_trigger(self):
+        # The first frame of a prediction and the hold time before the countdown
+        for at in (0.0, 0.5, 0.75):
+            state = self.feed('Five', at)
+            self.assertEqual(state.prediction, 'Five')
+            self.assertIsNone(state.countdown_remaining)
+            self.assertFalse(state.triggered)
+
+        # The hold is measured from the second frame (0.5 s): the countdown starts at 1.5 s
+        self.assertIsNone(self.feed('Five', 1.25).countdown_remaining)
+        self.assertEqual(self.feed('Five', 1.5).countdown_remaining, 3)
+        self.assertEqual(self.feed('Five', 2.5).countdown_remaining, 2)
+        self.assertEqual(self.feed('Five', 3.5).countdown_remaining, 1)
+
+        state = self.feed('Five', 4.5)
+        self.assertTrue(state.triggered)
+        self.assertEqual(state.countdown_remaining, 0)
+
+        # Triggered once: the next frame starts a new countdown
+        state = self.feed('Five', 5.0)
+        self.assertFalse(state.triggered)
+        self.assertEqual(state.countdown_remaining, 3)
+
+    def test_change_of_prediction_resets(self):
+        for at in (0.0, 0.25, 1.25):
+            self.feed('Fist', at)
+        self.assertEqual(self.feed('Fist', 1.5).countdown_remaining, 2)
+
+        # Another gesture cancels the countdown and must be held again
+        state = self.feed('Two', 1.75)
+        self.assertIsNone(state.countdown_remaining)
+        self.assertFalse(state.triggered)
+        for at in (2.0, 2.75):
+            self.assertIsNone(self.feed('Two', at).countdown_remaining)
+
+        # Losing the hand (no prediction) resets as well, nothing triggers on the old countdown
+        self.assertIsNone(self.feed(None, 3.0).countdown_remaining)
+        self.assertFalse(self.feed('Two', 4.25).triggered)
+
+    def test_countdown_override(self):
+        self.feed('C', 0.0)
+        self.feed('C', 0.25)
+        self.assertIsNone(self.machine.update('C', countdown=5).countdown_remaining)
+        self.clock.now = 1.25
+        self.assertEqual(self.machine.update('C', countdown=5).countdown_remaining, 5)
+
+
+class BestDetectionTest(unittest.TestCase):
+    def test_no_boxes(self):
+        self.assertIsNone(best_detection(recorded_result([], [], [])))
+
+    def test_best_box_at_the_threshold_is_rejected(self):
+        result = recorded_result([[10, 20, 110, 220], [30, 40, 130, 240]], [0.25, 0.5], [6, 8])
+        self.assertIsNone(best_detection(result, threshold=0.5))
+        self.assertIsNotNone(best_detection(result, threshold=0.4))
+
+    def test_highest_confidence_box_is_chosen(self):
+        xyxy = [[10, 20, 110, 220], [300, 50, 420, 200], [200, 100, 260, 180]]
+        result = recorded_result(xyxy, [0.6, 0.91, 0.7], [6, 8, 3])
+        detection = best_detection(result)
+        self.assertEqual(detection.label, 'Fist')
+        self.assertAlmostEqual(detection.confidence, 0.91, places=6)
+        self.assertEqual(detection.box, [300, 50, 420, 200])
+        self.assertFalse(detection.tracked)
+
+    def test_default_threshold(self):
+        self.assertIsNone(best_detection(recorded_result([[0, 0, 10, 10]], [CONFIDENCE_THRESHOLD - 0.05], [0])))
+        self.assertEqual(best_detection(recorded_result([[0, 0, 10, 10]], [CONFIDENCE_THRESHOLD + 0.05], [0])).label, 'Thumb')
+
+
+if __name__ == '__main__':
+    unittest.main()